@@ -10,7 +10,11 @@ untuk memperkaya konteks (RAG).
 Cara menjalankan:
 1) pip install -U streamlit google-generativeai langchain langchain-google-genai langchain-community chromadb PyPDF2 python-docx
 2) streamlit run ai_penasihat_akademik.py
-3) Masukkan Google AI API Key di sidebar.
+3) Google AI API Key diambil dari GOOGLE_API_KEY atau Streamlit Secrets; jika tidak ada,
+   masukkan di sidebar.
+
+Kenop kinerja (model, suhu, ukuran potongan, k, batas waktu, ...) diatur per deployment
+lewat preset + berkas konfigurasi + secrets/env, lihat `penasihat/konfigurasi.py`.
 
 Catatan:
 - Aplikasi ini TIDAK mengambil data internet. Rekomendasi adalah kombinasi pemetaan berbasis aturan
@@ -18,35 +22,53 @@ Catatan:
 """
 
 import os
-from datetime import datetime
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
+import pandas as pd
 import streamlit as st
 
-# Paket pemrosesan dokumen (opsional untuk upload rapor/sertifikat)
-import PyPDF2
-import docx
+from penasihat import konfigurasi
 
-# Google Gemini (langsung)
-import google.generativeai as genai
 
-# LangChain (LLM + Embeddings + VectorStore + Prompting)
-try:
-    from langchain_google_genai import (
-        ChatGoogleGenerativeAI,
-        GoogleGenerativeAIEmbeddings,
-    )
-    from langchain_community.vectorstores import Chroma
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import StrOutputParser
-    from langchain_core.runnables import RunnablePassthrough
-    from langchain_core.documents import Document
-except ImportError:
-    st.error(
-        "❗ Paket belum lengkap. Jalankan:\n\n"
-        "pip install -U langchain langchain-google-genai langchain-community chromadb"
-    )
-    st.stop()
+def _baca_secrets():
+    try:
+        return dict(st.secrets)
+    except Exception:  # tidak ada secrets.toml
+        return {}
+
+
+# Lapisan secrets diterapkan sebelum modul lain membaca PENASIHAT_* (lihat penasihat/konfigurasi.py)
+SECRETS = _baca_secrets()
+KONFIGURASI = konfigurasi.terapkan(sekret=SECRETS)
+
+# Mesin penasihat (Gemini + LangChain + Chroma) — di proses yang sama, atau lewat layanan HTTP
+# jika PENASIHAT_API_URL diisi (klien tipis: mesin dan dependensinya tidak dimuat di sini)
+URL_API = os.environ.get("PENASIHAT_API_URL")
+if not URL_API:
+    try:
+        from penasihat.mesin import MesinPenasihat
+    except ImportError:
+        st.error(
+            "❗ Paket belum lengkap. Jalankan:\n\n"
+            "pip install -U langchain langchain-google-genai langchain-community chromadb"
+        )
+        st.stop()
+
+# Modul pendukung aplikasi
+from penasihat import pemanasan, profil_kinerja
+from penasihat.bagaimana_jika import analisis_bagaimana_jika
+from penasihat.ekstraksi import ekstensi_didukung
+from penasihat.format_jawaban import PROFIL_DEFAULT, PROFIL_JAWABAN, TERSTRUKTUR_DEFAULT
+from penasihat.klien import KlienPenasihat
+from penasihat.mode_darurat import LURING
+from penasihat.pemetaan import buat_ringkasan_profil
+from penasihat.penyimpanan_sesi import buat_penyimpanan_sesi
+from penasihat.riwayat import PenyimpananPesan
+from penasihat.tenggat import TENGGAT_REKOMENDASI
+from penasihat.tugas_latar import jalankan_di_latar
 
 
 # --------------------------------------------------------------------------------------
@@ -136,520 +158,641 @@ st.markdown(
 # --------------------------------------------------------------------------------------
 # STATE (Bahasa Indonesia)
 # --------------------------------------------------------------------------------------
-if "pesan" not in st.session_state:
-    st.session_state.pesan = []
+# State yang bisa diserialisasi disimpan di luar proses agar sesi bertahan saat restart/pindah replika
+KUNCI_SESI_TERSIMPAN = ("ringkasan_profil", "rekomendasi_awal", "profil_skor", "lampiran_id", "tampilkan_tindakan_cepat")
+
+
+@st.cache_resource
+def muat_penyimpanan_sesi():
+    return buat_penyimpanan_sesi()
+
+
+def simpan_sesi():
+    data = {k: st.session_state[k] for k in KUNCI_SESI_TERSIMPAN}
+    data["pesan"] = st.session_state.pesan.ke_dict()
+    try:
+        muat_penyimpanan_sesi().simpan(st.session_state.sesi_id, data)
+    except Exception:
+        pass  # sesi tetap jalan di memori; hanya tidak bisa dilanjutkan di replika lain
+
+
+if "sesi_id" not in st.session_state:
+    # Lanjutkan sesi dari URL (?sesi=...) jika masih ada di penyimpanan sesi
+    sesi_id = st.query_params.get("sesi", "")
+    tersimpan = None
+    try:
+        penyimpanan_sesi = muat_penyimpanan_sesi()
+    except Exception:
+        penyimpanan_sesi = None  # arsip chat jatuh ke berkas lokal (PENASIHAT_DIR_RIWAYAT)
+    if penyimpanan_sesi is not None and re.fullmatch(r"[0-9a-f]{32}", sesi_id):
+        try:
+            tersimpan = penyimpanan_sesi.muat(sesi_id)
+        except Exception:
+            tersimpan = None
+    if tersimpan is None:
+        sesi_id, tersimpan = uuid.uuid4().hex, {}
+    st.session_state.sesi_id = sesi_id
+    st.query_params["sesi"] = sesi_id
+    # Arsip pesan lama di penyimpanan sesi yang sama → ikut terbawa ke replika lain
+    st.session_state.pesan = PenyimpananPesan.dari_dict(sesi_id, tersimpan.get("pesan", {}), penyimpanan=penyimpanan_sesi)
+    for kunci in KUNCI_SESI_TERSIMPAN:
+        if kunci in tersimpan:
+            st.session_state[kunci] = tersimpan[kunci]
+if "jumlah_arsip_tampil" not in st.session_state:
+    st.session_state.jumlah_arsip_tampil = 0
 if "memproses" not in st.session_state:
     st.session_state.memproses = False
 if "tampilkan_tindakan_cepat" not in st.session_state:
     st.session_state.tampilkan_tindakan_cepat = True
 if "analisis_tunda" not in st.session_state:
     st.session_state.analisis_tunda = False
-if "konten_dokumen" not in st.session_state:
-    st.session_state.konten_dokumen = None
-if "rag_rantai" not in st.session_state:
-    st.session_state.rag_rantai = None
-if "retriever" not in st.session_state:
-    st.session_state.retriever = None
+if "lampiran_id" not in st.session_state:
+    st.session_state.lampiran_id = None
 if "ringkasan_profil" not in st.session_state:
     st.session_state.ringkasan_profil = None
 if "rekomendasi_awal" not in st.session_state:
     st.session_state.rekomendasi_awal = None
+if "profil_skor" not in st.session_state:
+    st.session_state.profil_skor = None
+if "tugas_lampiran" not in st.session_state:
+    st.session_state.tugas_lampiran = None
+if "susulan" not in st.session_state:
+    st.session_state.susulan = None  # isi rekomendasi darurat yang menunggu jawaban Gemini
+    st.session_state.susulan_batas = 0.0  # waktu berhenti menunggu jika status tidak pernah tercatat
+
+
+# Profiling opsional per rerun (PENASIHAT_PROFIL atau saklar admin di sidebar). Juga dipanggil
+# di awal tiap fragment interaktif agar rerun fragment ikut tertangkap.
+def mulai_profil_rerun():
+    profil_kinerja.mulai_rerun(st.session_state.sesi_id, __file__)
+
+
+mulai_profil_rerun()
 
 
 # --------------------------------------------------------------------------------------
 # SIDEBAR: API KEY & AKSI
 # --------------------------------------------------------------------------------------
+# Status profil dirender sebagai fragment agar bisa diperbarui tanpa rerun seluruh halaman
+@st.fragment
+def fragmen_status_profil():
+    st.subheader("Status Profil")
+    if st.session_state.ringkasan_profil:
+        st.success("📘 Profil siswa sudah terisi")
+        st.caption(st.session_state.ringkasan_profil[:250] + ("..." if len(st.session_state.ringkasan_profil) > 250 else ""))
+    else:
+        st.info("Isi formulir profil di halaman utama untuk memulai.")
+
+    mesin = st.session_state.get("mesin")
+    if mesin is None:
+        return
+    try:
+        semua_statistik = mesin.statistik(st.session_state.sesi_id)
+    except Exception:
+        return  # statistik hanya informasi tambahan
+    statistik = semua_statistik["indeks_profil"]
+    if statistik["pencarian"]:
+        st.caption(
+            f"♻️ Rekomendasi dipakai ulang: {statistik['tingkat_hit']:.0%} dari {statistik['pencarian']} analisis "
+            f"({statistik['jumlah_profil']} profil tersimpan)"
+        )
+
+    statistik_router = semua_statistik.get("router")
+    if statistik_router and statistik_router.get("lokal", 0) + statistik_router.get("llm", 0):
+        st.caption(
+            f"🧭 Dijawab lokal tanpa AI: {statistik_router['rasio_lokal']:.0%} dari "
+            f"{statistik_router.get('lokal', 0) + statistik_router.get('llm', 0)} pertanyaan"
+        )
+
+    statistik_cache = semua_statistik["cache_konteks"]
+    if statistik_cache["giliran"]:
+        latensi = [
+            f"{label} {nilai:.1f} dtk"
+            for label, nilai in (("dengan cache", statistik_cache["latensi_cache"]), ("tanpa cache", statistik_cache["latensi_tanpa_cache"]))
+            if nilai is not None
+        ]
+        st.caption(
+            f"⚡ Prefix di-cache: {statistik_cache['token_hemat']} dari {statistik_cache['token_prompt']} token prompt "
+            f"({statistik_cache['rasio_hemat']:.0%}) • latensi rata-rata {', '.join(latensi)} "
+            f"• keluaran rata-rata {statistik_cache.get('token_keluaran_rata', 0):.0f} token"
+        )
+    statistik_hedge = statistik_cache.get("hedge")
+    if statistik_hedge and statistik_hedge["p99_dengan_hedge"] is not None:
+        st.caption(
+            f"🛡️ Hedge: {statistik_hedge['rasio_hedge']:.0%} permintaan • p99 token pertama "
+            f"{statistik_hedge['p99_dengan_hedge']:.1f} dtk (tanpa hedge {statistik_hedge['p99_tanpa_hedge']:.1f} dtk)"
+        )
+    statistik_tenggat = semua_statistik.get("tenggat")
+    if statistik_tenggat and statistik_tenggat["dibatalkan"] + statistik_tenggat["habis_waktu"]:
+        st.caption(
+            f"⏹️ Permintaan dihentikan: {statistik_tenggat['dibatalkan']} dibatalkan, "
+            f"{statistik_tenggat['habis_waktu']} melewati tenggat (dari "
+            f"{sum(statistik_tenggat[k] for k in ('selesai', 'dibatalkan', 'habis_waktu', 'gagal'))})"
+        )
+
+
 with st.sidebar:
     st.header("Pengaturan")
-    google_api_key = st.text_input("Google AI API Key", type="password", help="Masukkan API key kamu")
-    if google_api_key:
+    google_api_key = konfigurasi.api_key(SECRETS)
+    if URL_API:
+        # API key dipakai layanan penasihat di server, bukan oleh klien tipis ini
+        st.info("🔗 Terhubung ke layanan penasihat.")
+    elif LURING:
+        st.info("📴 Mode luring: rekomendasi berbasis aturan, tanpa Gemini.")
+    elif google_api_key:
         st.success("✅ API Key Tersambung")
     else:
-        st.warning("⚠️ API Key Diperlukan")
+        google_api_key = st.text_input("Google AI API Key", type="password", help="Masukkan API key kamu")
+        if google_api_key:
+            st.success("✅ API Key Tersambung")
+        else:
+            st.warning("⚠️ API Key Diperlukan")
+    st.caption(f"Preset kinerja: `{KONFIGURASI['preset']}`")
+
+    st.divider()
+    daftar_profil_jawaban = list(PROFIL_JAWABAN)
+    st.selectbox(
+        "Panjang jawaban",
+        daftar_profil_jawaban,
+        index=daftar_profil_jawaban.index(PROFIL_DEFAULT) if PROFIL_DEFAULT in daftar_profil_jawaban else 1,
+        key="profil_jawaban",
+        help="Membatasi token keluaran Gemini; jawaban lebih pendek juga lebih cepat selesai.",
+    )
+    st.checkbox(
+        "Rekomendasi terstruktur (JSON)",
+        value=TERSTRUKTUR_DEFAULT,
+        key="jawaban_terstruktur",
+        help="Gemini mengirim data ringkas (bidang, alasan, rencana) yang disusun aplikasi sendiri.",
+    )
 
     st.divider()
     if st.button("🧹 Bersihkan Obrolan"):
-        st.session_state.pesan = []
-        st.session_state.konten_dokumen = None
-        st.session_state.rag_rantai = None
-        st.session_state.retriever = None
+        st.session_state.pesan.bersihkan()
+        if st.session_state.get("mesin"):
+            try:
+                st.session_state.mesin.hapus_sesi(st.session_state.sesi_id)
+            except Exception:
+                pass  # cache konteks tetap kedaluwarsa sendiri
+        st.session_state.jumlah_arsip_tampil = 0
+        st.session_state.lampiran_id = None
         st.session_state.analisis_tunda = False
         st.session_state.memproses = False
         st.session_state.tampilkan_tindakan_cepat = True
         st.session_state.ringkasan_profil = None
         st.session_state.rekomendasi_awal = None
+        st.session_state.profil_skor = None
+        st.session_state.tugas_lampiran = None
+        st.session_state.susulan = None
+        try:
+            muat_penyimpanan_sesi().hapus(st.session_state.sesi_id)
+        except Exception:
+            pass
         st.success("Obrolan dibersihkan.")
 
     st.divider()
-    st.subheader("Status Profil")
-    if st.session_state.ringkasan_profil:
-        st.success("📘 Profil siswa sudah terisi")
-        st.caption(st.session_state.ringkasan_profil[:250] + ("..." if len(st.session_state.ringkasan_profil) > 250 else ""))
-    else:
-        st.info("Isi formulir profil di halaman utama untuk memulai.")
-
-# Wajib ada API key
-if not google_api_key:
-    st.info("Masukkan Google AI API Key di sidebar untuk mulai menggunakan aplikasi.")
+    fragmen_status_profil()
+
+    # Panel admin hanya untuk operator pod (PENASIHAT_ADMIN=1)
+    if os.environ.get("PENASIHAT_ADMIN") == "1":
+        st.divider()
+        st.subheader("🛠️ Admin")
+        st.toggle(
+            "Profil rerun & tahap sesi ini",
+            key="profil_admin",
+            on_change=lambda: profil_kinerja.paksa_sesi(st.session_state.sesi_id, st.session_state.profil_admin),
+            help="Menulis berkas profil bertanda waktu + id sesi untuk setiap rerun dan tahap berat.",
+        )
+        if st.session_state.get("profil_admin"):
+            st.caption(f"Berkas profil: `{profil_kinerja.DIREKTORI_PROFIL}/` (sesi `{st.session_state.sesi_id}`)")
+
+# Wajib ada API key (kecuali mode luring: mesin tidak pernah memanggil Gemini, atau
+# klien tipis: layanan memakai API key-nya sendiri)
+if LURING:
+    google_api_key = google_api_key or "luring"
+elif not google_api_key and not URL_API:
+    st.info("Masukkan Google AI API Key di sidebar, atau set GOOGLE_API_KEY di environment/Secrets.")
     st.stop()
 
-# Inisialisasi Gemini
+
+# Mesin penasihat (cache: tidak dibangun ulang di setiap rerun). Jika PENASIHAT_API_URL diisi,
+# aplikasi menjadi klien tipis untuk layanan `penasihat.api` dan tidak menjalankan komputasi sendiri.
+@st.cache_resource
+def muat_mesin(api_key: str):
+    if URL_API:
+        return KlienPenasihat(URL_API, api_key)
+    # Dijalankan lewat `python -m penasihat.pemanasan`: pakai mesin yang sudah dipanaskan
+    return pemanasan.mesin_terpanaskan(api_key) or MesinPenasihat(api_key, penyimpanan=muat_penyimpanan_sesi())
+
+
 try:
-    genai.configure(api_key=google_api_key)
-    gemini_model = genai.GenerativeModel("gemini-2.5-flash")
+    st.session_state.mesin = muat_mesin(google_api_key)
 except Exception as e:
     st.error(f"Gagal menginisialisasi Gemini: {e}")
     st.stop()
+mesin = st.session_state.mesin
 
 
-# --------------------------------------------------------------------------------------
-# INISIALISASI LANGCHAIN (cache)
-# --------------------------------------------------------------------------------------
+# Pool thread bersama untuk pekerjaan berat (ekstraksi + indeks vektor) di latar belakang
 @st.cache_resource
-def inisialisasi_langchain(api_key: str):
-    try:
-        chat_model = ChatGoogleGenerativeAI(
-            google_api_key=api_key,
-            model="gemini-2.5-flash",
-            temperature=0,
-        )
-        embeddings = GoogleGenerativeAIEmbeddings(
-            google_api_key=api_key,
-            model="models/gemini-embedding-exp-03-07",
-        )
-        return chat_model, embeddings
-    except Exception as e:
-        st.error(f"Gagal inisialisasi LangChain: {e}")
-        return None, None
+def eksekutor_latar():
+    return ThreadPoolExecutor(
+        max_workers=int(os.environ.get("PENASIHAT_PEKERJA_LATAR", "4")),
+        thread_name_prefix="penasihat-latar",
+    )
 
 
-chat_model, embeddings = inisialisasi_langchain(google_api_key)
+def kerja_pengindeksan(lapor, mesin, lampiran, sesi_id):
+    """Ekstraksi + pengindeksan lampiran di latar belakang (lihat MesinPenasihat.indeks_lampiran)."""
+    return mesin.indeks_lampiran(lampiran, lapor=lapor, sesi_id=sesi_id)
 
 
 # --------------------------------------------------------------------------------------
-# UTIL: Ekstraksi teks dokumen (opsional)
+# PROSES KETIKA TOMBOL ANALISIS DIKLIK
 # --------------------------------------------------------------------------------------
-def ekstrak_teks_pdf(file):
-    try:
-        reader = PyPDF2.PdfReader(file)
-        teks = ""
-        for halaman in reader.pages:
-            teks += halaman.extract_text()
-        return teks
-    except Exception as e:
-        return f"Error membaca PDF: {str(e)}"
-
+def proses_analisis(nama, tingkat, gaya_belajar, minat_bidang, toleransi_matematika, nilai_mapel, unggahan):
+    st.session_state.memproses = True
+    st.session_state.tampilkan_tindakan_cepat = False
+    st.session_state.analisis_tunda = True
 
-def ekstrak_teks_docx(file):
-    try:
-        d = docx.Document(file)
-        teks = ""
-        for p in d.paragraphs:
-            teks += p.text + "\n"
-        return teks
-    except Exception as e:
-        return f"Error membaca DOCX: {str(e)}"
+    ringkasan = buat_ringkasan_profil(
+        nama=nama,
+        tingkat=tingkat,
+        gaya_belajar=gaya_belajar,
+        minat_bidang=minat_bidang,
+        toleransi_mtk=toleransi_matematika,
+        nilai_mapel=nilai_mapel,
+    )
+    st.session_state.ringkasan_profil = ringkasan
 
+    # Lampiran + RAG disiapkan di latar belakang. Sampai selesai, chat memakai konteks profil saja.
+    st.session_state.lampiran_id = None
+    st.session_state.tugas_lampiran = jalankan_di_latar(
+        eksekutor_latar(),
+        kerja_pengindeksan,
+        mesin,
+        [(u.name, u.getvalue(), u.type) for u in (unggahan or [])],
+        st.session_state.sesi_id,
+        nama="pengindeksan_lampiran",
+    )
 
-def ekstrak_teks_txt(file):
+    profil = {
+        "nama": nama,
+        "tingkat": tingkat,
+        "gaya_belajar": gaya_belajar,
+        "minat": minat_bidang,
+        "toleransi": toleransi_matematika,
+        "nilai": nilai_mapel,
+    }
     try:
-        return str(file.read(), "utf-8")
+        # Rekomendasi awal berbasis aturan (dipakai juga oleh panel bagaimana-jika)
+        st.session_state.rekomendasi_awal = mesin.skor_profil(nilai_mapel, minat_bidang, toleransi_matematika)["top5"]
+        st.session_state.profil_skor = {
+            "nilai": nilai_mapel,
+            "minat": minat_bidang,
+            "toleransi": toleransi_matematika,
+        }
+
+        # Instruksi + profil didaftarkan sebagai prefix cache sesi; profil yang sangat mirip
+        # dengan profil lama memakai ulang rekomendasinya
+        with st.spinner("🔎 Menganalisis profil & menyusun rekomendasi..."):
+            hasil = mesin.rekomendasi_awal(
+                st.session_state.sesi_id,
+                profil,
+                st.session_state.get("profil_jawaban", PROFIL_DEFAULT),
+                st.session_state.get("jawaban_terstruktur", TERSTRUKTUR_DEFAULT),
+            )
+        st.session_state.pesan.append({"role": "assistant", "content": hasil["rekomendasi"]})
+        if hasil.get("mode_darurat"):
+            # Gemini lambat/tidak tersedia → rekomendasi lokal; jawaban Gemini menggantikannya jika tiba
+            st.session_state.susulan = hasil["rekomendasi"] if hasil.get("menunggu_susulan") else None
+            st.session_state.susulan_batas = time.time() + (TENGGAT_REKOMENDASI or 120) + 30
+            st.session_state.notifikasi_analisis = ("warning", "⚡ Penasihat AI sedang lambat atau tidak tersedia. Ini rekomendasi cepat berbasis aturan.")
+        elif hasil["dipakai_ulang"]:
+            st.session_state.notifikasi_analisis = ("success", "✅ Rekomendasi siap (dari profil serupa)! Silakan lanjut bertanya lewat chat di bawah.")
+        else:
+            st.session_state.notifikasi_analisis = ("success", "✅ Rekomendasi siap! Silakan lanjut bertanya lewat chat di bawah.")
     except Exception as e:
-        return f"Error membaca TXT: {str(e)}"
+        st.session_state.notifikasi_analisis = ("error", f"Gagal membuat rekomendasi awal: {e}")
+    finally:
+        st.session_state.memproses = False
+        st.session_state.analisis_tunda = False
+        simpan_sesi()
 
 
 # --------------------------------------------------------------------------------------
 # PROFIL INPUT (Form) — Fokus: kekuatan mata pelajaran + minat + preferensi
 # --------------------------------------------------------------------------------------
-st.markdown('<div class="kartu">', unsafe_allow_html=True)
-st.subheader("🧭 Profil Akademik Kamu")
-
-with st.form("form_profil"):
-    col_kiri, col_kanan = st.columns(2)
-    with col_kiri:
-        nama = st.text_input("Nama (opsional)")
-        tingkat = st.selectbox("Kelas", ["X", "XI", "XII"])
-        gaya_belajar = st.multiselect(
-            "Gaya belajar yang paling cocok",
-            ["Visual", "Auditori", "Kinestetik", "Kolaboratif", "Mandiri"],
-        )
-    with col_kanan:
-        minat_bidang = st.multiselect(
-            "Bidang minat (pilih yang paling menarik)",
-            ["Sains", "Teknologi", "Kesehatan", "Bisnis/Manajemen", "Sosial/Humaniora",
-             "Hukum/Pemerintahan", "Seni/Desain", "Lingkungan", "Komunikasi/Media"],
-        )
-        toleransi_matematika = st.select_slider(
-            "Kenyamanan dengan Matematika",
-            options=["Rendah", "Sedang", "Tinggi"],
-            value="Sedang",
+# Fragment: interaksi di dalam form hanya menjalankan ulang bagian ini, bukan seluruh aplikasi.
+@st.fragment
+def fragmen_form_profil():
+    mulai_profil_rerun()
+    st.markdown('<div class="kartu">', unsafe_allow_html=True)
+    st.subheader("🧭 Profil Akademik Kamu")
+
+    with st.form("form_profil"):
+        col_kiri, col_kanan = st.columns(2)
+        with col_kiri:
+            nama = st.text_input("Nama (opsional)")
+            tingkat = st.selectbox("Kelas", ["X", "XI", "XII"])
+            gaya_belajar = st.multiselect(
+                "Gaya belajar yang paling cocok",
+                ["Visual", "Auditori", "Kinestetik", "Kolaboratif", "Mandiri"],
+            )
+        with col_kanan:
+            minat_bidang = st.multiselect(
+                "Bidang minat (pilih yang paling menarik)",
+                ["Sains", "Teknologi", "Kesehatan", "Bisnis/Manajemen", "Sosial/Humaniora",
+                 "Hukum/Pemerintahan", "Seni/Desain", "Lingkungan", "Komunikasi/Media"],
+            )
+            toleransi_matematika = st.select_slider(
+                "Kenyamanan dengan Matematika",
+                options=["Rendah", "Sedang", "Tinggi"],
+                value="Sedang",
+            )
+
+        st.markdown("### ⭐ Kekuatan Mata Pelajaran (beri skor 0–10)")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            mtk = st.slider("Matematika", 0, 10, 5)
+            fis = st.slider("Fisika", 0, 10, 5)
+            kim = st.slider("Kimia", 0, 10, 5)
+            bio = st.slider("Biologi", 0, 10, 5)
+        with col2:
+            tik = st.slider("Informatika/TIK", 0, 10, 5)
+            eko = st.slider("Ekonomi", 0, 10, 5)
+            akn = st.slider("Akuntansi", 0, 10, 5)
+            geo = st.slider("Geografi", 0, 10, 5)
+        with col3:
+            sos = st.slider("Sosiologi", 0, 10, 5)
+            sej = st.slider("Sejarah", 0, 10, 5)
+            ind = st.slider("Bahasa Indonesia", 0, 10, 5)
+            eng = st.slider("Bahasa Inggris", 0, 10, 5)
+
+        st.markdown("### 📎 Lampirkan Rapor/Sertifikat (opsional)")
+        format_didukung = ekstensi_didukung()
+        unggahan = st.file_uploader(
+            f"Format didukung: {', '.join(f.upper() for f in format_didukung)} (opsional, boleh lebih dari satu)",
+            type=format_didukung,
+            accept_multiple_files=True,
+            help="Misalnya rapor beberapa semester + sertifikat. Kontennya akan dipakai untuk memperkaya analisis.",
         )
 
-    st.markdown("### ⭐ Kekuatan Mata Pelajaran (beri skor 0–10)")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        mtk = st.slider("Matematika", 0, 10, 5)
-        fis = st.slider("Fisika", 0, 10, 5)
-        kim = st.slider("Kimia", 0, 10, 5)
-        bio = st.slider("Biologi", 0, 10, 5)
-    with col2:
-        tik = st.slider("Informatika/TIK", 0, 10, 5)
-        eko = st.slider("Ekonomi", 0, 10, 5)
-        akn = st.slider("Akuntansi", 0, 10, 5)
-        geo = st.slider("Geografi", 0, 10, 5)
-    with col3:
-        sos = st.slider("Sosiologi", 0, 10, 5)
-        sej = st.slider("Sejarah", 0, 10, 5)
-        ind = st.slider("Bahasa Indonesia", 0, 10, 5)
-        eng = st.slider("Bahasa Inggris", 0, 10, 5)
-
-    st.markdown("### 📎 Lampirkan Rapor/Sertifikat (opsional)")
-    unggahan = st.file_uploader(
-        "Format didukung: PDF, DOCX, TXT (opsional)",
-        type=["pdf", "docx", "txt"],
-        help="Jika diunggah, kontennya akan dipakai untuk memperkaya analisis.",
-    )
+        kirim = st.form_submit_button("🔍 Analisis Rekomendasi")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    if kirim:
+        # Susun nilai mapel
+        nilai_mapel = {
+            "Matematika": mtk,
+            "Fisika": fis,
+            "Kimia": kim,
+            "Biologi": bio,
+            "TIK": tik,
+            "Ekonomi": eko,
+            "Akuntansi": akn,
+            "Geografi": geo,
+            "Sosiologi": sos,
+            "Sejarah": sej,
+            "B. Indonesia": ind,
+            "B. Inggris": eng,
+        }
+        proses_analisis(nama, tingkat, gaya_belajar, minat_bidang, toleransi_matematika, nilai_mapel, unggahan)
+        # Hasil analisis memengaruhi sidebar, tindakan cepat, dan chat → rerun satu kali untuk seluruh halaman
+        st.rerun()
+
+    notifikasi = st.session_state.pop("notifikasi_analisis", None)
+    if notifikasi:
+        jenis, teks = notifikasi
+        if jenis == "success":
+            st.success(teks)
+        elif jenis == "warning":
+            st.warning(teks)
+        else:
+            st.error(teks)
 
-    kirim = st.form_submit_button("🔍 Analisis Rekomendasi")
 
-st.markdown('</div>', unsafe_allow_html=True)
+fragmen_form_profil()
 
 
 # --------------------------------------------------------------------------------------
-# PEMETAAN BERBASIS ATURAN: Mata pelajaran → jurusan/bidang
+# MODE BAGAIMANA-JIKA (dihitung lokal, tanpa Gemini)
 # --------------------------------------------------------------------------------------
-def skor_bidang_dari_map(nilai, preferensi, toleransi_mtk):
-    """
-    Menghitung skor awal berbagai bidang berdasarkan kekuatan mata pelajaran + preferensi.
-    nilai: dict {mapel: skor 0-10}
-    preferensi: list bidang
-    toleransi_mtk: 'Rendah' | 'Sedang' | 'Tinggi'
-    """
-
-    # Bobot per bidang (sederhana & transparan)
-    peta = {
-        "Kedokteran": {"Biologi": 3, "Kimia": 2, "B. Inggris": 1},
-        "Farmasi": {"Kimia": 3, "Biologi": 2, "Matematika": 1},
-        "Keperawatan": {"Biologi": 2, "B. Indonesia": 1, "B. Inggris": 1},
-        "Teknik Informatika / Ilmu Komputer": {"Matematika": 3, "TIK": 3, "Fisika": 1, "B. Inggris": 1},
-        "Data Science / AI": {"Matematika": 3, "TIK": 3, "B. Inggris": 1},
-        "Teknik Sipil": {"Matematika": 2, "Fisika": 2, "Geografi": 1},
-        "Teknik Lingkungan / HSE": {"Kimia": 2, "Biologi": 1, "Geografi": 2, "Fisika": 1},
-        "Teknik Industri": {"Matematika": 2, "Fisika": 2, "B. Inggris": 1},
-        "Arsitektur": {"Matematika": 2, "Fisika": 1, "B. Indonesia": 1},
-        "Perencanaan Wilayah & Kota": {"Geografi": 3, "Matematika": 1, "Sejarah": 1},
-        "Manajemen/Marketing": {"Ekonomi": 2, "B. Indonesia": 1, "B. Inggris": 1},
-        "Akuntansi/Keuangan": {"Akuntansi": 3, "Matematika": 2, "Ekonomi": 2},
-        "Hukum": {"B. Indonesia": 2, "Sejarah": 2, "Sosiologi": 1},
-        "Psikologi": {"Biologi": 1, "Sosiologi": 2, "Matematika": 1},
-        "Ilmu Komunikasi": {"B. Indonesia": 2, "B. Inggris": 1, "Sejarah": 1},
-        "HI (Hubungan Internasional)": {"B. Inggris": 2, "Sejarah": 2, "Sosiologi": 1},
-        "Sastra/Filologi": {"B. Indonesia": 2, "B. Inggris": 2},
-        "DKV/Desain": {"B. Indonesia": 1},  # kreatif → tidak dipetakan murni dari mapel; LLM akan menambah konteks
-    }
-
-    skor = {k: 0.0 for k in peta.keys()}
-    # Konversi label mapel
-    mapel_alias = {
-        "Matematika": "Matematika",
-        "Fisika": "Fisika",
-        "Kimia": "Kimia",
-        "Biologi": "Biologi",
-        "TIK": "TIK",
-        "Ekonomi": "Ekonomi",
-        "Akuntansi": "Akuntansi",
-        "Geografi": "Geografi",
-        "Sosiologi": "Sosiologi",
-        "Sejarah": "Sejarah",
-        "B. Indonesia": "B. Indonesia",
-        "B. Inggris": "B. Inggris",
-    }
-
-    for bidang, bobot_mapel in peta.items():
-        total = 0.0
-        for m, b in bobot_mapel.items():
-            # ambil nilai mapel
-            nm = mapel_alias.get(m, m)
-            v = nilai.get(nm, 0)
-            total += b * v
-        skor[bidang] = total
-
-    # Bonus preferensi minat
-    preferensi_bonus = {
-        "Kesehatan": ["Kedokteran", "Farmasi", "Keperawatan"],
-        "Sains": ["Farmasi", "Psikologi", "Data Science / AI"],
-        "Teknologi": ["Teknik Informatika / Ilmu Komputer", "Data Science / AI", "Teknik Industri"],
-        "Bisnis/Manajemen": ["Manajemen/Marketing", "Akuntansi/Keuangan"],
-        "Sosial/Humaniora": ["Hukum", "HI (Hubungan Internasional)", "Ilmu Komunikasi", "Sastra/Filologi", "Psikologi"],
-        "Seni/Desain": ["DKV/Desain", "Arsitektur"],
-        "Lingkungan": ["Teknik Lingkungan / HSE", "PWK (Perencanaan Wilayah & Kota)"],
-        "Hukum/Pemerintahan": ["Hukum", "HI (Hubungan Internasional)"],
-        "Komunikasi/Media": ["Ilmu Komunikasi", "DKV/Desain"],
-    }
-
-    for p in preferensi:
-        for bidang in preferensi_bonus.get(p, []):
-            if bidang in skor:
-                skor[bidang] *= 1.08  # bonus 8%
-
-    # Penalti/tuning untuk Matematika
-    if toleransi_mtk == "Rendah":
-        for bidang in ["Teknik Informatika / Ilmu Komputer", "Data Science / AI", "Teknik Sipil", "Teknik Industri", "Arsitektur", "Akuntansi/Keuangan"]:
-            skor[bidang] *= 0.87  # kurangi 13%
-    elif toleransi_mtk == "Tinggi":
-        for bidang in ["Teknik Informatika / Ilmu Komputer", "Data Science / AI", "Teknik Sipil", "Teknik Industri", "Arsitektur", "Akuntansi/Keuangan"]:
-            skor[bidang] *= 1.06  # tambah 6%
-
-    return skor
-
-
-def buat_ringkasan_profil(nama, tingkat, gaya_belajar, minat_bidang, toleransi_mtk, nilai_mapel):
-    ringkas = []
-    if nama:
-        ringkas.append(f"Nama: {nama}")
-    ringkas.append(f"Kelas: {tingkat}")
-    ringkas.append(f"Gaya belajar: {', '.join(gaya_belajar) if gaya_belajar else '-'}")
-    ringkas.append(f"Minat: {', '.join(minat_bidang) if minat_bidang else '-'}")
-    ringkas.append(f"Kenyamanan Matematika: {toleransi_mtk}")
-    ringkas.append(
-        "Skor Mapel: " + ", ".join([f"{k} {v}/10" for k, v in nilai_mapel.items()])
-    )
-    return "\n".join(ringkas)
-
-
-def buat_dokumen_langchain(teks: str, sumber: str):
-    return [
-        Document(
-            page_content=teks,
-            metadata={
-                "source": sumber,
-                "processed_at": datetime.now().isoformat(),
-                "char_count": len(teks),
-                "word_count": len(teks.split()),
-            },
+@st.fragment
+def fragmen_bagaimana_jika():
+    mulai_profil_rerun()
+    profil = st.session_state.profil_skor
+    if not profil:
+        return
+    with st.expander("🔮 Bagaimana Jika? (simulasi nilai, tanpa AI)"):
+        mulai = time.perf_counter()
+        hasil = analisis_bagaimana_jika(profil["nilai"], profil["minat"], profil["toleransi"])
+        durasi_ms = (time.perf_counter() - mulai) * 1000
+
+        metrik = st.radio(
+            "Tampilkan",
+            ["Perubahan peringkat", "Perubahan skor", "Peringkat"],
+            horizontal=True,
         )
-    ]
-
-
-def buat_rag_chain(dokumen, embeddings, chat_model):
-    try:
-        if not embeddings or not chat_model:
-            st.error("❌ Embeddings atau Chat Model tidak tersedia.")
-            return None, None
-
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=2000,
-            chunk_overlap=300,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""],
+        bidang_tampil = st.multiselect(
+            "Bidang yang dibandingkan",
+            hasil["bidang"],
+            default=st.session_state.rekomendasi_awal or hasil["bidang"][:5],
         )
-        potongan = splitter.split_documents(dokumen)
-        if not potongan:
-            st.error("Tidak bisa memproses dokumen.")
-            return None, None
-
-        with st.spinner("Menyiapkan memori konteks..."):
-            vs = Chroma.from_documents(documents=potongan, embedding=embeddings, persist_directory=None)
-            retriever = vs.as_retriever(search_type="similarity", search_kwargs={"k": 8})
-
-        def format_docs(docs):
-            if not docs:
-                return "Tidak ada konteks tambahan."
-            return "\n".join([f"--- Konteks {i+1} ---\n{d.page_content}" for i, d in enumerate(docs)])
-
-        prompt = ChatPromptTemplate.from_template(
-            """Anda adalah penasihat akademik untuk siswa SMA di Indonesia.
-Gunakan konteks profil berikut untuk menjawab secara spesifik, empatik, dan actionable.
-
-Konteks Profil:
-{context}
-
-Pertanyaan Pengguna:
-{question}
-
-Instruksi:
-- Jelaskan alasan rekomendasi (kaitkan dengan nilai mapel, minat, dan gaya belajar).
-- Beri 3-5 rekomendasi jurusan/kelompok program studi, plus alternatif jika syarat tertentu kurang cocok.
-- Sertakan contoh kegiatan ekstrakurikuler atau proyek yang bisa dicoba dalam 3-6 bulan.
-- Jika pengguna minta perbandingan jurusan, paparkan perbedaan fokus, mata kuliah inti, dan prospek umum.
-- Hindari klaim institusi tertentu; berikan saran generik (misal: "universitas dengan akreditasi baik untuk X").
-Jawaban terstruktur dan mudah dibaca."""
+        kolom = [hasil["bidang"].index(b) for b in bidang_tampil] or list(range(len(hasil["bidang"])))
+        data = {
+            "Perubahan peringkat": hasil["selisih_peringkat"],
+            "Perubahan skor": hasil["selisih_skor"].round(1),
+            "Peringkat": hasil["peringkat"],
+        }[metrik][:, kolom]
+        tabel = pd.DataFrame(data, index=hasil["skenario"], columns=[hasil["bidang"][i] for i in kolom])
+        st.dataframe(tabel)
+        st.caption(
+            f"Positif = bidang naik peringkat/skor. Dihitung lokal untuk {len(hasil['skenario'])} skenario "
+            f"dalam {durasi_ms:.1f} ms."
         )
 
-        rag = (
-            {"context": retriever | format_docs, "question": RunnablePassthrough()}
-            | prompt
-            | chat_model
-            | StrOutputParser()
-        )
-        return rag, retriever
-    except Exception as e:
-        st.error(f"Gagal membuat RAG chain: {e}")
-        return None, None
 
-
-# --------------------------------------------------------------------------------------
-# PROSES KETIKA TOMBOL ANALISIS DIKLIK
-# --------------------------------------------------------------------------------------
-if kirim:
-    st.session_state.memproses = True
-    st.session_state.tampilkan_tindakan_cepat = False
-    st.session_state.analisis_tunda = True
-
-    # Susun nilai mapel
-    nilai_mapel = {
-        "Matematika": mtk,
-        "Fisika": fis,
-        "Kimia": kim,
-        "Biologi": bio,
-        "TIK": tik,
-        "Ekonomi": eko,
-        "Akuntansi": akn,
-        "Geografi": geo,
-        "Sosiologi": sos,
-        "Sejarah": sej,
-        "B. Indonesia": ind,
-        "B. Inggris": eng,
-    }
-
-    ringkasan = buat_ringkasan_profil(
-        nama=nama,
-        tingkat=tingkat,
-        gaya_belajar=gaya_belajar,
-        minat_bidang=minat_bidang,
-        toleransi_mtk=toleransi_matematika,
-        nilai_mapel=nilai_mapel,
-    )
-    st.session_state.ringkasan_profil = ringkasan
-
-    # Ekstrak teks unggahan (opsional)
-    teks_lampiran = ""
-    if unggahan is not None:
-        ext = unggahan.name.split(".")[-1].lower()
-        if ext == "pdf":
-            teks_lampiran = ekstrak_teks_pdf(unggahan)
-        elif ext == "docx":
-            teks_lampiran = ekstrak_teks_docx(unggahan)
-        elif ext == "txt":
-            teks_lampiran = ekstrak_teks_txt(unggahan)
-        if isinstance(teks_lampiran, str) and not teks_lampiran.startswith("Error"):
-            st.session_state.konten_dokumen = teks_lampiran
-        else:
-            st.warning("Gagal mengekstrak teks lampiran. Analisis tetap dilanjutkan tanpa lampiran.")
-
-    # Bangun dokumen RAG (profil + lampiran jika ada)
-    doks = []
-    doks += buat_dokumen_langchain(st.session_state.ringkasan_profil, "profil_siswa.txt")
-    if st.session_state.konten_dokumen:
-        doks += buat_dokumen_langchain(st.session_state.konten_dokumen, unggahan.name)
-
-    # RAG
-    rag, retr = buat_rag_chain(doks, embeddings, chat_model)
-    st.session_state.rag_rantai = rag
-    st.session_state.retriever = retr
-
-    # Rekomendasi awal berbasis aturan
-    skor = skor_bidang_dari_map(nilai_mapel, minat_bidang, toleransi_matematika)
-    urut = sorted(skor.items(), key=lambda x: x[1], reverse=True)
-    top5 = [b for b, _ in urut[:5]]
-    st.session_state.rekomendasi_awal = top5
-
-    # Prompt utama ke Gemini (gabungkan rule-based + profil)
-    prompt_awal = f"""
-Kamu adalah penasihat akademik untuk siswa SMA di Indonesia.
-Berikut profil ringkas siswa:
-
-{st.session_state.ringkasan_profil}
-
-Hasil pemetaan awal (rule-based) memberi kandidat teratas:
-- {top5[0] if len(top5)>0 else '-'}
-- {top5[1] if len(top5)>1 else '-'}
-- {top5[2] if len(top5)>2 else '-'}
-- {top5[3] if len(top5)>3 else '-'}
-- {top5[4] if len(top5)>4 else '-'}
-
-Tolong:
-1) Validasi & pertajam 3-5 rekomendasi bidang/jurusan (boleh menambah/menyusun ulang).
-2) Jelaskan alasan (hubungkan dengan nilai mapel, minat, gaya belajar, dan toleransi matematika).
-3) Beri alternatif jika siswa ingin jalur yang lebih/kurang intensif Matematika.
-4) Buat rencana aksi 90 hari (materi yang diperdalam, proyek mini, lomba/ekskul).
-5) Hindari menyebut universitas spesifik; gunakan saran generik.
-
-Susun jawaban ringkas, terstruktur (heading + bullet), dan ramah siswa.
-"""
-    try:
-        with st.spinner("🔎 Menganalisis profil & menyusun rekomendasi..."):
-            jawaban = gemini_model.generate_content(prompt_awal)
-            st.session_state.pesan.append({"role": "assistant", "content": jawaban.text})
-            st.success("✅ Rekomendasi siap! Silakan lanjut bertanya lewat chat di bawah.")
-    except Exception as e:
-        st.error(f"Gagal membuat rekomendasi awal: {e}")
-    finally:
-        st.session_state.memproses = False
-        st.session_state.analisis_tunda = False
+fragmen_bagaimana_jika()
 
 
 # --------------------------------------------------------------------------------------
 # TINDAKAN CEPAT (hanya tampil di awal)
 # --------------------------------------------------------------------------------------
-if st.session_state.tampilkan_tindakan_cepat and len(st.session_state.pesan) == 0 and not st.session_state.memproses:
+@st.fragment
+def fragmen_tindakan_cepat():
+    mulai_profil_rerun()
+    if not (st.session_state.tampilkan_tindakan_cepat and len(st.session_state.pesan) == 0 and not st.session_state.memproses):
+        return
     st.subheader("⚡ Tindakan Cepat")
+    pertanyaan_cepat = None
     c1, c2, c3 = st.columns(3)
     with c1:
         if st.button("🎯 Cocoknya Ambil Jurusan Apa?"):
-            st.session_state.pesan.append({"role": "user", "content": "Berdasarkan profil saya, jurusan kuliah apa yang paling cocok? Jelaskan alasannya."})
+            pertanyaan_cepat = "Berdasarkan profil saya, jurusan kuliah apa yang paling cocok? Jelaskan alasannya."
     with c2:
         if st.button("🔁 Alternatif Minim Matematika"):
-            st.session_state.pesan.append({"role": "user", "content": "Kalau saya kurang nyaman dengan matematika, apa alternatif jurusan yang tetap relevan dengan minat saya?"})
+            pertanyaan_cepat = "Kalau saya kurang nyaman dengan matematika, apa alternatif jurusan yang tetap relevan dengan minat saya?"
     with c3:
         if st.button("🧪 Ekskul & Proyek 3 Bulan"):
-            st.session_state.pesan.append({"role": "user", "content": "Rekomendasikan kegiatan ekstrakurikuler dan proyek 3 bulan untuk menguji minat saya."})
+            pertanyaan_cepat = "Rekomendasikan kegiatan ekstrakurikuler dan proyek 3 bulan untuk menguji minat saya."
+    if pertanyaan_cepat:
+        st.session_state.pesan.append({"role": "user", "content": pertanyaan_cepat})
+        st.session_state.pertanyaan_tunda = pertanyaan_cepat
+        # Panel tindakan cepat hilang setelah ada pesan → perlu rerun halaman (sekali saja)
+        st.rerun()
+
+
+fragmen_tindakan_cepat()
 
 
 # --------------------------------------------------------------------------------------
-# ANTARMUKA CHAT
+# STATUS LAMPIRAN (pengindeksan di latar belakang)
 # --------------------------------------------------------------------------------------
-st.subheader("💬 Konsultasi dengan AI Penasihat")
-for m in st.session_state.pesan:
-    if m["role"] == "user":
-        with st.chat_message("user"):
-            st.write(m["content"])
+def panel_status_lampiran():
+    tugas = st.session_state.tugas_lampiran
+    if tugas is None:
+        return
+    if tugas.berjalan:
+        st.progress(tugas.kemajuan, text=f"📎 {tugas.tahap} Chat sudah bisa dipakai dengan konteks profil.")
+        return
+
+    # Tugas selesai/gagal → naikkan konteks chat (sekali), lalu hentikan polling
+    st.session_state.tugas_lampiran = None
+    if tugas.selesai:
+        hasil = tugas.hasil
+        st.session_state.lampiran_id = hasil["lampiran_id"]
+        if hasil["peringatan"]:
+            st.session_state.status_lampiran = ("warning", hasil["peringatan"])
+        elif hasil["lampiran_id"]:
+            pesan = f"✅ Lampiran ({hasil['nama_lampiran']}) siap dipakai sebagai konteks chat."
+            normalisasi = hasil.get("normalisasi") or {}
+            karakter = sum(n["karakter_dihapus"] for n in normalisasi.values())
+            potongan = sum(n["potongan_dihapus"] for n in normalisasi.values())
+            if karakter:
+                pesan += f" 🧹 {karakter:,} karakter kop/kaki halaman & blok kosong dibuang (±{potongan} potongan lebih sedikit)."
+            st.session_state.status_lampiran = ("success", pesan)
+    else:
+        st.session_state.status_lampiran = ("warning", f"Gagal menyiapkan konteks lampiran: {tugas.galat}. Chat tetap memakai konteks profil.")
+    simpan_sesi()
+    st.rerun()
+
+
+if st.session_state.tugas_lampiran is not None:
+    # Polling hanya aktif selama ada tugas berjalan
+    st.fragment(panel_status_lampiran, run_every=1 if st.session_state.tugas_lampiran.berjalan else None)()
+
+
+def panel_susulan():
+    """Tukar rekomendasi darurat dengan jawaban Gemini begitu tiba (polling ringan)."""
+    hasil = mesin.ambil_susulan(st.session_state.sesi_id)
+    # "tidak_ada" bukan akhir: status bisa belum tertulis di penyimpanan bersama
+    if hasil["status"] == "menunggu" or (hasil["status"] == "tidak_ada" and time.time() < st.session_state.susulan_batas):
+        st.caption("⏳ Menunggu jawaban lengkap dari penasihat AI...")
+        return
+    konten_darurat = st.session_state.susulan
+    st.session_state.susulan = None
+    if hasil["status"] == "siap":
+        st.session_state.pesan.ganti(konten_darurat, hasil["hasil"]["rekomendasi"])
+        st.session_state.notifikasi_analisis = ("success", "✅ Rekomendasi lengkap dari penasihat AI sudah tiba.")
+    else:
+        st.session_state.notifikasi_analisis = (
+            "warning",
+            "Jawaban lengkap dari penasihat AI tidak jadi tiba; rekomendasi cepat di atas tetap berlaku. "
+            "Klik **Analisis Rekomendasi** lagi untuk mencoba ulang.",
+        )
+    simpan_sesi()
+    st.rerun()
+
+
+if st.session_state.susulan is not None:
+    st.fragment(panel_susulan, run_every=2)()
+
+status_lampiran = st.session_state.pop("status_lampiran", None)
+if status_lampiran:
+    jenis, teks = status_lampiran
+    if jenis == "success":
+        st.success(teks)
     else:
+        st.warning(teks)
+
+
+# --------------------------------------------------------------------------------------
+# ANTARMUKA CHAT
+# --------------------------------------------------------------------------------------
+def jawab_pertanyaan(pertanyaan):
+    """Alirkan balasan (pakai konteks lampiran jika sudah terindeks; selain itu profil saja) dan tampilkan langsung."""
+    st.session_state.memproses = True
+    try:
         with st.chat_message("assistant"):
-            st.write(m["content"])
-
-# Indikator proses
-if st.session_state.memproses:
-    with st.chat_message("assistant"):
-        st.markdown("🤖 **AI sedang menulis jawaban...**")
-
-# Input chat
-if st.session_state.memproses:
-    st.chat_input("Sedang memproses...", disabled=True)
-else:
-    if pertanyaan := st.chat_input("Tanya apa saja soal jurusan & kuliah..."):
-        # Tambahkan pertanyaan pengguna
-        st.session_state.pesan.append({"role": "user", "content": pertanyaan})
-        st.session_state.memproses = True
-
-        # Jalankan balasan (pakai RAG jika tersedia; fallback pakai ringkasan profil)
-        try:
-            if st.session_state.rag_rantai:
-                with st.spinner("🤖 Menganalisis konteks profil kamu..."):
-                    balasan = st.session_state.rag_rantai.invoke(pertanyaan)
-                st.session_state.pesan.append({"role": "assistant", "content": balasan})
-            else:
-                # Fallback: gunakan Gemini dengan sistem prompt + ringkasan profil
-                sistem = """Anda penasihat akademik SMA. Jawab spesifik sesuai profil.
-Hindari menyebut kampus tertentu; berikan saran generik."""
-                full_prompt = f"{sistem}\n\nProfil:\n{st.session_state.ringkasan_profil or '-'}\n\nPertanyaan: {pertanyaan}\n\nJawaban:"
-                balasan = gemini_model.generate_content(full_prompt).text
-                st.session_state.pesan.append({"role": "assistant", "content": balasan})
-        except Exception as e:
-            st.error(f"Gagal membuat jawaban: {e}")
-        finally:
-            st.session_state.memproses = False
-            st.rerun()
+            aliran = mesin.alirkan_jawaban(
+                st.session_state.sesi_id,
+                st.session_state.ringkasan_profil,
+                pertanyaan,
+                st.session_state.lampiran_id,
+                st.session_state.get("profil_jawaban", PROFIL_DEFAULT),
+                st.session_state.profil_skor,
+            )
+            balasan = st.write_stream(aliran)
+        st.session_state.pesan.append({"role": "assistant", "content": balasan})
+    except Exception as e:
+        st.error(f"Gagal membuat jawaban: {e}")
+    finally:
+        st.session_state.memproses = False
+        simpan_sesi()
+
+
+# Fragment chat: satu giliran chat hanya menjalankan ulang panel ini. Pesan baru langsung
+# dirender di run yang sama (tanpa st.rerun) agar tidak ada rerun tambahan.
+@st.fragment
+def fragmen_chat():
+    mulai_profil_rerun()
+    st.subheader("💬 Konsultasi dengan AI Penasihat")
+
+    # Pesan lama hanya dimuat dari arsip jika diminta, agar biaya render tetap konstan
+    sisa_arsip = st.session_state.pesan.jumlah_arsip - st.session_state.jumlah_arsip_tampil
+    if sisa_arsip > 0:
+        if st.button(f"⬆️ Muat pesan sebelumnya ({sisa_arsip} tersimpan)"):
+            st.session_state.jumlah_arsip_tampil += st.session_state.pesan.batas_memori
+
+    pesan_tampil = st.session_state.pesan.muat_sebelumnya(st.session_state.jumlah_arsip_tampil)
+    pesan_tampil += list(st.session_state.pesan)
+    for m in pesan_tampil:
+        if m["role"] == "user":
+            with st.chat_message("user"):
+                st.write(m["content"])
+        else:
+            with st.chat_message("assistant"):
+                st.write(m["content"])
+
+    # Wadah untuk giliran baru, supaya tetap muncul di atas kotak input
+    giliran_baru = st.container()
+
+    # Pertanyaan dari tindakan cepat yang belum dijawab
+    pertanyaan_tunda = st.session_state.pop("pertanyaan_tunda", None)
+    if pertanyaan_tunda and not st.session_state.memproses:
+        with giliran_baru:
+            jawab_pertanyaan(pertanyaan_tunda)
+
+    # Indikator proses
+    if st.session_state.memproses:
+        with st.chat_message("assistant"):
+            st.markdown("🤖 **AI sedang menulis jawaban...**")
+
+    # Input chat
+    if st.session_state.memproses:
+        st.chat_input("Sedang memproses...", disabled=True)
+    else:
+        if pertanyaan := st.chat_input("Tanya apa saja soal jurusan & kuliah..."):
+            # Tambahkan pertanyaan pengguna
+            st.session_state.pesan.append({"role": "user", "content": pertanyaan})
+            with giliran_baru:
+                with st.chat_message("user"):
+                    st.write(pertanyaan)
+                jawab_pertanyaan(pertanyaan)
+
+
+fragmen_chat()
 
 
 # --------------------------------------------------------------------------------------
@@ -665,4 +808,4 @@ st.markdown(
 - Menjawab pertanyaan perbandingan jurusan (fokus, mata kuliah inti, prospek umum)
     """
 )
-st.caption("Penasihat Akademik SMA • Didukung oleh Google Gemini + LangChain")
\ No newline at end of file
+st.caption("Penasihat Akademik SMA • Didukung oleh Google Gemini + LangChain")
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Modul pendukung Penasihat Akademik SMA.
+
+Berisi logika yang tidak bergantung langsung pada antarmuka Streamlit sehingga
+bisa dipakai ulang oleh skrip aplikasi.
+
+Konfigurasi berlapis (bawaan → preset → berkas → secrets → environment) diterapkan saat
+paket diimpor, sebelum modul lain membaca environment variable `PENASIHAT_*`.
+"""
+
+from penasihat.konfigurasi import terapkan as _terapkan_konfigurasi
+
+_terapkan_konfigurasi()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Layanan HTTP (ASGI) untuk operasi penasihat.
+
+Memisahkan komputasi (ekstraksi, Chroma, panggilan Gemini) dari proses UI Streamlit
+sehingga tier komputasi bisa diskalakan sendiri dan dipakai frontend lain. Tiap
+permintaan membawa state percakapan (id sesi, ringkasan profil, id lampiran); indeks
+lampiran dan indeks profil ada di disk bersama, dan state yang harus bertahan lebih lama
+dari satu permintaan (potongan lampiran, rekomendasi yang menyusul setelah mode darurat)
+ada di penyimpanan sesi bersama (`PENASIHAT_SESI_URL`). Worker tidak sepenuhnya tanpa
+state: cache di memori (prefix cache konteks, retriever yang sudah dibuka) dan pemutus
+sirkuit dimiliki tiap worker, tetapi semuanya bisa dibangun ulang sehingga worker mana
+pun tetap bisa melayani permintaan sesi mana pun.
+
+Menjalankan:
+    python -m penasihat.api                     # PENASIHAT_API_PEKERJA worker
+    uvicorn penasihat.api:app --workers 4
+
+Tiap worker memakai satu mesin dengan API key Gemini dari konfigurasi server
+(GOOGLE_API_KEY). API key dari klien (header X-Google-Api-Key) tidak dipakai: mesin per
+key berarti thread pool, handle Chroma, dan cache konteks per key yang harus dibangun
+ulang dan dilepas, dan `genai.configure` tetap berlaku untuk seluruh proses.
+
+Endpoint:
+    GET    /kesehatan       liveness
+    GET    /siap            readiness: 503 sampai pemanasan proses selesai (`penasihat.pemanasan`)
+    GET    /statistik?sesi_id=...
+    POST   /skor            {nilai, minat, toleransi}
+    POST   /lampiran        multipart, field "berkas" (boleh lebih dari satu), "sesi_id" opsional
+    POST   /rekomendasi     {sesi_id, profil, profil_jawaban?, terstruktur?}
+    GET    /rekomendasi/susulan?sesi_id=...   rekomendasi Gemini yang tiba setelah mode darurat
+    POST   /chat            {sesi_id, ringkasan_profil, pertanyaan, lampiran_id, profil_jawaban?, profil_skor?}
+    POST   /chat/aliran     sama dengan /chat, jawaban dialirkan sebagai text/plain
+    DELETE /sesi/{sesi_id}
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from penasihat import pemanasan
+from penasihat.format_jawaban import PROFIL_DEFAULT, TERSTRUKTUR_DEFAULT
+from penasihat.mesin import MesinPenasihat
+from penasihat.penyimpanan_sesi import buat_penyimpanan_sesi
+
+HOST_API = os.environ.get("PENASIHAT_API_HOST", "127.0.0.1")
+PORT_API = int(os.environ.get("PENASIHAT_API_PORT", "8000"))
+PEKERJA_API = int(os.environ.get("PENASIHAT_API_PEKERJA", str(os.cpu_count() or 2)))
+
+
+class GalatPermintaan(Exception):
+    """Permintaan tidak valid (dikembalikan sebagai HTTP 4xx)."""
+
+    def __init__(self, pesan: str, status: int = 400):
+        super().__init__(pesan)
+        self.status = status
+
+
+@functools.lru_cache(maxsize=1)
+def _penyimpanan():
+    return buat_penyimpanan_sesi()
+
+
+@functools.lru_cache(maxsize=1)
+def _mesin_server() -> MesinPenasihat:
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise GalatPermintaan("API key Gemini belum dikonfigurasi di server (GOOGLE_API_KEY).", status=503)
+    # Potongan lampiran disimpan di penyimpanan sesi bersama → indeks bisa dibangun ulang di worker/replika lain
+    return MesinPenasihat(api_key, penyimpanan=_penyimpanan())
+
+
+def _mesin(request) -> MesinPenasihat:
+    return _mesin_server()
+
+
+async def _json(request, *wajib) -> dict:
+    try:
+        data = await request.json()
+    except ValueError:
+        raise GalatPermintaan("Body harus berupa JSON.")
+    kurang = [k for k in wajib if k not in data]
+    if kurang:
+        raise GalatPermintaan(f"Field wajib tidak ada: {', '.join(kurang)}.")
+    return data
+
+
+def _tangani_galat(fungsi):
+    @functools.wraps(fungsi)
+    async def _bungkus(request):
+        try:
+            return await fungsi(request)
+        except GalatPermintaan as e:
+            return JSONResponse({"galat": str(e)}, status_code=e.status)
+        except KeyError as e:
+            return JSONResponse({"galat": str(e).strip("'\"")}, status_code=404)
+        except Exception as e:
+            return JSONResponse({"galat": str(e) or e.__class__.__name__}, status_code=500)
+    return _bungkus
+
+
+# --------------------------------------------------------------------------------------
+# Endpoint
+# --------------------------------------------------------------------------------------
+async def kesehatan(request):
+    return JSONResponse({"status": "ok"})
+
+
+@_tangani_galat
+async def statistik(request):
+    mesin = _mesin(request)
+    return JSONResponse(mesin.statistik(request.query_params.get("sesi_id")))
+
+
+@_tangani_galat
+async def skor(request):
+    data = await _json(request, "nilai", "minat", "toleransi")
+    return JSONResponse(_mesin(request).skor_profil(data["nilai"], data["minat"], data["toleransi"]))
+
+
+@_tangani_galat
+async def lampiran(request):
+    mesin = _mesin(request)
+    async with request.form() as form:
+        berkas = [(b.filename, await b.read(), b.content_type) for b in form.getlist("berkas")]
+        sesi_id = form.get("sesi_id")
+    return JSONResponse(await run_in_threadpool(mesin.indeks_lampiran, berkas, sesi_id=sesi_id))
+
+
+@_tangani_galat
+async def rekomendasi(request):
+    data = await _json(request, "sesi_id", "profil")
+    hasil = await run_in_threadpool(
+        _mesin(request).rekomendasi_awal,
+        data["sesi_id"],
+        data["profil"],
+        data.get("profil_jawaban") or PROFIL_DEFAULT,
+        bool(data.get("terstruktur", TERSTRUKTUR_DEFAULT)),
+    )
+    return JSONResponse(hasil)
+
+
+@_tangani_galat
+async def susulan(request):
+    sesi_id = request.query_params.get("sesi_id")
+    if not sesi_id:
+        raise GalatPermintaan("Parameter sesi_id wajib diisi.")
+    return JSONResponse(_mesin(request).ambil_susulan(sesi_id))
+
+
+def _argumen_chat(data) -> tuple:
+    return (
+        data["sesi_id"],
+        data.get("ringkasan_profil"),
+        data["pertanyaan"],
+        data.get("lampiran_id"),
+        data.get("profil_jawaban") or PROFIL_DEFAULT,
+        data.get("profil_skor"),
+    )
+
+
+@_tangani_galat
+async def chat(request):
+    data = await _json(request, "sesi_id", "pertanyaan")
+    jawaban = await run_in_threadpool(_mesin(request).jawab, *_argumen_chat(data))
+    return JSONResponse({"jawaban": jawaban})
+
+
+@_tangani_galat
+async def chat_aliran(request):
+    data = await _json(request, "sesi_id", "pertanyaan")
+    # Generator sinkron diiterasi Starlette di threadpool
+    aliran = _mesin(request).alirkan_jawaban(*_argumen_chat(data))
+    return StreamingResponse(aliran, media_type="text/plain; charset=utf-8")
+
+
+@_tangani_galat
+async def hapus_sesi(request):
+    _mesin(request).hapus_sesi(request.path_params["sesi_id"])
+    return JSONResponse({"status": "ok"})
+
+
+async def siap(request):
+    status = pemanasan.status()
+    return JSONResponse(status, status_code=200 if status["siap"] else 503)
+
+
+@contextlib.asynccontextmanager
+async def _siklus_hidup(app):
+    # Pemanasan di latar: liveness langsung aktif, readiness (/siap) menunggu pemanasan selesai.
+    # Dengan GOOGLE_API_KEY, mesin yang dipanaskan adalah mesin yang sama yang melayani permintaan.
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    tugas = asyncio.get_running_loop().run_in_executor(
+        None, lambda: pemanasan.mulai(_mesin_server() if api_key else None)
+    )
+    yield
+    tugas.cancel()
+    if _mesin_server.cache_info().currsize:
+        _mesin_server().tutup()
+
+
+app = Starlette(lifespan=_siklus_hidup, routes=[
+    Route("/kesehatan", kesehatan),
+    Route("/siap", siap),
+    Route("/statistik", statistik),
+    Route("/skor", skor, methods=["POST"]),
+    Route("/lampiran", lampiran, methods=["POST"]),
+    Route("/rekomendasi", rekomendasi, methods=["POST"]),
+    Route("/rekomendasi/susulan", susulan, methods=["GET"]),
+    Route("/chat", chat, methods=["POST"]),
+    Route("/chat/aliran", chat_aliran, methods=["POST"]),
+    Route("/sesi/{sesi_id}", hapus_sesi, methods=["DELETE"]),
+])
+
+
+def main():
+    import uvicorn
+
+    uvicorn.run("penasihat.api:app", host=HOST_API, port=PORT_API, workers=PEKERJA_API)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Analisis sensitivitas "bagaimana jika" untuk pemetaan berbasis aturan.
+
+Menjawab pertanyaan seperti "kalau nilai Matematika naik 2?" secara lokal tanpa
+memanggil LLM. Semua skenario (±1/±2 untuk tiap mapel + tiap tingkat kenyamanan
+Matematika) dihitung sekaligus dalam satu perkalian matriks NumPy.
+"""
+
+import numpy as np
+
+from penasihat.pemetaan import (
+    BIDANG_INTENSIF_MTK,
+    BONUS_MINAT,
+    FAKTOR_TOLERANSI_MTK,
+    MAPEL_ALIAS,
+    PETA_BOBOT,
+    PREFERENSI_BONUS,
+)
+
+DAFTAR_MAPEL = list(MAPEL_ALIAS.values())
+DAFTAR_BIDANG = list(PETA_BOBOT.keys())
+PERUBAHAN_DEFAULT = (-2, -1, 1, 2)
+SKOR_MIN, SKOR_MAKS = 0, 10
+
+
+def _matriks_bobot():
+    """Matriks bobot (bidang × mapel) dari PETA_BOBOT."""
+    indeks_mapel = {m: j for j, m in enumerate(DAFTAR_MAPEL)}
+    w = np.zeros((len(DAFTAR_BIDANG), len(DAFTAR_MAPEL)))
+    for i, bidang in enumerate(DAFTAR_BIDANG):
+        for m, b in PETA_BOBOT[bidang].items():
+            w[i, indeks_mapel[MAPEL_ALIAS.get(m, m)]] = b
+    return w
+
+
+_BOBOT = _matriks_bobot()
+_MASKER_MTK = np.array([b in BIDANG_INTENSIF_MTK for b in DAFTAR_BIDANG])
+
+
+def _pengali_minat(preferensi):
+    """Pengali bonus minat per bidang (bonus bertumpuk jika bidang muncul di beberapa minat)."""
+    jumlah = np.zeros(len(DAFTAR_BIDANG))
+    indeks_bidang = {b: i for i, b in enumerate(DAFTAR_BIDANG)}
+    for p in preferensi:
+        for bidang in PREFERENSI_BONUS.get(p, []):
+            if bidang in indeks_bidang:
+                jumlah[indeks_bidang[bidang]] += 1
+    return BONUS_MINAT ** jumlah
+
+
+def _pengali_toleransi(toleransi_mtk):
+    return np.where(_MASKER_MTK, FAKTOR_TOLERANSI_MTK.get(toleransi_mtk, 1.0), 1.0)
+
+
+def _peringkat(skor):
+    """Peringkat 1..N per baris (urutan stabil, sama seperti sorted(..., reverse=True))."""
+    urutan = np.argsort(-skor, axis=1, kind="stable")
+    peringkat = np.empty_like(urutan)
+    baris = np.arange(skor.shape[0])[:, None]
+    peringkat[baris, urutan] = np.arange(1, skor.shape[1] + 1)
+    return peringkat
+
+
+def analisis_bagaimana_jika(nilai, preferensi, toleransi_mtk, perubahan=PERUBAHAN_DEFAULT):
+    """
+    Hitung skor & peringkat semua bidang untuk setiap skenario perubahan profil.
+
+    Baris pertama selalu profil saat ini ("Saat ini"). Hasil berupa dict berisi label
+    skenario, nama bidang, serta array skor, peringkat, selisih skor, dan selisih
+    peringkat (positif = bidang naik peringkat). Nilai dibatasi ke 0–10; skenario yang
+    terpotong diberi label perubahan yang benar-benar diterapkan dan ditandai di `dibatasi`.
+    """
+    x = np.clip(np.array([nilai.get(m, 0) for m in DAFTAR_MAPEL], dtype=float), SKOR_MIN, SKOR_MAKS)
+    n_mapel = len(DAFTAR_MAPEL)
+    perubahan = np.asarray(perubahan, dtype=float)
+
+    # Skenario mapel: setiap kombinasi (mapel, perubahan) → satu baris
+    kolom_mapel = np.repeat(np.arange(n_mapel), len(perubahan))
+    diminta = np.tile(perubahan, n_mapel)
+    delta = np.zeros((n_mapel * len(perubahan), n_mapel))
+    delta[np.arange(delta.shape[0]), kolom_mapel] = diminta
+    nilai_mapel = np.clip(x + delta, SKOR_MIN, SKOR_MAKS)
+    # Nilai dibatasi ke SKOR_MIN..SKOR_MAKS → label memakai perubahan yang benar-benar diterapkan
+    diterapkan = nilai_mapel[np.arange(delta.shape[0]), kolom_mapel] - x[kolom_mapel]
+    dibatasi_mapel = ~np.isclose(diterapkan, diminta)
+    label_mapel = [
+        f"{DAFTAR_MAPEL[j]} {t:+g}" + (f" (diminta {d:+g}, dibatasi {SKOR_MIN}–{SKOR_MAKS})" if b else "")
+        for j, d, t, b in zip(kolom_mapel, diminta, diterapkan, dibatasi_mapel)
+    ]
+
+    # Skenario toleransi Matematika: nilai tetap, pengali berbeda
+    tingkat_lain = [t for t in FAKTOR_TOLERANSI_MTK if t != toleransi_mtk]
+    label_toleransi = [f"Kenyamanan Matematika: {t}" for t in tingkat_lain]
+
+    nilai_skenario = np.vstack([x[None, :], nilai_mapel, np.repeat(x[None, :], len(tingkat_lain), axis=0)])
+    pengali = np.vstack(
+        [np.repeat(_pengali_toleransi(toleransi_mtk)[None, :], 1 + len(label_mapel), axis=0)]
+        + [_pengali_toleransi(t)[None, :] for t in tingkat_lain]
+    ) * _pengali_minat(preferensi)
+
+    skor = (nilai_skenario @ _BOBOT.T) * pengali
+    # Pembulatan agar skor yang seri tetap seri meski urutan perkalian berbeda
+    peringkat = _peringkat(np.round(skor, 9))
+
+    return {
+        "skenario": ["Saat ini"] + label_mapel + label_toleransi,
+        "bidang": DAFTAR_BIDANG,
+        "skor": skor,
+        "peringkat": peringkat,
+        "selisih_skor": skor - skor[0],
+        "selisih_peringkat": peringkat[0] - peringkat,
+        "dibatasi": np.concatenate([[False], dibatasi_mapel, np.zeros(len(tingkat_lain), dtype=bool)]),
+    }
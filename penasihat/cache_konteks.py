@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+"""
+Cache prefix prompt (context caching) untuk instruksi penasihat + profil per sesi.
+
+Instruksi sistem yang statis dan ringkasan profil siswa dulu dikirim ulang di setiap
+giliran chat dan di prompt rekomendasi awal. Sekarang keduanya didaftarkan sekali per
+sesi sebagai *cached content* Gemini; giliran berikutnya hanya mengirim bagian yang
+berubah (konteks lampiran + pertanyaan). Cache eksplisit punya batas minimal token
+(`MIN_TOKEN_CACHE`; 1024 untuk Flash, 4096 untuk Pro), sedangkan instruksi + profil
+ringkas biasanya jauh di bawahnya. Jumlah token prefix diperiksa dulu (perkiraan lokal,
+lalu `count_tokens` jika mendekati batas); di bawah batas, `CachedContent.create` tidak
+dipanggil dan prefix dikirim seperti biasa dengan urutan yang sama agar tetap bisa
+memanfaatkan cache implisit.
+
+`CacheKonteksLokal` adalah pengganti tanpa API cache untuk pengujian: prefix disimpan
+di memori dan digabung ke prompt. Kedua implementasi mencatat token prefix yang
+di-cache dan latensi per giliran. Jika `PENASIHAT_HEDGE=1`, setiap panggilan dilewatkan
+`penasihat.hedge_permintaan` (permintaan cadangan saat token pertama terlambat).
+
+Prefix sesi disimpan paling banyak `PENASIHAT_CACHE_MAKS_SESI` sesi; sesi yang tidak
+dipakai selama `PENASIHAT_CACHE_TTL` detik atau yang paling lama tidak dipakai di atas
+batas itu dilepas (cache Gemini-nya ikut dihapus) dan didaftarkan ulang jika kembali.
+
+Jawaban tanpa teks (kandidat kosong karena batas token habis untuk berpikir, atau
+diblokir) tidak dibaca lewat `jawaban.text` — properti itu melempar ValueError — tetapi
+lewat `teks_jawaban`, yang melempar `JawabanTidakLengkap` beserta alasannya. Pemanggil
+memperlakukannya sebagai jawaban gagal, bukan gangguan layanan (pemutus sirkuit tidak
+dihitung).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+from penasihat.hedge_permintaan import MODEL_HEDGE, buat_hedge
+from penasihat.profil_kinerja import tahap
+from penasihat.tenggat import argumen_generasi
+
+MODE_CACHE = os.environ.get("PENASIHAT_CACHE_KONTEKS", "gemini")  # gemini | lokal | mati
+TTL_CACHE = int(os.environ.get("PENASIHAT_CACHE_TTL", "3600"))
+MAKS_CATATAN = 500
+MAKS_SESI = int(os.environ.get("PENASIHAT_CACHE_MAKS_SESI", "1000"))
+# Batas minimal token cache eksplisit; kosong = sesuai model
+MIN_TOKEN_CACHE = int(os.environ.get("PENASIHAT_CACHE_MIN_TOKEN", "0")) or None
+PESAN_JAWABAN_KOSONG = (
+    "Maaf, penasihat AI tidak menghasilkan jawaban untuk pertanyaan ini. "
+    "Coba ulangi atau pilih panjang jawaban yang lebih lengkap."
+)
+CATATAN_TERPOTONG = "\n\n_(Jawaban terpotong karena batas panjang jawaban. Pilih panjang jawaban yang lebih lengkap untuk jawaban utuh.)_"
+
+INSTRUKSI_PENASIHAT = """Anda adalah penasihat akademik untuk siswa SMA di Indonesia.
+Gunakan profil siswa (dan konteks lampiran jika ada) untuk menjawab secara spesifik, empatik, dan actionable.
+
+Instruksi:
+- Jelaskan alasan rekomendasi (kaitkan dengan nilai mapel, minat, dan gaya belajar).
+- Beri 3-5 rekomendasi jurusan/kelompok program studi, plus alternatif jika syarat tertentu kurang cocok.
+- Sertakan contoh kegiatan ekstrakurikuler atau proyek yang bisa dicoba dalam 3-6 bulan.
+- Jika pengguna minta perbandingan jurusan, paparkan perbedaan fokus, mata kuliah inti, dan prospek umum.
+- Hindari klaim institusi tertentu; berikan saran generik (misal: "universitas dengan akreditasi baik untuk X").
+Jawaban terstruktur dan mudah dibaca."""
+
+
+def teks_profil(ringkasan_profil) -> str:
+    return f"Profil ringkas siswa:\n{ringkasan_profil or '-'}"
+
+
+def prompt_pertanyaan(pertanyaan: str, konteks: str = None, arahan: str = None) -> str:
+    """
+    Bagian prompt yang berubah tiap giliran (dikirim setelah prefix yang di-cache).
+    `arahan` (panjang jawaban) sengaja di sini, bukan di prefix, agar cache tetap sama antar profil.
+    """
+    prompt = (
+        f"Konteks Lampiran:\n{konteks or 'Tidak ada konteks tambahan.'}\n\n"
+        f"Pertanyaan Pengguna:\n{pertanyaan}"
+    )
+    return f"{prompt}\n\n{arahan}" if arahan else prompt
+
+
+class JawabanTidakLengkap(Exception):
+    """Gemini selesai tanpa teks yang bisa dipakai (`alasan`: finish_reason, mis. MAX_TOKENS)."""
+
+    def __init__(self, alasan: str):
+        super().__init__(f"Jawaban Gemini kosong/terpotong ({alasan}).")
+        self.alasan = alasan
+
+
+def alasan_selesai(jawaban):
+    """finish_reason kandidat pertama (mis. "STOP", "MAX_TOKENS"), atau None jika tidak tersedia."""
+    kandidat = getattr(jawaban, "candidates", None)
+    if kandidat is None:
+        return None
+    if not kandidat:
+        blokir = getattr(getattr(jawaban, "prompt_feedback", None), "block_reason", None)
+        return f"BLOKIR_{getattr(blokir, 'name', blokir)}" if blokir else "TANPA_KANDIDAT"
+    alasan = kandidat[0].finish_reason
+    return getattr(alasan, "name", str(alasan))
+
+
+def teks_jawaban(jawaban, utuh: bool = False) -> str:
+    """
+    Teks jawaban non-streaming. Kandidat tanpa bagian teks → `JawabanTidakLengkap`.
+    Dengan `utuh=True` (JSON terstruktur), jawaban yang terpotong MAX_TOKENS juga ditolak.
+    """
+    alasan = alasan_selesai(jawaban)
+    try:
+        teks = jawaban.text
+    except ValueError:
+        teks = ""
+    if not teks:
+        raise JawabanTidakLengkap(alasan or "TANPA_TEKS")
+    if utuh and alasan == "MAX_TOKENS":
+        raise JawabanTidakLengkap(alasan)
+    return teks
+
+
+def _dengan_catatan(jawaban, teks: str) -> str:
+    """Teks bebas yang terpotong MAX_TOKENS diberi catatan agar tidak tampak utuh."""
+    return teks + CATATAN_TERPOTONG if alasan_selesai(jawaban) == "MAX_TOKENS" else teks
+
+
+def _terstruktur(konfigurasi) -> bool:
+    return bool(konfigurasi) and konfigurasi.get("response_mime_type") == "application/json"
+
+
+def perkiraan_token(teks: str) -> int:
+    """Perkiraan kasar jumlah token (±4 karakter per token)."""
+    return max(1, len(teks) // 4) if teks else 0
+
+
+class _CacheDasar:
+    """Pencatatan token & latensi per giliran (dipakai bersama oleh semua sesi)."""
+
+    def __init__(self, maks_sesi: int = MAKS_SESI, ttl_sesi: float = TTL_CACHE):
+        self._catatan = deque(maxlen=MAKS_CATATAN)
+        # Urut dari yang paling lama tidak dipakai (LRU)
+        self._sesi = OrderedDict()
+        self.maks_sesi = maks_sesi
+        self.ttl_sesi = ttl_sesi
+        self._lock = threading.Lock()
+        self.hedge = buat_hedge()
+
+    def pastikan(self, kunci: str, ringkasan_profil: str):
+        """Daftarkan prefix sesi jika belum ada atau profilnya berubah (mis. di worker lain)."""
+        sesi = self._ambil_sesi(kunci)
+        if sesi is None or sesi["profil"] != ringkasan_profil:
+            self.daftarkan(kunci, ringkasan_profil)
+
+    def _ambil_sesi(self, kunci: str):
+        with self._lock:
+            sesi = self._sesi.get(kunci)
+            if sesi is not None:
+                sesi["dipakai"] = time.monotonic()
+                self._sesi.move_to_end(kunci)
+        return sesi
+
+    def _simpan_sesi(self, kunci: str, sesi: dict):
+        """Simpan prefix sesi, lalu lepas sesi yang kedaluwarsa/di atas `maks_sesi` (LRU)."""
+        sekarang = time.monotonic()
+        sesi["dipakai"] = sekarang
+        dilepas = []
+        with self._lock:
+            self._sesi[kunci] = sesi
+            self._sesi.move_to_end(kunci)
+            while self._sesi:
+                lama, tertua = next(iter(self._sesi.items()))
+                kedaluwarsa = self.ttl_sesi and sekarang - tertua["dipakai"] > self.ttl_sesi
+                if lama == kunci or not (kedaluwarsa or len(self._sesi) > self.maks_sesi):
+                    break
+                dilepas.append(self._sesi.pop(lama))
+        for tertua in dilepas:
+            self._lepas(tertua)
+
+    def _lepas(self, sesi: dict):
+        """Bebaskan sumber daya prefix sesi yang dikeluarkan (mis. cache di server)."""
+
+    # Jenis panggilan untuk jendela latensi hedging: streaming ("aliran") atau utuh
+    JENIS_ALIRAN = "aliran"
+
+    def _dengan_hedge(self, fungsi, *argumen, jenis: str = "aliran"):
+        """`fungsi(*argumen, cadangan=...)` → iterable; lewat hedging jika aktif."""
+        if self.hedge is None:
+            return fungsi(*argumen)
+        return self.hedge.alirkan(lambda: fungsi(*argumen), lambda: fungsi(*argumen, cadangan=True), jenis)
+
+    def alirkan(self, kunci: str, prompt: str, konfigurasi: dict = None):
+        """Hasilkan jawaban sebagai potongan teks selama model menulis."""
+        return self._dengan_hedge(self._alirkan, kunci, prompt, konfigurasi, jenis=self.JENIS_ALIRAN)
+
+    def hasilkan(self, kunci: str, prompt: str, konfigurasi: dict = None) -> str:
+        return "".join(self.alirkan(kunci, prompt, konfigurasi))
+
+    def panaskan(self):
+        """Satu generasi 1 token per model (pemanasan koneksi); tidak dicatat di statistik."""
+        for model in self._model_pemanasan():
+            model.generate_content("ping", generation_config={"max_output_tokens": 1})
+
+    def _catat(self, kunci, token_prompt, token_cache, latensi, pakai_cache, token_keluaran=0):
+        with self._lock:
+            self._catatan.append({
+                "sesi": kunci,
+                "token_prompt": int(token_prompt or 0),
+                "token_cache": int(token_cache or 0),
+                "token_keluaran": int(token_keluaran or 0),
+                "latensi": latensi,
+                "pakai_cache": pakai_cache,
+            })
+
+    def tutup(self):
+        """Hapus prefix semua sesi (cache Gemini dihapus di server, tidak menunggu TTL)."""
+        with self._lock:
+            kunci = list(self._sesi)
+        for k in kunci:
+            self.hapus(k)
+
+    def catatan(self, kunci: str = None) -> list:
+        """Catatan per giliran (opsional hanya untuk satu sesi)."""
+        with self._lock:
+            return [c for c in self._catatan if kunci is None or c["sesi"] == kunci]
+
+    def statistik(self, kunci: str = None) -> dict:
+        giliran = self.catatan(kunci)
+        dengan = [c["latensi"] for c in giliran if c["pakai_cache"]]
+        tanpa = [c["latensi"] for c in giliran if not c["pakai_cache"]]
+        token_prompt = sum(c["token_prompt"] for c in giliran)
+        token_hemat = sum(c["token_cache"] for c in giliran)
+        token_keluaran = sum(c["token_keluaran"] for c in giliran)
+        statistik = {
+            "giliran": len(giliran),
+            "token_prompt": token_prompt,
+            "token_hemat": token_hemat,
+            "rasio_hemat": token_hemat / token_prompt if token_prompt else 0.0,
+            "token_keluaran_rata": token_keluaran / len(giliran) if giliran else 0.0,
+            "latensi_cache": sum(dengan) / len(dengan) if dengan else None,
+            "latensi_tanpa_cache": sum(tanpa) / len(tanpa) if tanpa else None,
+        }
+        if self.hedge is not None:
+            statistik["hedge"] = self.hedge.statistik()
+        return statistik
+
+
+class CacheKonteksGemini(_CacheDasar):
+    """Prefix (instruksi + profil) didaftarkan sebagai CachedContent Gemini per sesi."""
+
+    def __init__(self, nama_model: str, ttl_detik: int = TTL_CACHE):
+        super().__init__()
+        self.nama_model = nama_model if nama_model.startswith("models/") else f"models/{nama_model}"
+        self.ttl_detik = ttl_detik
+        self._model_biasa = genai.GenerativeModel(self.nama_model, system_instruction=INSTRUKSI_PENASIHAT)
+        # Model cadangan yang lebih ringan untuk hedging (tanpa cache: cache terikat ke model)
+        self._model_cadangan = (
+            genai.GenerativeModel(MODEL_HEDGE, system_instruction=INSTRUKSI_PENASIHAT) if MODEL_HEDGE else None
+        )
+        self._cache_dilewati = 0
+
+    def statistik(self, kunci: str = None) -> dict:
+        statistik = super().statistik(kunci)
+        statistik["cache_dilewati"] = self._cache_dilewati  # prefix di bawah MIN_TOKEN_CACHE
+        return statistik
+
+    def _model_pemanasan(self):
+        return [m for m in (self._model_biasa, self._model_cadangan) if m is not None]
+
+    def _cukup_untuk_cache(self, ringkasan_profil: str) -> bool:
+        """Prefix sesi memenuhi batas minimal token cache eksplisit?"""
+        minimal = MIN_TOKEN_CACHE or (4096 if "pro" in self.nama_model else 1024)
+        perkiraan = perkiraan_token(INSTRUKSI_PENASIHAT) + perkiraan_token(teks_profil(ringkasan_profil))
+        if perkiraan < minimal // 2:
+            return False  # jelas terlalu pendek → tanpa panggilan count_tokens
+        try:
+            # Model biasa sudah membawa instruksi sistem → jumlahnya mencakup seluruh prefix
+            return self._model_biasa.count_tokens(teks_profil(ringkasan_profil)).total_tokens >= minimal
+        except Exception:
+            return perkiraan >= minimal
+
+    def daftarkan(self, kunci: str, ringkasan_profil: str):
+        """Buat (atau ganti) cache prefix untuk sesi `kunci`."""
+        self.hapus(kunci)
+        sesi = {"profil": ringkasan_profil, "cache": None, "model": None}
+        if not self._cukup_untuk_cache(ringkasan_profil):
+            with self._lock:
+                self._cache_dilewati += 1
+            self._simpan_sesi(kunci, sesi)
+            return
+        try:
+            sesi["cache"] = caching.CachedContent.create(
+                model=self.nama_model,
+                display_name=f"penasihat-{kunci}"[:120],
+                system_instruction=INSTRUKSI_PENASIHAT,
+                contents=[teks_profil(ringkasan_profil)],
+                ttl=timedelta(seconds=self.ttl_detik),
+            )
+            sesi["model"] = genai.GenerativeModel.from_cached_content(sesi["cache"])
+        except Exception:
+            # Model tidak mendukung cache eksplisit / kuota → tanpa cache
+            sesi["cache"] = sesi["model"] = None
+        self._simpan_sesi(kunci, sesi)
+
+    def hapus(self, kunci: str):
+        with self._lock:
+            sesi = self._sesi.pop(kunci, None)
+        if sesi:
+            self._lepas(sesi)
+
+    def _lepas(self, sesi: dict):
+        if sesi["cache"] is not None:
+            try:
+                sesi["cache"].delete()
+            except Exception:
+                pass  # cache tetap kedaluwarsa sendiri setelah TTL
+
+    def _kirim(self, kunci: str, prompt: str, stream: bool, konfigurasi: dict = None, cadangan: bool = False):
+        sesi = self._ambil_sesi(kunci)
+        # Tenggat permintaan (jika ada) → request_options timeout
+        tambahan = argumen_generasi()
+        if cadangan and self._model_cadangan is not None:
+            profil = sesi["profil"] if sesi else None
+            jawaban = self._model_cadangan.generate_content(
+                f"{teks_profil(profil)}\n\n{prompt}", stream=stream, generation_config=konfigurasi, **tambahan
+            )
+            return jawaban, False
+        if sesi and sesi["model"] is not None:
+            try:
+                jawaban = sesi["model"].generate_content(
+                    prompt, stream=stream, generation_config=konfigurasi, **tambahan
+                )
+                return jawaban, True
+            except Exception:
+                # Cache kedaluwarsa/terhapus → daftarkan ulang untuk giliran berikutnya
+                self.daftarkan(kunci, sesi["profil"])
+        profil = sesi["profil"] if sesi else None
+        jawaban = self._model_biasa.generate_content(
+            f"{teks_profil(profil)}\n\n{prompt}", stream=stream, generation_config=konfigurasi, **argumen_generasi()
+        )
+        return jawaban, False
+
+    def _catat_jawaban(self, kunci, prompt, jawaban, latensi, pakai_cache, teks=""):
+        meta = getattr(jawaban, "usage_metadata", None)
+        token_prompt = getattr(meta, "prompt_token_count", 0) or perkiraan_token(prompt)
+        # Juga terisi jika Gemini memakai cache implisit untuk prefix yang sama
+        token_cache = getattr(meta, "cached_content_token_count", 0) or 0
+        token_keluaran = getattr(meta, "candidates_token_count", 0) or perkiraan_token(teks)
+        self._catat(kunci, token_prompt, token_cache, latensi, pakai_cache or token_cache > 0, token_keluaran)
+
+    def hasilkan(self, kunci: str, prompt: str, konfigurasi: dict = None) -> str:
+        return "".join(self._dengan_hedge(self._hasilkan, kunci, prompt, konfigurasi, jenis="utuh"))
+
+    def _hasilkan(self, kunci: str, prompt: str, konfigurasi: dict = None, cadangan: bool = False):
+        mulai = time.perf_counter()
+        with tahap("generate_content", kunci):
+            jawaban, pakai_cache = self._kirim(kunci, prompt, False, konfigurasi, cadangan)
+        teks = teks_jawaban(jawaban, utuh=_terstruktur(konfigurasi))
+        latensi = time.perf_counter() - mulai
+        yield _dengan_catatan(jawaban, teks)
+        # Dicatat setelah jawaban diambil: percobaan hedge yang kalah ditutup di yield di atas
+        self._catat_jawaban(kunci, prompt, jawaban, latensi, pakai_cache, teks)
+
+    def _alirkan(self, kunci: str, prompt: str, konfigurasi: dict = None, cadangan: bool = False):
+        mulai = time.perf_counter()
+        # Profil mencakup sampai aliran terbuka; sisa potongan dibaca di thread pemanggil
+        with tahap("generate_content", kunci):
+            jawaban, pakai_cache = self._kirim(kunci, prompt, True, konfigurasi, cadangan)
+        keluaran = []
+        for bagian in jawaban:
+            try:
+                teks = bagian.text
+            except ValueError:
+                continue  # potongan tanpa teks (mis. hanya metadata)
+            if teks:
+                keluaran.append(teks)
+                yield teks
+        alasan = alasan_selesai(jawaban)
+        if not keluaran:
+            raise JawabanTidakLengkap(alasan or "TANPA_TEKS")
+        if alasan == "MAX_TOKENS":
+            yield CATATAN_TERPOTONG
+        self._catat_jawaban(kunci, prompt, jawaban, time.perf_counter() - mulai, pakai_cache, "".join(keluaran))
+
+
+class CacheKonteksLokal(_CacheDasar):
+    """
+    Pengganti lokal untuk pengujian: prefix disimpan di memori dan digabung ke prompt.
+    Dengan `simulasi=True` token prefix dicatat sebagai token yang di-cache; dengan
+    `simulasi=False` (mode "mati") semua giliran dicatat tanpa cache sebagai pembanding.
+    """
+
+    # Model lokal tidak streaming: "token pertama" = seluruh jawaban
+    JENIS_ALIRAN = "utuh"
+
+    def __init__(self, model, simulasi: bool = True):
+        super().__init__()
+        self.model = model
+        self.simulasi = simulasi
+
+    def _model_pemanasan(self):
+        return [self.model]
+
+    def daftarkan(self, kunci: str, ringkasan_profil: str):
+        self._simpan_sesi(kunci, {
+            "profil": ringkasan_profil,
+            "prefix": f"{INSTRUKSI_PENASIHAT}\n\n{teks_profil(ringkasan_profil)}",
+        })
+
+    def hapus(self, kunci: str):
+        with self._lock:
+            self._sesi.pop(kunci, None)
+
+    def _alirkan(self, kunci: str, prompt: str, konfigurasi: dict = None, cadangan: bool = False):
+        sesi = self._ambil_sesi(kunci)
+        prefix = sesi["prefix"] if sesi else f"{INSTRUKSI_PENASIHAT}\n\n{teks_profil(None)}"
+        mulai = time.perf_counter()
+        with tahap("generate_content", kunci):
+            jawaban = self.model.generate_content(
+                f"{prefix}\n\n{prompt}", generation_config=konfigurasi, **argumen_generasi()
+            )
+        teks = teks_jawaban(jawaban, utuh=_terstruktur(konfigurasi))
+        latensi = time.perf_counter() - mulai
+        yield _dengan_catatan(jawaban, teks)
+        pakai_cache = self.simulasi and sesi is not None
+        self._catat(
+            kunci,
+            perkiraan_token(prefix) + perkiraan_token(prompt),
+            perkiraan_token(prefix) if pakai_cache else 0,
+            latensi,
+            pakai_cache,
+            perkiraan_token(teks),
+        )
+
+
+def buat_cache_konteks(nama_model: str, model=None, mode: str = MODE_CACHE):
+    """Pilih implementasi sesuai `PENASIHAT_CACHE_KONTEKS` (gemini | lokal | mati)."""
+    if mode == "gemini":
+        return CacheKonteksGemini(nama_model)
+    model = model or genai.GenerativeModel(nama_model)
+    return CacheKonteksLokal(model, simulasi=(mode == "lokal"))
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Ekstraksi teks lampiran (rapor/sertifikat) lewat registri ekstraktor.
+
+Setiap ekstraktor didaftarkan dengan ekstensi dan/atau MIME type. Format baru cukup
+ditambahkan dengan dekorator `daftarkan_ekstraktor` tanpa mengubah kode pemanggil.
+Seperti sebelumnya, ekstraktor mengembalikan string "Error ..." jika gagal.
+
+Parsing PDF (PyPDF2, Python murni) dan DOCX memegang GIL hampir sepanjang waktu, jadi
+beberapa berkas sekaligus diekstrak di pool proses (seperti OCR di `penasihat.ocr`),
+bukan thread. OCR halaman scan tetap dijalankan dari proses utama karena punya pool
+sendiri. Perbandingan thread vs proses:
+    python -m penasihat.ekstraksi --sintetis 8
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as BatasWaktuFuture
+from concurrent.futures.process import BrokenProcessPool
+
+# Paket pemrosesan dokumen (opsional untuk upload rapor/sertifikat)
+import PyPDF2
+import docx
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+from penasihat import tenggat
+from penasihat.ocr import halaman_tanpa_teks, ocr_halaman_pdf, ocr_tersedia
+
+REGISTRI_EKSTRAKTOR = {}
+MAKS_PEKERJA_EKSTRAKSI = int(os.environ.get("PENASIHAT_EKSTRAKSI_PEKERJA", str(min(4, os.cpu_count() or 1))))
+# Di bawah total ukuran ini, biaya kirim data ke proses lain lebih besar dari hematnya
+MIN_BYTE_PROSES = int(os.environ.get("PENASIHAT_EKSTRAKSI_MIN_BYTE_PROSES", str(256 * 1024)))
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def daftarkan_ekstraktor(*kunci):
+    """Dekorator: daftarkan fungsi `f(file) -> str` untuk ekstensi/MIME type tertentu."""
+    def _daftar(fungsi):
+        for k in kunci:
+            REGISTRI_EKSTRAKTOR[k.lower()] = fungsi
+        return fungsi
+    return _daftar
+
+
+def ekstensi_didukung():
+    """Daftar ekstensi (tanpa titik) untuk `st.file_uploader`."""
+    return sorted(k for k in REGISTRI_EKSTRAKTOR if "/" not in k)
+
+
+def cari_ekstraktor(nama_berkas: str, mime: str = None):
+    """Cari ekstraktor berdasarkan MIME type, lalu ekstensi nama berkas."""
+    if mime and mime.lower() in REGISTRI_EKSTRAKTOR:
+        return REGISTRI_EKSTRAKTOR[mime.lower()]
+    ext = nama_berkas.rsplit(".", 1)[-1].lower() if "." in nama_berkas else ""
+    return REGISTRI_EKSTRAKTOR.get(ext)
+
+
+# --------------------------------------------------------------------------------------
+# Ekstraktor bawaan
+# --------------------------------------------------------------------------------------
+def _lapisan_teks_pdf(data: bytes) -> list:
+    """Teks lapisan PDF per halaman (bagian CPU-bound; aman di proses pekerja)."""
+    return [halaman.extract_text() or "" for halaman in PyPDF2.PdfReader(io.BytesIO(data)).pages]
+
+
+def _lengkapi_ocr(data: bytes, teks_halaman: list) -> str:
+    """Halaman hasil scan (tanpa lapisan teks) dibaca dengan OCR jika tersedia."""
+    kosong = halaman_tanpa_teks(teks_halaman)
+    if kosong and ocr_tersedia():
+        try:
+            for i, teks in ocr_halaman_pdf(data, kosong).items():
+                teks_halaman[i] = teks
+        except tenggat.PermintaanDihentikan:
+            raise
+        except Exception:
+            pass  # OCR hanya pelengkap; teks dari lapisan PDF tetap dipakai
+    # Form feed sebagai batas halaman: dipakai normalisasi untuk mengenali kop/kaki berulang
+    return "\f".join(teks_halaman)
+
+
+@daftarkan_ekstraktor("pdf", "application/pdf")
+def ekstrak_teks_pdf(file):
+    """Teks PDF; halaman hasil scan (tanpa lapisan teks) dibaca dengan OCR jika tersedia."""
+    try:
+        data = file.read()
+        return _lengkapi_ocr(data, _lapisan_teks_pdf(data))
+    except tenggat.PermintaanDihentikan:
+        raise
+    except Exception as e:
+        return f"Error membaca PDF: {str(e)}"
+
+
+def _teks_tabel(tabel: Table) -> str:
+    """
+    Ubah tabel DOCX menjadi baris 'sel | sel | sel'. Sel gabungan muncul berulang di
+    `row.cells` sebagai elemen `<w:tc>` yang sama, jadi diulang menurut identitas elemen,
+    bukan isi: dua nilai sama yang bersebelahan (mis. 85 | 85) tetap dua kolom.
+    """
+    baris = []
+    for row in tabel.rows:
+        sel, dilihat = [], set()
+        for cell in row.cells:
+            if id(cell._tc) in dilihat:
+                continue
+            dilihat.add(id(cell._tc))
+            sel.append(cell.text.strip())
+        if any(sel):
+            baris.append(" | ".join(sel))
+    return "\n".join(baris)
+
+
+@daftarkan_ekstraktor("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+def ekstrak_teks_docx(file):
+    """Paragraf + tabel (tabel nilai rapor) sesuai urutan dokumen."""
+    try:
+        d = docx.Document(file)
+        teks = ""
+        for elemen in d.element.body.iterchildren():
+            tag = elemen.tag.rsplit("}", 1)[-1]
+            if tag == "p":
+                teks += Paragraph(elemen, d).text + "\n"
+            elif tag == "tbl":
+                teks += _teks_tabel(Table(elemen, d)) + "\n"
+        return teks
+    except Exception as e:
+        return f"Error membaca DOCX: {str(e)}"
+
+
+@daftarkan_ekstraktor("txt", "text/plain")
+def ekstrak_teks_txt(file):
+    try:
+        return str(file.read(), "utf-8")
+    except Exception as e:
+        return f"Error membaca TXT: {str(e)}"
+
+
+# --------------------------------------------------------------------------------------
+# Ekstraksi banyak berkas sekaligus
+# --------------------------------------------------------------------------------------
+def ekstrak_berkas(nama: str, data: bytes, mime: str = None) -> dict:
+    """Ekstrak satu berkas; hasil berupa dict {"nama", "teks", "galat"}."""
+    ekstraktor = cari_ekstraktor(nama, mime)
+    if ekstraktor is None:
+        return {"nama": nama, "teks": "", "galat": "Format berkas tidak didukung."}
+    return _hasil_ekstraksi(nama, ekstraktor(io.BytesIO(data)))
+
+
+def _hasil_ekstraksi(nama: str, teks) -> dict:
+    if not isinstance(teks, str) or teks.startswith("Error"):
+        return {"nama": nama, "teks": "", "galat": teks or "Gagal mengekstrak teks."}
+    if not teks.strip():
+        return {"nama": nama, "teks": "", "galat": "Tidak ada teks yang bisa diekstrak."}
+    return {"nama": nama, "teks": teks, "galat": None}
+
+
+def _cpu_bound(nama: str, mime: str = None) -> bool:
+    return cari_ekstraktor(nama, mime) in (ekstrak_teks_pdf, ekstrak_teks_docx)
+
+
+def _ekstrak_di_proses(nama: str, data: bytes, mime: str = None):
+    """
+    Dijalankan di proses pekerja. PDF hanya diambil lapisan teksnya (list per halaman);
+    OCR halaman scan menyusul di proses utama agar tidak membuat pool OCR di tiap pekerja.
+    """
+    ekstraktor = cari_ekstraktor(nama, mime)
+    if ekstraktor is ekstrak_teks_pdf:
+        try:
+            return _lapisan_teks_pdf(data)
+        except Exception as e:
+            return f"Error membaca PDF: {str(e)}"
+    return ekstraktor(io.BytesIO(data))
+
+
+def _pool_ekstraksi(maks_pekerja: int) -> ProcessPoolExecutor:
+    # "spawn" agar aman dipakai dari server Streamlit yang multi-thread (sama dengan pool OCR)
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=maks_pekerja, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _ekstrak_proses(berkas: list, maks_pekerja: int, aktif) -> list:
+    pool = _pool_ekstraksi(maks_pekerja)
+    tugas = []
+    try:
+        for nama, data, mime in berkas:
+            if aktif is not None:
+                aktif.periksa("ekstraksi")
+            tugas.append(pool.submit(_ekstrak_di_proses, nama, data, mime) if _cpu_bound(nama, mime) else None)
+        hasil = []
+        for (nama, data, mime), future in zip(berkas, tugas):
+            if future is None:
+                hasil.append(ekstrak_berkas(nama, data, mime))
+                continue
+            while True:
+                if aktif is not None:
+                    aktif.periksa("ekstraksi")
+                try:
+                    teks = future.result(timeout=0.5)
+                    break
+                except BatasWaktuFuture:
+                    continue
+            if isinstance(teks, list):
+                teks = _lengkapi_ocr(data, teks)
+            hasil.append(_hasil_ekstraksi(nama, teks))
+        return hasil
+    except BrokenProcessPool:
+        _reset_pool()
+        raise
+    finally:
+        for future in tugas:
+            if future is not None:
+                future.cancel()
+
+
+def ekstrak_banyak(berkas, maks_pekerja: int = MAKS_PEKERJA_EKSTRAKSI, proses: bool = None) -> list:
+    """
+    Ekstrak beberapa berkas secara paralel.
+
+    berkas: list (nama, data_bytes, mime). Urutan hasil sama dengan urutan masukan.
+    PDF/DOCX diparsing di pool proses jika ada ≥ 2 berkas seperti itu dan totalnya ≥
+    `MIN_BYTE_PROSES` (`proses` memaksa pilihan); selain itu thread.
+    """
+    berkas = list(berkas)
+    # Tenggat permintaan diperiksa sebelum tiap berkas (thread pool tidak mewarisi konteks → dibawa manual)
+    aktif = tenggat.aktif()
+
+    def _satu(b):
+        if aktif is None:
+            return ekstrak_berkas(*b)
+        aktif.periksa("ekstraksi")
+        # OCR di dalam ekstraktor ikut memeriksa tenggat di antara halaman
+        with tenggat.dalam(aktif):
+            return ekstrak_berkas(*b)
+
+    if len(berkas) <= 1:
+        return [_satu(b) for b in berkas]
+    if proses is None:
+        berat = [b for b in berkas if _cpu_bound(b[0], b[2])]
+        proses = len(berat) >= 2 and sum(len(b[1]) for b in berat) >= MIN_BYTE_PROSES
+    if proses and maks_pekerja > 1:
+        try:
+            return _ekstrak_proses(berkas, maks_pekerja, aktif)
+        except BrokenProcessPool:
+            pass  # proses pekerja mati → ulangi dengan thread
+    with ThreadPoolExecutor(max_workers=min(maks_pekerja, len(berkas))) as eksekutor:
+        return list(eksekutor.map(_satu, berkas))
+
+
+def _pdf_sintetis(halaman: int) -> bytes:
+    """PDF teks sederhana (tanpa dependensi tambahan) untuk benchmark."""
+    objek, isi_halaman = [], []
+    for i in range(halaman):
+        baris = "".join(f"BT /F1 9 Tf 40 {800 - j * 11} Td (Semester {i % 6 + 1} Matematika {70 + j % 30} "
+                        f"Fisika {60 + j % 40} Kimia {65 + j % 35} Biologi {75 + j % 25}) Tj ET\n"
+                        for j in range(70))
+        isi_halaman.append(baris.encode("latin-1"))
+    jumlah = len(isi_halaman)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(jumlah))
+    objek.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objek.append(f"<< /Type /Pages /Kids [{kids}] /Count {jumlah} >>".encode())
+    objek.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, isi in enumerate(isi_halaman):
+        objek.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {5 + 2 * i} 0 R "
+                     f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        objek.append(f"<< /Length {len(isi)} >>\nstream\n".encode() + isi + b"endstream")
+    keluaran, posisi = io.BytesIO(), []
+    keluaran.write(b"%PDF-1.4\n")
+    for n, o in enumerate(objek, 1):
+        posisi.append(keluaran.tell())
+        keluaran.write(f"{n} 0 obj\n".encode() + o + b"\nendobj\n")
+    awal_xref = keluaran.tell()
+    keluaran.write(f"xref\n0 {len(objek) + 1}\n0000000000 65535 f \n".encode())
+    for p in posisi:
+        keluaran.write(f"{p:010d} 00000 n \n".encode())
+    keluaran.write(f"trailer\n<< /Size {len(objek) + 1} /Root 1 0 R >>\nstartxref\n{awal_xref}\n%%EOF".encode())
+    return keluaran.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan ekstraksi banyak PDF dengan thread vs pool proses.")
+    parser.add_argument("--sintetis", type=int, default=8, help="Jumlah PDF sintetis")
+    parser.add_argument("--halaman", type=int, default=20, help="Halaman per PDF")
+    parser.add_argument("--pekerja", type=int, default=MAKS_PEKERJA_EKSTRAKSI)
+    args = parser.parse_args(argv)
+
+    data = _pdf_sintetis(args.halaman)
+    berkas = [(f"rapor_{i}.pdf", data, "application/pdf") for i in range(args.sintetis)]
+    print(f"{args.sintetis} PDF x {args.halaman} halaman ({len(data) / 1024:.0f} KB), {args.pekerja} pekerja")
+    # Pool proses dibuat & dipanaskan sekali (seperti di server yang sudah berjalan)
+    ekstrak_banyak(berkas[:2], args.pekerja, proses=True)
+    for label, proses in (("thread", False), ("proses", True)):
+        mulai = time.perf_counter()
+        hasil = ekstrak_banyak(berkas, args.pekerja, proses=proses)
+        assert not any(h["galat"] for h in hasil)
+        print(f"  {label:<7} {time.perf_counter() - mulai:.2f} dtk")
+    _reset_pool()
+
+
+if __name__ == "__main__":
+    main()
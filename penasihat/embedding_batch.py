@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding potongan lampiran secara batch, tanpa duplikat, dan paralel terbatas.
+
+`GoogleGenerativeAIEmbeddings.embed_documents` mengirim batch satu per satu, sehingga
+waktu ingest bundel rapor puluhan halaman tumbuh dengan jumlah potongan. Pembungkus ini:
+- membuang potongan identik (kop surat, blok tanda tangan yang berulang) sebelum dikirim
+  dan menyalin vektornya kembali ke semua posisi,
+- menyusun batch berdasarkan jumlah teks dan total karakter,
+- mengirim beberapa batch sekaligus dengan jumlah pekerja terbatas,
+- menjaga jarak antar-permintaan sesuai batas permintaan per menit,
+- mengulang batch yang gagal secara terpisah (backoff eksponensial) tanpa mengulang
+  batch lain yang sudah berhasil,
+- berhenti sebelum batch berikutnya jika tenggat permintaan lewat atau dibatalkan
+  (`penasihat.tenggat`).
+
+Diatur lewat environment variable:
+    PENASIHAT_EMBEDDING_BATCH           teks per batch (default 100, batas API Gemini)
+    PENASIHAT_EMBEDDING_BATCH_KARAKTER  total karakter per batch (default 60000)
+    PENASIHAT_EMBEDDING_PARALEL         batch yang dikirim bersamaan (default 4)
+    PENASIHAT_EMBEDDING_RPM             batas permintaan per menit; 0 = tanpa batas (default 120)
+    PENASIHAT_EMBEDDING_ULANG           percobaan ulang per batch yang gagal (default 3)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+from penasihat import tenggat
+
+UKURAN_BATCH = int(os.environ.get("PENASIHAT_EMBEDDING_BATCH", "100"))
+KARAKTER_BATCH = int(os.environ.get("PENASIHAT_EMBEDDING_BATCH_KARAKTER", "60000"))
+PARALEL_EMBEDDING = int(os.environ.get("PENASIHAT_EMBEDDING_PARALEL", "4"))
+RPM_EMBEDDING = float(os.environ.get("PENASIHAT_EMBEDDING_RPM", "120"))
+ULANG_EMBEDDING = int(os.environ.get("PENASIHAT_EMBEDDING_ULANG", "3"))
+# Tunda awal backoff (detik), dikali dua di setiap percobaan ulang
+BACKOFF_AWAL = 1.0
+
+
+def susun_batch(teks: list, ukuran: int = UKURAN_BATCH, karakter: int = KARAKTER_BATCH) -> list:
+    """Kelompokkan indeks teks ke batch ≤ `ukuran` teks dan ≤ `karakter` karakter (minimal 1 teks)."""
+    hasil, batch, panjang = [], [], 0
+    for i, t in enumerate(teks):
+        if batch and (len(batch) >= ukuran or panjang + len(t) > karakter):
+            hasil.append(batch)
+            batch, panjang = [], 0
+        batch.append(i)
+        panjang += len(t)
+    if batch:
+        hasil.append(batch)
+    return hasil
+
+
+class _PembatasLaju:
+    """Jarak minimum antar-awal permintaan (60 / rpm detik), aman dipakai banyak thread."""
+
+    def __init__(self, rpm: float):
+        self.jarak = 60.0 / rpm if rpm > 0 else 0.0
+        self._lock = threading.Lock()
+        self._berikutnya = 0.0
+
+    def tunggu(self):
+        if not self.jarak:
+            return
+        with self._lock:
+            sekarang = time.monotonic()
+            giliran = max(sekarang, self._berikutnya)
+            self._berikutnya = giliran + self.jarak
+        if giliran > sekarang:
+            time.sleep(giliran - sekarang)
+
+
+class EmbeddingBatch(Embeddings):
+    """Pembungkus `Embeddings` apa pun; `embed_query` diteruskan apa adanya."""
+
+    def __init__(self, dasar: Embeddings, ukuran_batch: int = UKURAN_BATCH, karakter_batch: int = KARAKTER_BATCH,
+                 paralel: int = PARALEL_EMBEDDING, rpm: float = RPM_EMBEDDING, ulang: int = ULANG_EMBEDDING):
+        self.dasar = dasar
+        self.ukuran_batch = ukuran_batch
+        self.karakter_batch = karakter_batch
+        self.paralel = max(1, paralel)
+        self.ulang = ulang
+        self._pembatas = _PembatasLaju(rpm)
+        self._lock = threading.Lock()
+        self._statistik = {"teks": 0, "duplikat": 0, "batch": 0, "ulang": 0, "gagal": 0, "detik": 0.0}
+
+    def _tambah(self, **nilai):
+        with self._lock:
+            for k, v in nilai.items():
+                self._statistik[k] += v
+
+    def _kirim(self, teks: list, aktif=None) -> list:
+        for percobaan in range(self.ulang + 1):
+            self._pembatas.tunggu()
+            if aktif is not None:
+                aktif.periksa("embedding")
+            try:
+                vektor = self.dasar.embed_documents(teks)
+                self._tambah(batch=1)
+                return vektor
+            except Exception:
+                if percobaan == self.ulang or (aktif is not None and (aktif.dibatalkan or aktif.lewat)):
+                    self._tambah(gagal=1)
+                    raise
+                self._tambah(ulang=1)
+                time.sleep(BACKOFF_AWAL * 2 ** percobaan)
+
+    def embed_documents(self, texts: list) -> list:
+        mulai = time.perf_counter()
+        texts = list(texts)
+        unik = list(dict.fromkeys(texts))
+        batch = susun_batch(unik, self.ukuran_batch, self.karakter_batch)
+        aktif = tenggat.aktif()
+
+        def _satu(indeks):
+            return self._kirim([unik[i] for i in indeks], aktif)
+
+        if len(batch) <= 1 or self.paralel == 1:
+            hasil = [_satu(b) for b in batch]
+        else:
+            with ThreadPoolExecutor(min(self.paralel, len(batch)), thread_name_prefix="penasihat-embedding") as pool:
+                hasil = list(pool.map(_satu, batch))
+
+        vektor_unik = {}
+        for indeks, vektor in zip(batch, hasil):
+            for i, v in zip(indeks, vektor):
+                vektor_unik[unik[i]] = v
+        self._tambah(teks=len(texts), duplikat=len(texts) - len(unik), detik=time.perf_counter() - mulai)
+        return [vektor_unik[t] for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self.dasar.embed_query(text)
+
+    def statistik(self) -> dict:
+        with self._lock:
+            return dict(self._statistik)
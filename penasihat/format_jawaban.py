@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Profil panjang jawaban dan rekomendasi terstruktur.
+
+Waktu generasi didominasi panjang keluaran, jadi setiap jawaban dibatasi lewat
+profil "ringkas", "standar", atau "lengkap": arahan panjang di prompt ditambah
+`max_output_tokens` yang benar-benar dipaksakan oleh model.
+
+Mode terstruktur meminta rekomendasi awal sebagai JSON ringkas (bidang + alasan,
+alternatif, rencana 90 hari) dengan `response_schema`, lalu aplikasi merendernya
+sendiri dengan templat tetap. Keluaran jauh lebih pendek daripada markdown bebas,
+dan JSON-nya bisa disimpan/dipakai ulang apa adanya (indeks profil).
+
+Model Gemini 2.5 adalah model "berpikir": token berpikir ikut dihitung dalam
+`max_output_tokens`, sehingga batas 400/900 token bisa habis sebelum satu kata jawaban
+ditulis (kandidat kosong, atau JSON terpotong). Karena itu anggaran berpikir dikirim
+eksplisit (`thinking_config`) dan ditambahkan ke batas token, sehingga `maks_token`
+tetap seluruhnya untuk teks jawaban.
+
+Default diatur lewat environment variable:
+    PENASIHAT_PROFIL_JAWABAN        ringkas | standar (default) | lengkap
+    PENASIHAT_JAWABAN_TERSTRUKTUR   1 = rekomendasi awal terstruktur (default 0)
+    PENASIHAT_ANGGARAN_BERPIKIR     token berpikir per jawaban (default 0 = tanpa berpikir;
+                                    gemini-2.5-pro butuh minimal 128; -1 = tidak dikirim,
+                                    untuk model tanpa thinking_config)
+"""
+
+import json
+import os
+
+PROFIL_JAWABAN = {
+    "ringkas": {
+        "maks_token": 400,
+        "arahan": "Jawab singkat: maksimal sekitar 120 kata, hanya poin terpenting dalam bullet.",
+        "batas_daftar": {"bidang": 3, "alternatif": 2, "rencana_90_hari": 3},
+    },
+    "standar": {
+        "maks_token": 900,
+        "arahan": "Jawab cukup ringkas: sekitar 250 kata, heading + bullet.",
+        "batas_daftar": {"bidang": 4, "alternatif": 3, "rencana_90_hari": 4},
+    },
+    "lengkap": {
+        "maks_token": 2048,
+        "arahan": "Jawab lengkap namun tetap terstruktur (heading + bullet), maksimal sekitar 600 kata.",
+        "batas_daftar": {"bidang": 5, "alternatif": 4, "rencana_90_hari": 6},
+    },
+}
+PROFIL_DEFAULT = os.environ.get("PENASIHAT_PROFIL_JAWABAN", "standar")
+TERSTRUKTUR_DEFAULT = os.environ.get("PENASIHAT_JAWABAN_TERSTRUKTUR", "0") == "1"
+ANGGARAN_BERPIKIR = int(os.environ.get("PENASIHAT_ANGGARAN_BERPIKIR", "0"))
+# Suhu generasi; default 0 (deterministik, seperti chat sebelum profil jawaban)
+SUHU = float(os.environ.get("PENASIHAT_SUHU") or "0")
+
+# Skema keluaran rekomendasi terstruktur (subset OpenAPI yang diterima Gemini)
+SKEMA_REKOMENDASI = {
+    "type": "object",
+    "properties": {
+        "bidang": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"nama": {"type": "string"}, "alasan": {"type": "string"}},
+                "required": ["nama", "alasan"],
+            },
+        },
+        "alternatif": {"type": "array", "items": {"type": "string"}},
+        "rencana_90_hari": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["bidang", "alternatif", "rencana_90_hari"],
+}
+
+
+def ambil_profil(nama: str = None) -> dict:
+    """Profil jawaban menurut nama; nama tidak dikenal memakai profil default."""
+    return PROFIL_JAWABAN.get(nama) or PROFIL_JAWABAN.get(PROFIL_DEFAULT) or PROFIL_JAWABAN["standar"]
+
+
+def konfigurasi_generasi(nama_profil: str = None, terstruktur: bool = False) -> dict:
+    """
+    `generation_config` Gemini untuk profil ini (batas token, anggaran berpikir, suhu,
+    skema JSON jika terstruktur).
+    """
+    konfigurasi = {"max_output_tokens": ambil_profil(nama_profil)["maks_token"]}
+    if ANGGARAN_BERPIKIR >= 0:
+        # Token berpikir dihitung dalam max_output_tokens → batas dinaikkan sebesar anggarannya
+        konfigurasi["thinking_config"] = {"thinking_budget": ANGGARAN_BERPIKIR}
+        konfigurasi["max_output_tokens"] += ANGGARAN_BERPIKIR
+    konfigurasi["temperature"] = SUHU
+    if terstruktur:
+        konfigurasi["response_mime_type"] = "application/json"
+        konfigurasi["response_schema"] = SKEMA_REKOMENDASI
+    return konfigurasi
+
+
+def prompt_rekomendasi_terstruktur(top5, nama_profil: str = None) -> str:
+    """Prompt rekomendasi awal yang meminta JSON sesuai SKEMA_REKOMENDASI."""
+    batas = ambil_profil(nama_profil)["batas_daftar"]
+    kandidat = ", ".join(top5) if top5 else "-"
+    return f"""
+Hasil pemetaan awal (rule-based) memberi kandidat teratas: {kandidat}.
+
+Validasi & pertajam rekomendasi bidang/jurusan untuk siswa ini (boleh menambah/menyusun ulang)
+dan kembalikan HANYA JSON dengan field:
+- bidang: maksimal {batas['bidang']} objek {{nama, alasan}}; alasan 1 kalimat yang mengaitkan nilai mapel, minat, gaya belajar, atau toleransi matematika.
+- alternatif: maksimal {batas['alternatif']} jalur alternatif (lebih/kurang intensif Matematika), masing-masing 1 kalimat.
+- rencana_90_hari: maksimal {batas['rencana_90_hari']} langkah konkret (materi, proyek mini, lomba/ekskul), masing-masing 1 kalimat.
+Hindari menyebut universitas spesifik.
+"""
+
+
+def urai_rekomendasi(teks: str) -> dict:
+    """Parse & validasi JSON rekomendasi; ValueError jika tidak sesuai skema."""
+    data = json.loads(teks)
+    if not isinstance(data, dict):
+        raise ValueError("Rekomendasi terstruktur harus berupa objek JSON.")
+    bidang = data.get("bidang")
+    if not isinstance(bidang, list) or not all(isinstance(b, dict) and b.get("nama") for b in bidang):
+        raise ValueError("Field 'bidang' tidak valid.")
+    hasil = {
+        "bidang": [{"nama": str(b["nama"]), "alasan": str(b.get("alasan", ""))} for b in bidang],
+        "alternatif": [str(a) for a in data.get("alternatif") or []],
+        "rencana_90_hari": [str(r) for r in data.get("rencana_90_hari") or []],
+    }
+    if data.get("catatan"):
+        hasil["catatan"] = str(data["catatan"])
+    return hasil
+
+
+def render_rekomendasi(data: dict) -> str:
+    """Markdown rekomendasi dari data terstruktur (templat tetap milik aplikasi)."""
+    baris = ["### 🎯 Rekomendasi Bidang"]
+    baris += [f"{i}. **{b['nama']}** — {b['alasan']}" for i, b in enumerate(data["bidang"], 1)]
+    if data["alternatif"]:
+        baris += ["", "### 🔁 Alternatif"] + [f"- {a}" for a in data["alternatif"]]
+    if data["rencana_90_hari"]:
+        baris += ["", "### 🗓️ Rencana Aksi 90 Hari"] + [f"- {r}" for r in data["rencana_90_hari"]]
+    if data.get("catatan"):
+        baris += ["", "---", f"**Catatan:** {data['catatan']}"]
+    return "\n".join(baris)
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Hedging permintaan Gemini untuk memangkas latensi ekor.
+
+Sesekali satu panggilan `generate_content` butuh beberapa kali median sebelum token
+pertama muncul. Dengan hedging, jika token pertama belum tiba setelah tunda tertentu
+(persentil latensi token pertama yang baru teramati), dikirim satu permintaan cadangan,
+opsional ke model yang lebih ringan. Yang lebih dulu menghasilkan token dipakai dan yang
+kalah dibatalkan begitu pemenang dipilih: alirannya langsung diminta ditutup, meskipun
+masih menunggu token pertama. Pembatalan ini best-effort: aliran yang sedang terblokir di
+panggilan jaringan (mis. generator yang sedang berjalan di thread lain) tidak bisa
+diinterupsi dari luar, sehingga baru berhenti dan ditutup saat panggilan itu kembali;
+potongannya dibuang dan tidak pernah diteruskan ke pemanggil.
+
+Jumlah cadangan dibatasi per jendela permintaan terakhir agar kuota tidak habis; kuota
+diperiksa dan dipesan dalam satu kunci sehingga permintaan bersamaan tidak bisa
+melewatinya. Latensi token pertama permintaan utama tetap dicatat walau kalah, sehingga
+p50/p99 "tanpa hedge" bisa dibandingkan dengan latensi yang benar-benar dialami pengguna.
+
+Latensi dicatat per jenis panggilan: "aliran" (streaming, token pertama) dan "utuh"
+(non-streaming, token pertama = seluruh jawaban). Satu jendela untuk keduanya membuat
+tunda chat streaming terlalu panjang dan rekomendasi non-streaming terlalu sering di-hedge.
+
+Diatur lewat environment variable:
+    PENASIHAT_HEDGE                 1 = aktif (default 0)
+    PENASIHAT_HEDGE_PERSENTIL       persentil tunda sebelum cadangan dikirim (default 95)
+    PENASIHAT_HEDGE_TUNDA_MIN_MS    batas bawah tunda (default 500)
+    PENASIHAT_HEDGE_TUNDA_AWAL_MS   tunda sebelum sampel cukup (default 4000)
+    PENASIHAT_HEDGE_RASIO_MAKS      maksimal fraksi permintaan yang di-hedge (default 0.1)
+    PENASIHAT_HEDGE_MODEL           model cadangan yang lebih ringan (opsional)
+
+Simulasi dengan backend palsu berekor berat:
+    python -m penasihat.hedge_permintaan --permintaan 500
+"""
+
+import argparse
+import contextvars
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+HEDGE_AKTIF = os.environ.get("PENASIHAT_HEDGE", "0") == "1"
+PERSENTIL_HEDGE = float(os.environ.get("PENASIHAT_HEDGE_PERSENTIL", "95"))
+TUNDA_MIN_HEDGE = float(os.environ.get("PENASIHAT_HEDGE_TUNDA_MIN_MS", "500")) / 1000
+TUNDA_AWAL_HEDGE = float(os.environ.get("PENASIHAT_HEDGE_TUNDA_AWAL_MS", "4000")) / 1000
+RASIO_MAKS_HEDGE = float(os.environ.get("PENASIHAT_HEDGE_RASIO_MAKS", "0.1"))
+MODEL_HEDGE = os.environ.get("PENASIHAT_HEDGE_MODEL") or None
+# Sampel latensi yang disimpan, minimal sampel sebelum tunda persentil dipakai,
+# dan jendela permintaan untuk batas rasio hedge
+JENDELA_SAMPEL = 500
+MIN_SAMPEL = 20
+JENDELA_RASIO = 100
+
+_SELESAI = object()
+
+
+class _Percobaan:
+    """Satu permintaan (utama/cadangan) yang dibaca di thread sendiri ke antrean bersama."""
+
+    def __init__(self, nama, fungsi, antrean, saat_token_pertama=None):
+        self.nama = nama
+        self.batal = threading.Event()
+        # Diset saat pemenang dipilih; sebelum itu aliran tidak dibaca melewati potongan pertama
+        self.diputuskan = threading.Event()
+        self.gagal = False
+        self.mulai = time.perf_counter()
+        self._saat_token_pertama = saat_token_pertama
+        self._aliran = None
+        # Konteks pemanggil ikut dibawa (mis. tenggat permintaan, lihat penasihat.tenggat)
+        konteks = contextvars.copy_context()
+        threading.Thread(
+            target=konteks.run, args=(self._jalankan, fungsi, antrean), name=f"penasihat-hedge-{nama}", daemon=True
+        ).start()
+
+    def batalkan(self):
+        """Hentikan percobaan ini; aliran yang sudah terbuka langsung diminta ditutup (best-effort)."""
+        self.batal.set()
+        self.diputuskan.set()
+        tutup = getattr(self._aliran, "close", None)
+        if tutup is not None:
+            try:
+                tutup()
+            except (ValueError, RuntimeError):
+                pass  # generator sedang berjalan di thread percobaan → ditutup di sana saat kembali
+
+    def _jalankan(self, fungsi, antrean):
+        aliran = None
+        pertama = True
+        try:
+            if self.batal.is_set():
+                return
+            aliran = self._aliran = iter(fungsi())
+            for bagian in aliran:
+                if pertama and self._saat_token_pertama is not None:
+                    self._saat_token_pertama(time.perf_counter() - self.mulai)
+                if self.batal.is_set():
+                    return
+                antrean.put((self, bagian))
+                if pertama:
+                    pertama = False
+                    # Yang kalah tidak melanjutkan aliran (dan tidak mencatat statistik di ujungnya)
+                    self.diputuskan.wait()
+                    if self.batal.is_set():
+                        return
+            antrean.put((self, _SELESAI))
+        except Exception as e:
+            self.gagal = True
+            antrean.put((self, e))
+        finally:
+            tutup = getattr(aliran, "close", None)
+            if tutup is not None:
+                tutup()
+
+
+class PengirimHedge:
+    """
+    Jalankan permintaan dengan cadangan bertunda. Aman dipakai bersama oleh banyak sesi;
+    tunda dan batas rasio dihitung dari semua permintaan yang lewat objek ini.
+    """
+
+    def __init__(self, persentil: float = PERSENTIL_HEDGE, tunda_min: float = TUNDA_MIN_HEDGE,
+                 tunda_awal: float = TUNDA_AWAL_HEDGE, rasio_maks: float = RASIO_MAKS_HEDGE):
+        self.persentil = persentil
+        self.tunda_min = tunda_min
+        self.tunda_awal = tunda_awal
+        self.rasio_maks = rasio_maks
+        self._lock = threading.Lock()
+        # Per jenis panggilan: token pertama permintaan utama / yang diterima pemanggil
+        self._latensi_utama = {}
+        self._latensi_dialami = {}
+        self._hedge_terakhir = deque(maxlen=JENDELA_RASIO)
+        self._statistik = {"permintaan": 0, "hedge": 0, "hedge_menang": 0, "hedge_ditolak": 0}
+
+    def tunda(self, jenis: str = "aliran") -> float:
+        """Tunda sebelum cadangan dikirim: persentil latensi token pertama permintaan utama."""
+        with self._lock:
+            sampel = list(self._latensi_utama.get(jenis, ()))
+        if len(sampel) < MIN_SAMPEL:
+            return self.tunda_awal
+        return max(self.tunda_min, float(np.percentile(sampel, self.persentil)))
+
+    def _catat_utama(self, jenis: str, latensi: float):
+        with self._lock:
+            self._latensi_utama.setdefault(jenis, deque(maxlen=JENDELA_SAMPEL)).append(latensi)
+
+    def _pesan_hedge(self) -> bool:
+        """Periksa kuota dan langsung pesan satu hedge di jendela rasio (satu kunci)."""
+        with self._lock:
+            if sum(self._hedge_terakhir) + 1 <= self.rasio_maks * JENDELA_RASIO:
+                self._hedge_terakhir.append(True)
+                self._statistik["hedge"] += 1
+                return True
+            self._statistik["hedge_ditolak"] += 1
+            return False
+
+    def _catat_permintaan(self, jenis: str, latensi: float, hedge: bool, cadangan_menang: bool):
+        with self._lock:
+            self._latensi_dialami.setdefault(jenis, deque(maxlen=JENDELA_SAMPEL)).append(latensi)
+            if not hedge:
+                self._hedge_terakhir.append(False)  # hedge sudah masuk jendela saat dipesan
+            self._statistik["permintaan"] += 1
+            self._statistik["hedge_menang"] += cadangan_menang
+
+    def alirkan(self, utama, cadangan=None, jenis: str = "aliran"):
+        """
+        utama, cadangan: fungsi tanpa argumen yang mengembalikan iterable potongan jawaban.
+        jenis: "aliran" (streaming) atau "utuh" (non-streaming); tunda dihitung per jenis.
+        Menghasilkan potongan dari permintaan yang lebih dulu memberi token pertama.
+        """
+        antrean = queue.Queue()
+        mulai = time.perf_counter()
+        percobaan = [_Percobaan("utama", utama, antrean, lambda latensi: self._catat_utama(jenis, latensi))]
+        batas_hedge = mulai + self.tunda(jenis) if cadangan is not None else None
+        galat = None
+        try:
+            while True:
+                sisa = None
+                if batas_hedge is not None and len(percobaan) == 1:
+                    sisa = max(0.0, batas_hedge - time.perf_counter())
+                try:
+                    pemenang, isi = antrean.get(timeout=sisa)
+                except queue.Empty:
+                    if self._pesan_hedge():
+                        percobaan.append(_Percobaan("cadangan", cadangan, antrean))
+                    else:
+                        batas_hedge = None  # kuota hedge habis → tunggu permintaan utama saja
+                    continue
+                if isinstance(isi, Exception):
+                    galat = galat or isi
+                    if all(p.gagal for p in percobaan):
+                        raise galat
+                    continue
+                break
+
+            self._catat_permintaan(jenis, time.perf_counter() - mulai, len(percobaan) > 1, pemenang.nama == "cadangan")
+            for p in percobaan:
+                if p is not pemenang:
+                    p.batalkan()
+                p.diputuskan.set()
+            while isi is not _SELESAI:
+                if isinstance(isi, Exception):
+                    raise isi
+                yield isi
+                asal, isi = antrean.get()
+                while asal is not pemenang:
+                    asal, isi = antrean.get()
+        finally:
+            # Pemanggil berhenti membaca (mis. sesi berakhir) → batalkan semua percobaan
+            for p in percobaan:
+                p.batalkan()
+
+    def _statistik_jenis(self, jenis: str) -> dict:
+        with self._lock:
+            dialami = list(self._latensi_dialami.get(jenis, ()))
+            utama = list(self._latensi_utama.get(jenis, ()))
+        s = {"tunda": self.tunda(jenis)}
+        for label, data in (("dengan_hedge", dialami), ("tanpa_hedge", utama)):
+            s[f"p50_{label}"] = float(np.percentile(data, 50)) if data else None
+            s[f"p99_{label}"] = float(np.percentile(data, 99)) if data else None
+        return s
+
+    def statistik(self) -> dict:
+        """Penghitung gabungan; tunda & p50/p99 tingkat atas dari jenis "aliran", per jenis di `jenis`."""
+        with self._lock:
+            s = dict(self._statistik)
+            daftar_jenis = sorted(set(self._latensi_utama) | set(self._latensi_dialami) | {"aliran"})
+        s["rasio_hedge"] = s["hedge"] / s["permintaan"] if s["permintaan"] else 0.0
+        s["jenis"] = {jenis: self._statistik_jenis(jenis) for jenis in daftar_jenis}
+        s.update(s["jenis"]["aliran"])
+        return s
+
+
+def buat_hedge(aktif: bool = HEDGE_AKTIF):
+    """PengirimHedge sesuai `PENASIHAT_HEDGE`, atau None jika tidak aktif."""
+    return PengirimHedge() if aktif else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulasi hedging dengan backend palsu berekor berat.")
+    parser.add_argument("--permintaan", type=int, default=500)
+    parser.add_argument("--paralel", type=int, default=8)
+    parser.add_argument("--median-ms", type=float, default=20, help="Median latensi token pertama backend palsu")
+    parser.add_argument("--peluang-lambat", type=float, default=0.03, help="Fraksi permintaan yang jauh lebih lambat")
+    parser.add_argument("--kali-lambat", type=float, default=8, help="Pengali latensi permintaan lambat")
+    args = parser.parse_args(argv)
+
+    acak = np.random.default_rng(0)
+    kunci_acak = threading.Lock()
+
+    def backend():
+        with kunci_acak:
+            latensi = args.median_ms / 1000 * float(acak.lognormal(0, 0.3))
+            if acak.random() < args.peluang_lambat:
+                latensi *= args.kali_lambat
+        time.sleep(latensi)
+        yield "jawaban"
+
+    pengirim = PengirimHedge(tunda_min=args.median_ms / 1000, tunda_awal=args.median_ms / 1000 * 3)
+
+    def satu(_):
+        return "".join(pengirim.alirkan(backend, backend))
+
+    with ThreadPoolExecutor(args.paralel) as pool:
+        list(pool.map(satu, range(args.permintaan)))
+    time.sleep(args.median_ms / 1000 * args.kali_lambat * 3)  # tunggu permintaan utama yang kalah
+
+    s = pengirim.statistik()
+    print(f"{s['permintaan']} permintaan, {s['hedge']} di-hedge ({s['rasio_hedge']:.1%}), "
+          f"{s['hedge_menang']} dimenangkan cadangan, {s['hedge_ditolak']} ditolak batas rasio")
+    print(f"  tunda hedge   {s['tunda'] * 1000:.1f} ms")
+    for label in ("tanpa_hedge", "dengan_hedge"):
+        print(f"  {label:<13} p50 {s[f'p50_{label}'] * 1000:.1f} ms  p99 {s[f'p99_{label}'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+Indeks tetangga terdekat untuk profil siswa (anonim).
+
+Profil direpresentasikan sebagai vektor 12 skor mapel yang dinormalisasi ke 0–1,
+dikelompokkan per "ember" berdasarkan field kategorikal (minat, kenyamanan
+Matematika, gaya belajar) yang harus sama persis. Jika ada profil lama yang cukup
+dekat, rekomendasinya dipakai ulang (atau disesuaikan ringan) sehingga tidak perlu
+membuat rekomendasi baru lewat Gemini.
+
+Yang disimpan hanya vektor nilai, field kategorikal, top-5 rule-based, dan teks
+rekomendasi dengan nama siswa (nama lengkap dan setiap kata namanya) diganti penanda.
+Tidak ada data identitas lain. Rekomendasi bisa berupa markdown atau JSON terstruktur
+(`penasihat.format_jawaban`); `varian` (format + profil jawaban) ikut menjadi bagian
+kunci ember agar tidak tercampur.
+
+Ambang jarak (skala 0–1 per mapel; 0.1 = selisih 1 poin di satu mapel, 0.141 = dua
+mapel, 0.173 = tiga mapel, dst.) dipilih dari `python -m penasihat.indeks_profil
+--sintetis 20000`: setiap profil sintetis dicari di antara profil sebelumnya lalu
+dikualitaskan dengan kecocokan top-5 rule-based profil lama terhadap profil baru.
+
+    ambang  hit    irisan top-5  3 teratas sama
+    0.10    0.1%   0.97          0.88
+    0.15    0.7%   0.94          0.77
+    0.20    6.0%   0.93          0.60
+    0.25   32.5%   0.91          0.52
+
+Pada 0.25 hampir separuh jawaban yang dipakai ulang membahas urutan 3 teratas yang
+berbeda dari profil siswa itu sendiri, jadi ambang adaptasi default 0.15 (paling banyak
+dua mapel berselisih satu poin); hit rate yang lebih tinggi bisa dipilih lewat env.
+
+Profil disimpan paling lama `PENASIHAT_PROFIL_TTL_HARI` hari dan paling banyak
+`PENASIHAT_PROFIL_MAKS` entri (yang tertua dibuang lebih dulu).
+
+SciPy opsional dan tidak ada di requirements.txt: jika terpasang, tiap ember memakai
+KD-tree (`scipy.spatial.cKDTree`); tanpa SciPy dipakai pencarian brute-force NumPy
+dengan hasil yang sama. KD-tree tidak dibangun ulang setiap kali profil ditambah:
+profil baru dicari brute-force di "ekor" ember sampai ekornya melewati
+`EKOR_MIN`/`RASIO_EKOR`, baru pohonnya dibangun ulang sekaligus.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from penasihat.pemetaan import MAPEL_ALIAS
+
+# KD-tree dari SciPy bersifat opsional (tidak ada di requirements.txt); tanpa SciPy
+# dipakai pencarian brute-force NumPy
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+JALUR_DB_PROFIL = os.environ.get("PENASIHAT_DB_PROFIL", ".indeks_profil/profil.sqlite3")
+# Jarak Euclidean pada skala 0–1 per mapel (selisih 1 poin di satu mapel = 0.1)
+AMBANG_PAKAI = float(os.environ.get("PENASIHAT_AMBANG_PAKAI", "0.1"))
+AMBANG_ADAPTASI = float(os.environ.get("PENASIHAT_AMBANG_ADAPTASI", "0.15"))
+MAKS_PROFIL = int(os.environ.get("PENASIHAT_PROFIL_MAKS", "20000"))
+TTL_HARI_PROFIL = float(os.environ.get("PENASIHAT_PROFIL_TTL_HARI", "180"))
+# Jarak minimum antar-pemangkasan saat menambah profil (detik)
+JEDA_PANGKAS = 3600
+PENANDA_NAMA = "[NAMA]"
+# Kata nama yang lebih pendek dari ini tidak diganti (mis. "Al") agar kata biasa tidak rusak
+PANJANG_MIN_KATA_NAMA = 3
+DAFTAR_MAPEL = list(MAPEL_ALIAS.values())
+# Profil baru yang belum masuk indeks dicari brute-force; indeks dibangun ulang jika
+# ekornya melebihi max(EKOR_MIN, RASIO_EKOR × ukuran indeks)
+EKOR_MIN = 64
+RASIO_EKOR = 0.1
+
+
+def vektor_profil(nilai: dict) -> np.ndarray:
+    """Vektor skor mapel yang dinormalisasi ke rentang 0–1."""
+    return np.array([nilai.get(m, 0) for m in DAFTAR_MAPEL], dtype=float) / 10.0
+
+
+def kunci_kategori(minat, toleransi_mtk, gaya_belajar, varian: str = "") -> str:
+    """Kunci ember: field kategorikal (+ varian jawaban) yang harus cocok persis."""
+    kunci = [sorted(minat or []), toleransi_mtk, sorted(gaya_belajar or [])]
+    if varian:
+        kunci.append(varian)
+    return json.dumps(kunci, ensure_ascii=False)
+
+
+def anonimkan(teks: str, nama: str) -> str:
+    """Ganti nama lengkap dan setiap kata nama (≥ 3 huruf, utuh per kata) dengan penanda."""
+    if not nama or not nama.strip():
+        return teks
+    kata = {k for k in re.findall(r"\w+", nama) if len(k) >= PANJANG_MIN_KATA_NAMA}
+    # Terpanjang dulu: nama lengkap menjadi satu penanda, bukan satu per kata
+    pilihan = sorted({" ".join(nama.split())} | kata, key=len, reverse=True)
+    pola = r"\b(?:" + "|".join(re.escape(p).replace(r"\ ", r"\s+") for p in pilihan) + r")\b"
+    return re.sub(pola, PENANDA_NAMA, teks, flags=re.IGNORECASE)
+
+
+def personalisasi(teks: str, nama: str) -> str:
+    return teks.replace(PENANDA_NAMA, nama.strip() if nama and nama.strip() else "kamu")
+
+
+class _Ember:
+    """Kumpulan profil dengan field kategorikal yang sama."""
+
+    def __init__(self):
+        self.vektor = []
+        self.entri = []
+        self._matriks = None
+        self._pohon = None
+        self._terindeks = 0
+
+    def tambah(self, vektor, entri):
+        self.vektor.append(vektor)
+        self.entri.append(entri)
+
+    def _bangun(self):
+        self._matriks = np.vstack(self.vektor)
+        self._pohon = cKDTree(self._matriks) if cKDTree is not None else None
+        self._terindeks = len(self.vektor)
+
+    def terdekat(self):
+        """
+        Kembalikan fungsi kueri (vektor → (jarak, indeks)). Indeks dibangun ulang per
+        batch; profil yang ditambah sesudahnya (ekor) dicari brute-force.
+        """
+        ekor = len(self.vektor) - self._terindeks
+        if self._matriks is None or ekor > max(EKOR_MIN, RASIO_EKOR * self._terindeks):
+            self._bangun()
+            ekor = 0
+        pohon, matriks, awal_ekor = self._pohon, self._matriks, self._terindeks
+        matriks_ekor = np.vstack(self.vektor[awal_ekor:]) if ekor else None
+
+        def cari(v):
+            if pohon is not None:
+                jarak, i = pohon.query(v, k=1)
+                jarak, i = float(jarak), int(i)
+            else:
+                semua = np.linalg.norm(matriks - v, axis=1)
+                i = int(np.argmin(semua))
+                jarak = float(semua[i])
+            if matriks_ekor is not None:
+                semua = np.linalg.norm(matriks_ekor - v, axis=1)
+                j = int(np.argmin(semua))
+                if semua[j] < jarak:
+                    return float(semua[j]), awal_ekor + j
+            return jarak, i
+
+        return cari
+
+
+class IndeksProfil:
+    """
+    Penyimpanan profil anonim + indeks tetangga terdekat per ember kategorikal.
+
+    Aman dipakai bersama oleh banyak sesi (dilindungi lock), cocok dibungkus
+    `st.cache_resource`.
+    """
+
+    def __init__(self, jalur_db: str = JALUR_DB_PROFIL, ambang_pakai: float = AMBANG_PAKAI,
+                 ambang_adaptasi: float = AMBANG_ADAPTASI, maks: int = MAKS_PROFIL,
+                 ttl_hari: float = TTL_HARI_PROFIL):
+        self.ambang_pakai = ambang_pakai
+        self.ambang_adaptasi = max(ambang_adaptasi, ambang_pakai)
+        self.maks = maks
+        self.ttl_hari = ttl_hari
+        self._lock = threading.Lock()
+        self._ember = {}
+        self._statistik = {"pencarian": 0, "dipakai_ulang": 0, "disesuaikan": 0, "meleset": 0, "dibuang": 0}
+        self._dipangkas = 0.0
+
+        Path(jalur_db).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(jalur_db, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS profil ("
+            "id INTEGER PRIMARY KEY, kunci TEXT NOT NULL, vektor TEXT NOT NULL, "
+            "top5 TEXT NOT NULL, rekomendasi TEXT NOT NULL, dibuat TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self._pangkas()
+
+    def _pangkas(self):
+        """Buang profil kedaluwarsa + yang tertua di atas batas jumlah, lalu muat ulang ember."""
+        dibuang = 0
+        if self.ttl_hari:
+            batas = (datetime.now() - timedelta(days=self.ttl_hari)).isoformat()
+            dibuang += self._db.execute("DELETE FROM profil WHERE dibuat < ?", (batas,)).rowcount
+        if self.maks:
+            dibuang += self._db.execute(
+                "DELETE FROM profil WHERE id NOT IN (SELECT id FROM profil ORDER BY id DESC LIMIT ?)", (self.maks,)
+            ).rowcount
+        self._db.commit()
+        self._statistik["dibuang"] += dibuang
+        self._dipangkas = time.monotonic()
+        self._ember = {}
+        for kunci, vektor, top5, rekomendasi in self._db.execute(
+            "SELECT kunci, vektor, top5, rekomendasi FROM profil"
+        ):
+            self._ember.setdefault(kunci, _Ember()).tambah(
+                np.array(json.loads(vektor)), {"top5": json.loads(top5), "rekomendasi": rekomendasi}
+            )
+
+    def __len__(self):
+        return sum(len(e.entri) for e in self._ember.values())
+
+    def tambah(self, nilai, minat, toleransi_mtk, gaya_belajar, top5, rekomendasi, nama="", varian=""):
+        """Simpan rekomendasi baru (nama siswa dianonimkan)."""
+        kunci = kunci_kategori(minat, toleransi_mtk, gaya_belajar, varian)
+        vektor = vektor_profil(nilai)
+        teks = anonimkan(rekomendasi, nama)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO profil (kunci, vektor, top5, rekomendasi, dibuat) VALUES (?, ?, ?, ?, ?)",
+                (kunci, json.dumps(vektor.tolist()), json.dumps(top5, ensure_ascii=False), teks,
+                 datetime.now().isoformat()),
+            )
+            self._db.commit()
+            self._ember.setdefault(kunci, _Ember()).tambah(vektor, {"top5": list(top5), "rekomendasi": teks})
+            if (self.maks and len(self) > self.maks) or time.monotonic() - self._dipangkas > JEDA_PANGKAS:
+                self._pangkas()
+
+    def cari(self, nilai, minat, toleransi_mtk, gaya_belajar, top5, nama="", varian=""):
+        """
+        Cari rekomendasi lama yang bisa dipakai ulang.
+
+        Mengembalikan dict {"rekomendasi", "jarak", "jenis"} dengan jenis "dipakai_ulang"
+        atau "disesuaikan", atau None jika tidak ada profil yang cukup dekat.
+        """
+        kunci = kunci_kategori(minat, toleransi_mtk, gaya_belajar, varian)
+        with self._lock:
+            self._statistik["pencarian"] += 1
+            ember = self._ember.get(kunci)
+            if ember is None or not ember.entri:
+                self._statistik["meleset"] += 1
+                return None
+            jarak, i = ember.terdekat()(vektor_profil(nilai))
+            entri = ember.entri[int(i)]
+            if jarak <= self.ambang_pakai and entri["top5"] == list(top5):
+                jenis = "dipakai_ulang"
+            elif jarak <= self.ambang_adaptasi:
+                jenis = "disesuaikan"
+            else:
+                self._statistik["meleset"] += 1
+                return None
+            self._statistik[jenis] += 1
+
+        teks = personalisasi(entri["rekomendasi"], nama)
+        if jenis == "disesuaikan":
+            teks = self._sesuaikan(teks, entri["top5"], top5, varian.startswith("json"))
+        return {"rekomendasi": teks, "jarak": float(jarak), "jenis": jenis}
+
+    @staticmethod
+    def _sesuaikan(teks, top5_lama, top5_baru, terstruktur=False):
+        """Penyesuaian ringan tanpa LLM: tandai perbedaan hasil pemetaan rule-based."""
+        baru = [b for b in top5_baru if b not in top5_lama]
+        if not baru:
+            return teks
+        catatan = (
+            "pemetaan berbasis aturan untuk profilmu juga menempatkan bidang berikut di 5 besar: "
+            + ", ".join(baru) + ". Tanyakan lewat chat jika ingin pembahasan lebih rinci."
+        )
+        if terstruktur:
+            try:
+                data = json.loads(teks)
+            except json.JSONDecodeError:
+                data = None  # entri lama/rusak bukan JSON → catatan teks biasa
+            if isinstance(data, dict):
+                data["catatan"] = catatan
+                return json.dumps(data, ensure_ascii=False)
+        return teks + "\n\n---\n**Catatan penyesuaian:** " + catatan
+
+    def statistik(self) -> dict:
+        with self._lock:
+            s = dict(self._statistik)
+        hit = s["dipakai_ulang"] + s["disesuaikan"]
+        s["tingkat_hit"] = hit / s["pencarian"] if s["pencarian"] else 0.0
+        s["jumlah_profil"] = len(self)
+        return s
+
+
+# --------------------------------------------------------------------------------------
+# Uji ambang: hit rate vs kualitas pada profil sintetis
+# --------------------------------------------------------------------------------------
+def uji_ambang(n: int, ambang_daftar=(0.1, 0.15, 0.2, 0.25), seed: int = 0) -> list:
+    """
+    Aliran n profil sintetis (kemampuan dasar + variasi per mapel, nilai bulat 0–10, satu
+    minat, toleransi acak). Setiap profil dicari di antara profil sebelumnya dalam ember
+    yang sama, lalu ditambahkan. Untuk setiap ambang: tingkat hit, rata-rata irisan top-5
+    rule-based profil lama vs profil baru, dan fraksi hit yang 3 teratasnya sama persis.
+    """
+    from penasihat.pemetaan import PREFERENSI_BONUS, skor_bidang_dari_map
+
+    acak = np.random.default_rng(seed)
+    daftar_minat = list(PREFERENSI_BONUS)
+    ember = {}
+    hasil = {a: {"hit": 0, "irisan": [], "top3_sama": []} for a in ambang_daftar}
+    for _ in range(n):
+        x = np.clip(np.rint(acak.normal(7.5, 1.0) + acak.normal(0, 1.0, len(DAFTAR_MAPEL))), 0, 10)
+        nilai = dict(zip(DAFTAR_MAPEL, x))
+        minat = [daftar_minat[acak.integers(len(daftar_minat))]]
+        toleransi = ["Rendah", "Sedang", "Tinggi"][acak.integers(3)]
+        skor = skor_bidang_dari_map(nilai, minat, toleransi)
+        top5 = sorted(skor, key=skor.get, reverse=True)[:5]
+        vektor, lama = vektor_profil(nilai), ember.setdefault((minat[0], toleransi), ([], []))
+        if lama[0]:
+            jarak = np.linalg.norm(np.vstack(lama[0]) - vektor, axis=1)
+            i = int(jarak.argmin())
+            for a in ambang_daftar:
+                if jarak[i] <= a:
+                    hasil[a]["hit"] += 1
+                    hasil[a]["irisan"].append(len(set(lama[1][i]) & set(top5)) / 5)
+                    hasil[a]["top3_sama"].append(lama[1][i][:3] == top5[:3])
+        lama[0].append(vektor)
+        lama[1].append(top5)
+    return [
+        {
+            "ambang": a,
+            "hit": h["hit"] / n,
+            "irisan_top5": float(np.mean(h["irisan"])) if h["irisan"] else None,
+            "top3_sama": float(np.mean(h["top3_sama"])) if h["top3_sama"] else None,
+        }
+        for a, h in hasil.items()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hit rate vs kualitas ambang indeks profil.")
+    parser.add_argument("--sintetis", type=int, default=20000, help="Jumlah profil sintetis")
+    parser.add_argument("--ambang", default="0.1,0.15,0.2,0.25", help="Daftar ambang dipisah koma")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'ambang':>6}  {'hit':>6}  {'irisan top-5':>12}  {'3 teratas sama':>14}")
+    for b in uji_ambang(args.sintetis, [float(a) for a in args.ambang.split(",")], args.seed):
+        irisan = f"{b['irisan_top5']:.2f}" if b["irisan_top5"] is not None else "-"
+        top3 = f"{b['top3_sama']:.2f}" if b["top3_sama"] is not None else "-"
+        print(f"{b['ambang']:>6.2f}  {b['hit']:>6.1%}  {irisan:>12}  {top3:>14}")
+
+
+if __name__ == "__main__":
+    main()
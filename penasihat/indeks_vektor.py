@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Indeks vektor datar di memori proses untuk korpus kecil.
+
+Lampiran satu siswa biasanya hanya puluhan potongan, tetapi Chroma tetap membuat klien,
+koleksi, dan berkas SQLite untuk setiap lampiran. Untuk ukuran sebesar itu pencarian
+brute-force sudah lebih cepat: semua vektor disimpan dalam satu array NumPy kontigu
+(float32, atau float16 untuk menghemat memori), dinormalisasi sehingga skor adalah hasil
+kali titik (= kemiripan kosinus), lalu k teratas dipilih dengan `argpartition`. Vektor
+float32 dikalikan langsung; float16 (atau memory map-nya) diubah ke float32 per blok
+`BARIS_PER_BLOK` baris agar satu kueri tidak menyalin seluruh matriks. Dengan filter,
+hanya baris yang lolos yang diberi skor.
+
+Filter metadata memakai sintaks yang sama dengan Chroma (kesamaan, `$eq`, `$ne`, `$in`,
+`$nin`, `$and`, `$or`) sehingga `RetrieverRapor` bisa memakai indeks ini tanpa perubahan;
+operator lain ditolak dengan ValueError.
+
+Persistensi opsional: `simpan` menulis `vektor.npy` + `dokumen.json`; `muat` membuka
+vektor sebagai memory map sehingga indeks yang dibuka worker lain tidak perlu dibaca
+seluruhnya ke memori.
+
+Diatur lewat environment variable:
+    PENASIHAT_VEKTOR_DTYPE   float32 (default) atau float16
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+DTYPE_VEKTOR = os.environ.get("PENASIHAT_VEKTOR_DTYPE", "float32")
+BERKAS_VEKTOR = "vektor.npy"
+BERKAS_DOKUMEN = "dokumen.json"
+# Baris float16 yang diubah ke float32 sekaligus saat memberi skor
+BARIS_PER_BLOK = 4096
+
+
+def _normalisasi(vektor: np.ndarray) -> np.ndarray:
+    norma = np.linalg.norm(vektor, axis=-1, keepdims=True)
+    return vektor / np.where(norma == 0, 1, norma)
+
+
+OPERATOR_NILAI = {"$eq", "$ne", "$in", "$nin"}
+
+
+def _cocok_nilai(nilai, syarat) -> bool:
+    if not isinstance(syarat, dict):
+        return nilai == syarat
+    # Operator lain ($gt, $lt, ...) ditolak daripada diam-diam dianggap cocok
+    tidak_dikenal = set(syarat) - OPERATOR_NILAI
+    if tidak_dikenal:
+        raise ValueError(f"Operator filter tidak didukung: {', '.join(sorted(tidak_dikenal))}")
+    for operator, pembanding in syarat.items():
+        if operator == "$eq" and nilai != pembanding:
+            return False
+        if operator == "$ne" and nilai == pembanding:
+            return False
+        if operator == "$in" and nilai not in pembanding:
+            return False
+        if operator == "$nin" and nilai in pembanding:
+            return False
+    return True
+
+
+def cocok_filter(metadata: dict, saring: dict) -> bool:
+    """Apakah metadata memenuhi filter bersintaks Chroma (ValueError untuk operator lain)."""
+    for kunci, syarat in saring.items():
+        if kunci == "$and":
+            if not all(cocok_filter(metadata, s) for s in syarat):
+                return False
+        elif kunci == "$or":
+            if not any(cocok_filter(metadata, s) for s in syarat):
+                return False
+        elif kunci.startswith("$"):
+            raise ValueError(f"Operator filter tidak didukung: {kunci}")
+        elif not _cocok_nilai(metadata.get(kunci), syarat):
+            return False
+    return True
+
+
+class IndeksVektorDatar(VectorStore):
+    """Indeks brute-force: satu array vektor ternormalisasi + daftar dokumen paralel."""
+
+    def __init__(self, embedding, dtype: str = DTYPE_VEKTOR, vektor: np.ndarray = None, dokumen: list = None):
+        self.embedding = embedding
+        self.dtype = np.dtype(dtype)
+        self._vektor = vektor
+        self._dokumen = list(dokumen or [])
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def __len__(self):
+        return len(self._dokumen)
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        baru = _normalisasi(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32))
+        baru = baru.astype(self.dtype)
+        self._vektor = baru if self._vektor is None else np.concatenate([self._vektor, baru])
+        self._dokumen += [Document(page_content=t, metadata=m or {}, id=i) for t, m, i in zip(texts, metadatas, ids)]
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, dtype: str = DTYPE_VEKTOR, **kwargs):
+        indeks = cls(embedding, dtype=dtype)
+        indeks.add_texts(texts, metadatas=metadatas, ids=ids)
+        return indeks
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict = None, **kwargs):
+        if not self._dokumen:
+            return []
+        kueri = _normalisasi(np.asarray(self.embedding.embed_query(query), dtype=np.float32))
+        baris = None
+        if filter:
+            lolos = np.fromiter((cocok_filter(d.metadata, filter) for d in self._dokumen), bool, len(self._dokumen))
+            baris = np.flatnonzero(lolos)
+        skor = self._skor(kueri, baris)
+        k = min(k, len(skor))
+        if k <= 0:
+            return []
+        teratas = np.argpartition(-skor, k - 1)[:k]
+        teratas = teratas[np.argsort(-skor[teratas])]
+        indeks = teratas if baris is None else baris[teratas]
+        return [(self._dokumen[i], float(s)) for i, s in zip(indeks, skor[teratas])]
+
+    def _skor(self, kueri: np.ndarray, baris: np.ndarray = None) -> np.ndarray:
+        """Skor kosinus untuk semua baris (atau hanya `baris`) tanpa menyalin seluruh matriks."""
+        # Indeks baris → hanya baris itu yang disalin (juga dari memory map)
+        vektor = self._vektor if baris is None else self._vektor[baris]
+        if vektor.dtype == np.float32:
+            return vektor @ kueri
+        skor = np.empty(len(vektor), dtype=np.float32)
+        for awal in range(0, len(vektor), BARIS_PER_BLOK):
+            skor[awal:awal + BARIS_PER_BLOK] = vektor[awal:awal + BARIS_PER_BLOK].astype(np.float32) @ kueri
+        return skor
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs):
+        return [d for d, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        # Skor sudah kemiripan kosinus [-1, 1] → [0, 1] (dipotong: pembulatan float16)
+        return lambda skor: min(1.0, max(0.0, (skor + 1) / 2))
+
+    # ---- persistensi ------------------------------------------------------------------
+    def simpan(self, direktori) -> None:
+        direktori = Path(direktori)
+        direktori.mkdir(parents=True, exist_ok=True)
+        np.save(direktori / BERKAS_VEKTOR, np.ascontiguousarray(self._vektor))
+        (direktori / BERKAS_DOKUMEN).write_text(
+            json.dumps([{"id": d.id, "teks": d.page_content, "metadata": d.metadata} for d in self._dokumen],
+                       ensure_ascii=False),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def muat(cls, direktori, embedding, mmap: bool = True):
+        """Buka indeks tersimpan; dengan mmap vektor dibaca dari disk sesuai kebutuhan."""
+        direktori = Path(direktori)
+        vektor = np.load(direktori / BERKAS_VEKTOR, mmap_mode="r" if mmap else None)
+        dokumen = [
+            Document(page_content=d["teks"], metadata=d["metadata"], id=d["id"])
+            for d in json.loads((direktori / BERKAS_DOKUMEN).read_text(encoding="utf-8"))
+        ]
+        return cls(embedding, dtype=vektor.dtype, vektor=vektor, dokumen=dokumen)
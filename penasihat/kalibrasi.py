@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Kalibrasi offline bobot pemetaan berbasis aturan terhadap data lulusan.
+
+Bobot mapel di `PETA_BOBOT`, bonus minat (1.08), dan faktor kenyamanan Matematika
+(0.87 / 1.06) awalnya dipilih manual. Alat ini mencocokkannya dengan data historis
+(jurusan yang benar-benar dimasuki tiap lulusan) lalu menulis berkas aturan JSON
+yang dimuat pemetaan lewat `PENASIHAT_ATURAN`.
+
+Bentuk skor tidak berubah: skor = (nilai · bobot) × bonus^jumlah_minat × faktor_toleransi.
+Semua parameter dicocokkan sekaligus dengan softmax cross-entropy atas skor tersebut
+(ditambah regularisasi L2 ke bobot awal agar tetap mudah dibaca), memakai gradien
+analitik + Adam mini-batch di NumPy, sehingga ratusan ribu baris selesai dalam hitungan detik.
+
+Data (CSV atau Parquet), satu baris per lulusan:
+    Matematika, Fisika, ..., B. Inggris   skor 0-10 (nama kolom sama dengan form)
+    minat                                 bidang minat dipisah ";" (boleh kosong)
+    toleransi                             Rendah | Sedang | Tinggi
+    jurusan                               bidang yang dimasuki (nama sama dengan PETA_BOBOT)
+
+Contoh:
+    python -m penasihat.kalibrasi lulusan.csv --keluar aturan.json
+    python -m penasihat.kalibrasi --sintetis 300000 --keluar aturan.json   # uji cepat
+    PENASIHAT_ATURAN=aturan.json streamlit run ai_penasihat_akademik.py
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from penasihat.bagaimana_jika import DAFTAR_BIDANG, DAFTAR_MAPEL, _BOBOT, _MASKER_MTK
+from penasihat.pemetaan import BONUS_MINAT, FAKTOR_TOLERANSI_MTK, PREFERENSI_BONUS
+
+DAFTAR_TOLERANSI = list(FAKTOR_TOLERANSI_MTK)
+DAFTAR_MINAT = list(PREFERENSI_BONUS)
+K_LAPORAN = (1, 3, 5)
+# Bobot terbesar di aturan keluaran (skala yang sama dengan tabel manual)
+SKALA_BOBOT = 3.0
+# Baris per langkah optimasi
+UKURAN_BATCH = 32768
+
+
+# --------------------------------------------------------------------------------------
+# Data
+# --------------------------------------------------------------------------------------
+def _matriks_minat():
+    """Matriks (minat × bidang): berapa kali bidang mendapat bonus dari tiap minat."""
+    indeks_bidang = {b: i for i, b in enumerate(DAFTAR_BIDANG)}
+    p = np.zeros((len(DAFTAR_MINAT), len(DAFTAR_BIDANG)), dtype=np.float32)
+    for i, minat in enumerate(DAFTAR_MINAT):
+        for bidang in PREFERENSI_BONUS[minat]:
+            if bidang in indeks_bidang:
+                p[i, indeks_bidang[bidang]] += 1
+    return p
+
+
+def siapkan_data(df: pd.DataFrame) -> dict:
+    """
+    Ubah tabel lulusan menjadi array: X (nilai), C (jumlah bonus minat per bidang),
+    T (indeks toleransi), y (indeks jurusan). Baris dengan jurusan/toleransi yang tidak
+    dikenal dibuang.
+    """
+    kurang = [k for k in DAFTAR_MAPEL + ["toleransi", "jurusan"] if k not in df.columns]
+    if kurang:
+        raise ValueError(f"Kolom wajib tidak ada: {', '.join(kurang)}")
+
+    y = df["jurusan"].map({b: i for i, b in enumerate(DAFTAR_BIDANG)})
+    t = df["toleransi"].map({n: i for i, n in enumerate(DAFTAR_TOLERANSI)})
+    valid = (y.notna() & t.notna()).to_numpy()
+    df = df.loc[valid]
+
+    x = df[DAFTAR_MAPEL].to_numpy(dtype=np.float32).clip(0, 10)
+    minat = df["minat"] if "minat" in df.columns else pd.Series("", index=df.index)
+    dummy = minat.fillna("").astype(str).str.get_dummies(sep=";")
+    dummy = dummy.reindex(columns=DAFTAR_MINAT, fill_value=0).to_numpy(dtype=np.float32)
+    return {
+        "X": x,
+        "C": dummy @ _matriks_minat(),
+        "T": t[valid].to_numpy(dtype=np.int64),
+        "y": y[valid].to_numpy(dtype=np.int64),
+        "dibuang": int((~valid).sum()),
+    }
+
+
+def muat_data(jalur: str) -> pd.DataFrame:
+    if jalur.endswith(".parquet"):
+        return pd.read_parquet(jalur)
+    return pd.read_csv(jalur)
+
+
+def data_sintetis(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Data lulusan buatan untuk uji cepat: jurusan diambil dari softmax aturan awal yang
+    bobotnya diacak, sehingga kalibrasi punya sesuatu untuk dipulihkan.
+    """
+    acak = np.random.default_rng(seed)
+    x = acak.integers(3, 11, size=(n, len(DAFTAR_MAPEL))).astype(np.float32)
+    dummy = acak.random((n, len(DAFTAR_MINAT))) < 0.2
+    t = acak.integers(0, len(DAFTAR_TOLERANSI), size=n)
+    bobot = np.clip(_BOBOT + acak.normal(0, 0.8, size=_BOBOT.shape) * (acak.random(_BOBOT.shape) < 0.3), 0, None)
+    param = {"W": bobot, "log_bonus": np.log(1.15), "log_faktor": np.log([0.75, 1.0, 1.1]), "log_tau": np.log(0.15)}
+    data = {"X": x, "C": dummy.astype(np.float32) @ _matriks_minat(), "T": t}
+    logit = _maju(param, data)[0]
+    prob = np.exp(logit - logit.max(axis=1, keepdims=True))
+    prob /= prob.sum(axis=1, keepdims=True)
+    y = (prob.cumsum(axis=1) > acak.random((n, 1))).argmax(axis=1)
+
+    df = pd.DataFrame(x, columns=DAFTAR_MAPEL)
+    df["minat"] = [";".join(m for m, pilih in zip(DAFTAR_MINAT, baris) if pilih) for baris in dummy]
+    df["toleransi"] = np.array(DAFTAR_TOLERANSI)[t]
+    df["jurusan"] = np.array(DAFTAR_BIDANG)[y]
+    return df
+
+
+# --------------------------------------------------------------------------------------
+# Model & optimasi
+# --------------------------------------------------------------------------------------
+def parameter_awal() -> dict:
+    """Parameter dari aturan yang sedang dipakai (titik awal sekaligus pembanding)."""
+    return {
+        "W": _BOBOT.astype(np.float64).copy(),
+        "log_bonus": np.log(BONUS_MINAT),
+        "log_faktor": np.log([FAKTOR_TOLERANSI_MTK[t] for t in DAFTAR_TOLERANSI]),
+        "log_tau": 0.0,
+    }
+
+
+def _maju(param, data):
+    """Logit (n × bidang) beserta skor dan pengali yang dibutuhkan gradien."""
+    pengali = data["C"] * np.float32(param["log_bonus"])
+    pengali += _MASKER_MTK[None, :] * param["log_faktor"].astype(np.float32)[data["T"]][:, None]
+    np.exp(pengali, out=pengali)
+    skor = data["X"] @ param["W"].T.astype(np.float32)
+    skor *= pengali
+    return skor * np.float32(np.exp(param["log_tau"])), skor, pengali
+
+
+def _loss_gradien(param, data, param_awal, l2: float):
+    n = len(data["y"])
+    baris = np.arange(n)
+    logit, skor, pengali = _maju(param, data)
+    logit_benar = logit[baris, data["y"]]
+    maks = logit.max(axis=1)
+    logit -= maks[:, None]
+    prob = np.exp(logit, out=logit)
+    jumlah = prob.sum(axis=1)
+    loss = float(np.mean(np.log(jumlah) + maks - logit_benar))
+
+    # d loss / d logit = (softmax - one-hot) / n, dihitung di tempat
+    d_logit = prob
+    d_logit /= (jumlah * n)[:, None]
+    d_logit[baris, data["y"]] -= 1.0 / n
+    tau = float(np.exp(param["log_tau"]))
+    d_log_tau = float(np.einsum("ij,ij->", d_logit, skor)) * tau
+    d_skor = d_logit
+    d_skor *= np.float32(tau)
+    # skor = linear × pengali, pengali = exp(log_pengali) → d log_pengali = d_skor × skor
+    d_log_pengali = d_skor * skor
+    d_skor *= pengali
+
+    selisih = param["W"] - param_awal["W"]
+    loss += l2 * float(np.sum(selisih ** 2))
+    d_faktor = np.bincount(data["T"], weights=d_log_pengali @ _MASKER_MTK.astype(np.float32), minlength=len(DAFTAR_TOLERANSI))
+    d_faktor[DAFTAR_TOLERANSI.index("Sedang")] = 0.0  # "Sedang" tetap 1.0 sebagai acuan
+    gradien = {
+        "W": (d_skor.T @ data["X"]).astype(np.float64) + 2 * l2 * selisih,
+        "log_bonus": float(np.einsum("ij,ij->", d_log_pengali, data["C"])),
+        "log_faktor": d_faktor,
+        "log_tau": d_log_tau,
+    }
+    return loss, gradien
+
+
+def kalibrasi(data: dict, iterasi: int = 400, laju: float = 0.05, l2: float = 1e-4,
+              batch: int = UKURAN_BATCH, seed: int = 0, lapor=None) -> dict:
+    """
+    Cocokkan bobot, bonus minat, faktor toleransi (dan suhu softmax) dengan Adam mini-batch.
+    Biaya per langkah tetap (sebesar `batch`), jadi waktu total tidak tumbuh dengan jumlah baris;
+    laju belajar diturunkan (kosinus) agar hasil akhir stabil meski gradiennya dari sampel.
+    """
+    awal = parameter_awal()
+    param = {k: np.array(v, dtype=np.float64) for k, v in awal.items()}
+    n = len(data["y"])
+    acak = np.random.default_rng(seed)
+    # Suhu awal: logit berskala ~1 agar softmax tidak jenuh di langkah pertama
+    sampel = _potong(data, acak.choice(n, size=min(n, batch), replace=False))
+    param["log_tau"] = np.array(-np.log(max(float(np.std(_maju(param, sampel)[1])), 1e-6)))
+    m = {k: np.zeros_like(v) for k, v in param.items()}
+    v = {k: np.zeros_like(v) for k, v in param.items()}
+    b1, b2, eps = 0.9, 0.999, 1e-8
+    rata_loss = None
+    for i in range(1, iterasi + 1):
+        bagian = data if n <= batch else _potong(data, acak.integers(0, n, size=batch))
+        loss, gradien = _loss_gradien(param, bagian, awal, l2)
+        laju_i = laju * (0.1 + 0.9 * 0.5 * (1 + np.cos(np.pi * (i - 1) / iterasi)))
+        for k in param:
+            m[k] = b1 * m[k] + (1 - b1) * gradien[k]
+            v[k] = b2 * v[k] + (1 - b2) * gradien[k] ** 2
+            param[k] = param[k] - laju_i * (m[k] / (1 - b1 ** i)) / (np.sqrt(v[k] / (1 - b2 ** i)) + eps)
+        param["W"] = np.clip(param["W"], 0.0, None)  # bobot mapel tidak boleh negatif
+        rata_loss = loss if rata_loss is None else 0.9 * rata_loss + 0.1 * loss
+        if lapor is not None and (i % 50 == 0 or i == iterasi):
+            lapor(i, rata_loss)
+    return param
+
+
+def tingkat_hit(param, data, k_daftar=K_LAPORAN) -> dict:
+    """Top-k hit rate: proporsi lulusan yang jurusannya masuk k besar skor."""
+    skor = _maju(param, data)[1]
+    skor = np.round(skor, 5)  # skor seri diurutkan seperti pemeta (urutan bidang)
+    skor_benar = skor[np.arange(len(data["y"])), data["y"]][:, None]
+    urutan_bidang = np.arange(skor.shape[1])[None, :]
+    peringkat = (skor > skor_benar).sum(axis=1) + ((skor == skor_benar) & (urutan_bidang < data["y"][:, None])).sum(axis=1)
+    return {f"hit@{k}": float(np.mean(peringkat < k)) for k in k_daftar}
+
+
+def _potong(data: dict, indeks) -> dict:
+    return {k: (v[indeks] if isinstance(v, np.ndarray) else v) for k, v in data.items()}
+
+
+# --------------------------------------------------------------------------------------
+# Aturan keluaran
+# --------------------------------------------------------------------------------------
+def ke_aturan(param, metrik: dict, info: dict) -> dict:
+    """Berkas aturan untuk `pemetaan.muat_aturan` (bobot diskalakan ulang; peringkat tidak berubah)."""
+    w = param["W"] * (SKALA_BOBOT / max(float(param["W"].max()), 1e-9))
+    faktor = np.exp(param["log_faktor"])
+    return {
+        "versi": 1,
+        "dibuat": datetime.now().isoformat(timespec="seconds"),
+        **info,
+        "peta_bobot": {
+            bidang: {mapel: round(float(w[i, j]), 3) for j, mapel in enumerate(DAFTAR_MAPEL) if w[i, j] >= 0.005}
+            for i, bidang in enumerate(DAFTAR_BIDANG)
+        },
+        "bonus_minat": round(float(np.exp(param["log_bonus"])), 4),
+        "faktor_toleransi_mtk": {t: round(float(faktor[i]), 4) for i, t in enumerate(DAFTAR_TOLERANSI)},
+        "metrik": metrik,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kalibrasi bobot pemetaan terhadap data jurusan lulusan.")
+    parser.add_argument("data", nargs="?", help="Berkas CSV/Parquet data lulusan")
+    parser.add_argument("--sintetis", type=int, help="Pakai N baris data buatan alih-alih berkas")
+    parser.add_argument("--keluar", default="aturan_pemetaan.json", help="Berkas aturan JSON yang ditulis")
+    parser.add_argument("--iterasi", type=int, default=400)
+    parser.add_argument("--batch", type=int, default=UKURAN_BATCH, help="Baris per langkah optimasi")
+    parser.add_argument("--laju", type=float, default=0.05, help="Laju belajar Adam")
+    parser.add_argument("--l2", type=float, default=1e-4, help="Regularisasi ke bobot awal")
+    parser.add_argument("--validasi", type=float, default=0.2, help="Proporsi data untuk evaluasi")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if not args.data and not args.sintetis:
+        parser.error("beri berkas data atau --sintetis N")
+
+    mulai = time.perf_counter()
+    df = data_sintetis(args.sintetis, args.seed) if args.sintetis else muat_data(args.data)
+    data = siapkan_data(df)
+    n = len(data["y"])
+    if n == 0:
+        sys.exit("Tidak ada baris yang bisa dipakai (cek nama jurusan/toleransi).")
+    acak = np.random.default_rng(args.seed)
+    urutan = acak.permutation(n)
+    n_validasi = int(n * args.validasi)
+    latih, uji = _potong(data, urutan[n_validasi:]), _potong(data, urutan[:n_validasi] if n_validasi else urutan)
+    print(f"{n} baris ({data['dibuang']} dibuang), latih {len(latih['y'])}, uji {len(uji['y'])} "
+          f"— dimuat dalam {time.perf_counter() - mulai:.1f} dtk")
+
+    mulai = time.perf_counter()
+    param = kalibrasi(latih, args.iterasi, args.laju, args.l2, args.batch, args.seed,
+                      lapor=lambda i, loss: print(f"  iterasi {i:>4}  loss {loss:.4f}"))
+    durasi = time.perf_counter() - mulai
+
+    sebelum, sesudah = tingkat_hit(parameter_awal(), uji), tingkat_hit(param, uji)
+    print(f"Kalibrasi selesai dalam {durasi:.1f} dtk\n\n{'metrik':<8} {'awal':>8} {'kalibrasi':>10}")
+    for kunci in sebelum:
+        print(f"{kunci:<8} {sebelum[kunci]:>8.3f} {sesudah[kunci]:>10.3f}")
+
+    aturan = ke_aturan(
+        param,
+        {kunci: {"awal": sebelum[kunci], "kalibrasi": sesudah[kunci]} for kunci in sebelum},
+        {"sumber": args.data or f"sintetis:{args.sintetis}", "baris_latih": len(latih["y"]), "baris_uji": len(uji["y"])},
+    )
+    Path(args.keluar).write_text(json.dumps(aturan, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nAturan ditulis ke {args.keluar} (pakai dengan PENASIHAT_ATURAN={args.keluar})")
+
+
+if __name__ == "__main__":
+    main()
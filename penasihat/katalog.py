@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Skor profil terhadap katalog program studi berskala nasional (ribuan program).
+
+Setiap program punya vektor bobot mapel yang jarang (biasanya 2-5 mapel) dan sejumlah
+tag. Bobot disimpan sebagai matriks jarang format koordinat terurut per program
+(`baris`, `kolom`, `nilai`), sehingga skor satu profil cukup satu `np.bincount`
+sebesar jumlah entri bukan-nol. Pengali minat dan kenyamanan Matematika diterapkan
+lewat masker tag: tag minat (mis. "Teknologi") memberi bonus yang sama dengan
+`PREFERENSI_BONUS`, dan tag `intensif_mtk` menandai program yang terkena faktor
+toleransi. Top-k dipilih dengan seleksi parsial (`np.partition`), bukan mengurutkan
+seluruh katalog.
+
+Berkas katalog (CSV), satu baris per program:
+    nama    nama program (sebaiknya unik, mis. "Teknik Informatika - Univ. X")
+    bobot   bobot mapel dipisah ";", mis. "Matematika:3;TIK:3;B. Inggris:1"
+    tag     tag dipisah ";", mis. "Teknologi;intensif_mtk" (boleh kosong)
+    kolom lain disimpan sebagai metadata dan ikut dikembalikan di hasil
+
+Dipakai oleh mesin jika `PENASIHAT_KATALOG` diisi. Uji latensi:
+    python -m penasihat.katalog --sintetis 10000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from penasihat.pemetaan import (
+    BIDANG_INTENSIF_MTK,
+    BONUS_MINAT,
+    FAKTOR_TOLERANSI_MTK,
+    MAPEL_ALIAS,
+    PETA_BOBOT,
+    PREFERENSI_BONUS,
+)
+
+JALUR_KATALOG = os.environ.get("PENASIHAT_KATALOG")
+TAG_INTENSIF_MTK = "intensif_mtk"
+DAFTAR_MAPEL = list(MAPEL_ALIAS.values())
+
+
+class KatalogProgram:
+    """Katalog program studi dengan bobot mapel jarang + tag."""
+
+    def __init__(self, nama, bobot, tag, metadata=None):
+        """
+        nama: list nama program
+        bobot: list dict {mapel: bobot} per program
+        tag: list iterable tag per program
+        metadata: list dict tambahan per program (opsional)
+        """
+        self.nama = list(nama)
+        self.metadata = list(metadata) if metadata is not None else [{} for _ in self.nama]
+        indeks_mapel = {m: j for j, m in enumerate(DAFTAR_MAPEL)}
+
+        baris, kolom, nilai = [], [], []
+        for i, peta in enumerate(bobot):
+            for m, b in peta.items():
+                j = indeks_mapel.get(MAPEL_ALIAS.get(m, m))
+                if j is None:
+                    raise ValueError(f"Mapel tidak dikenal di katalog ({self.nama[i]}): {m}")
+                if b:
+                    baris.append(i)
+                    kolom.append(j)
+                    nilai.append(float(b))
+        self._baris = np.asarray(baris, dtype=np.int64)
+        self._kolom = np.asarray(kolom, dtype=np.int64)
+        self._nilai = np.asarray(nilai, dtype=np.float64)
+
+        # Tag sebagai pasangan (program, tag) jarang + daftar tag unik
+        self.daftar_tag = sorted({t for ts in tag for t in ts})
+        indeks_tag = {t: k for k, t in enumerate(self.daftar_tag)}
+        pasangan = [(i, indeks_tag[t]) for i, ts in enumerate(tag) for t in set(ts)]
+        self._tag_baris = np.asarray([p[0] for p in pasangan], dtype=np.int64)
+        self._tag_kolom = np.asarray([p[1] for p in pasangan], dtype=np.int64)
+        self._indeks_tag = indeks_tag
+        self._masker_mtk = np.zeros(len(self.nama), dtype=bool)
+        if TAG_INTENSIF_MTK in indeks_tag:
+            self._masker_mtk[self._tag_baris[self._tag_kolom == indeks_tag[TAG_INTENSIF_MTK]]] = True
+
+    def __len__(self):
+        return len(self.nama)
+
+    # ---- pembuat ----------------------------------------------------------------------
+    @classmethod
+    def dari_peta_bobot(cls):
+        """Katalog 18 bidang bawaan; hasilnya sama dengan `skor_bidang_dari_map`."""
+        tag = {bidang: [] for bidang in PETA_BOBOT}
+        for minat, daftar in PREFERENSI_BONUS.items():
+            for bidang in daftar:
+                if bidang in tag:
+                    tag[bidang].append(minat)
+        for bidang in BIDANG_INTENSIF_MTK:
+            tag[bidang].append(TAG_INTENSIF_MTK)
+        return cls(list(PETA_BOBOT), list(PETA_BOBOT.values()), [tag[b] for b in PETA_BOBOT])
+
+    @classmethod
+    def dari_csv(cls, jalur: str):
+        df = pd.read_csv(jalur, dtype=str, keep_default_na=False)
+        kurang = [k for k in ("nama", "bobot") if k not in df.columns]
+        if kurang:
+            raise ValueError(f"Kolom wajib tidak ada di katalog {jalur}: {', '.join(kurang)}")
+
+        def _bobot(teks):
+            peta = {}
+            for bagian in filter(None, (b.strip() for b in teks.split(";"))):
+                mapel, _, angka = bagian.rpartition(":")
+                peta[mapel.strip()] = float(angka)
+            return peta
+
+        tag = df["tag"] if "tag" in df.columns else pd.Series("", index=df.index)
+        meta_kolom = [k for k in df.columns if k not in ("nama", "bobot", "tag")]
+        return cls(
+            df["nama"].tolist(),
+            [_bobot(b) for b in df["bobot"]],
+            [[t.strip() for t in ts.split(";") if t.strip()] for ts in tag],
+            df[meta_kolom].to_dict("records") if meta_kolom else None,
+        )
+
+    # ---- skor -------------------------------------------------------------------------
+    def skor(self, nilai: dict, preferensi, toleransi_mtk: str) -> np.ndarray:
+        """Skor semua program untuk satu profil (bentuk sama dengan `skor_bidang_dari_map`)."""
+        x = np.array([nilai.get(m, 0) for m in DAFTAR_MAPEL], dtype=np.float64)
+        skor = np.bincount(self._baris, weights=self._nilai * x[self._kolom], minlength=len(self.nama))
+
+        # Masker tag minat: jumlah tag minat terpilih per program → bonus bertumpuk
+        terpilih = np.zeros(len(self.daftar_tag), dtype=np.float64)
+        for p in preferensi:
+            if p in self._indeks_tag:
+                terpilih[self._indeks_tag[p]] += 1
+        if terpilih.any():
+            jumlah = np.bincount(self._tag_baris, weights=terpilih[self._tag_kolom], minlength=len(self.nama))
+            skor *= BONUS_MINAT ** jumlah
+
+        faktor = FAKTOR_TOLERANSI_MTK.get(toleransi_mtk, 1.0)
+        if faktor != 1.0:
+            skor[self._masker_mtk] *= faktor
+        return skor
+
+    def teratas(self, nilai: dict, preferensi, toleransi_mtk: str, k: int = 5) -> list:
+        """
+        k program teratas sebagai list dict {nama, skor, ...metadata}. Seleksi parsial
+        O(n) lalu hanya k kandidat yang diurutkan; skor seri mengikuti urutan katalog.
+        """
+        skor = self.skor(nilai, preferensi, toleransi_mtk)
+        k = min(k, len(skor))
+        if k <= 0:
+            return []
+        if k < len(skor):
+            # Ambang skor ke-k, lalu ambil semua yang seri di ambang agar urutan seri stabil
+            ambang = np.partition(skor, len(skor) - k)[len(skor) - k]
+            kandidat = np.flatnonzero(skor >= ambang)
+        else:
+            kandidat = np.arange(len(skor))
+        urut = kandidat[np.lexsort((kandidat, -skor[kandidat]))][:k]
+        return [{"nama": self.nama[i], "skor": float(skor[i]), **self.metadata[i]} for i in urut]
+
+
+def muat_katalog(jalur: str = JALUR_KATALOG):
+    """Katalog dari `PENASIHAT_KATALOG`, atau None jika tidak diatur (pakai 18 bidang bawaan)."""
+    return KatalogProgram.dari_csv(jalur) if jalur else None
+
+
+def katalog_sintetis(n: int, seed: int = 0) -> KatalogProgram:
+    """Katalog buatan untuk uji latensi: 2-5 mapel dan 1-3 tag per program."""
+    acak = np.random.default_rng(seed)
+    daftar_minat = list(PREFERENSI_BONUS)
+    bobot, tag = [], []
+    for _ in range(n):
+        mapel = acak.choice(DAFTAR_MAPEL, size=acak.integers(2, 6), replace=False)
+        bobot.append({m: int(acak.integers(1, 4)) for m in mapel})
+        ts = list(acak.choice(daftar_minat, size=acak.integers(1, 4), replace=False))
+        if "Matematika" in mapel and acak.random() < 0.5:
+            ts.append(TAG_INTENSIF_MTK)
+        tag.append(ts)
+    return KatalogProgram([f"Program {i}" for i in range(n)], bobot, tag)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji latensi skor katalog program studi.")
+    parser.add_argument("--katalog", default=JALUR_KATALOG, help="Berkas katalog CSV")
+    parser.add_argument("--sintetis", type=int, default=10000, help="Jumlah program katalog buatan (jika tanpa --katalog)")
+    parser.add_argument("--profil", type=int, default=2000, help="Jumlah profil acak yang diukur")
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    katalog = KatalogProgram.dari_csv(args.katalog) if args.katalog else katalog_sintetis(args.sintetis)
+    acak = np.random.default_rng(1)
+    daftar_minat = list(PREFERENSI_BONUS)
+    latensi_parsial, latensi_urut = [], []
+    for _ in range(args.profil):
+        nilai = {m: int(v) for m, v in zip(DAFTAR_MAPEL, acak.integers(0, 11, size=len(DAFTAR_MAPEL)))}
+        minat = list(acak.choice(daftar_minat, size=2, replace=False))
+        toleransi = str(acak.choice(list(FAKTOR_TOLERANSI_MTK)))
+
+        mulai = time.perf_counter()
+        katalog.teratas(nilai, minat, toleransi, args.k)
+        latensi_parsial.append(time.perf_counter() - mulai)
+
+        # Pembanding: dict skor lengkap lalu sorted() seperti pemetaan 18 bidang
+        mulai = time.perf_counter()
+        skor = dict(zip(katalog.nama, katalog.skor(nilai, minat, toleransi)))
+        sorted(skor.items(), key=lambda x: x[1], reverse=True)[:args.k]
+        latensi_urut.append(time.perf_counter() - mulai)
+
+    print(f"{len(katalog)} program, {len(katalog._nilai)} bobot bukan-nol, {len(katalog.daftar_tag)} tag")
+    for label, data in (("seleksi parsial", latensi_parsial), ("dict + sorted", latensi_urut)):
+        ms = np.array(data) * 1000
+        print(f"  {label:<16} p50 {np.percentile(ms, 50):.3f} ms  p95 {np.percentile(ms, 95):.3f} ms  p99 {np.percentile(ms, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
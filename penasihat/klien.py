@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Klien HTTP untuk layanan `penasihat.api`.
+
+Antarmukanya sama dengan `MesinPenasihat`, sehingga aplikasi Streamlit cukup memilih
+salah satu: mesin di proses yang sama, atau klien tipis ke layanan terpisah
+(`PENASIHAT_API_URL`).
+"""
+
+import os
+
+import httpx
+
+from penasihat.format_jawaban import PROFIL_DEFAULT, TERSTRUKTUR_DEFAULT
+
+BATAS_WAKTU_API = float(os.environ.get("PENASIHAT_API_BATAS_WAKTU", "120"))
+
+
+class KlienPenasihat:
+    def __init__(self, url: str, api_key: str = None, batas_waktu: float = BATAS_WAKTU_API):
+        # api_key hanya untuk kesamaan antarmuka: layanan memakai GOOGLE_API_KEY server
+        self._http = httpx.Client(base_url=url.rstrip("/"), timeout=batas_waktu)
+
+    def _kirim(self, metode: str, jalur: str, **kwargs):
+        respons = self._http.request(metode, jalur, **kwargs)
+        self._periksa(respons)
+        return respons.json()
+
+    @staticmethod
+    def _periksa(respons):
+        if respons.is_success:
+            return
+        respons.read()
+        try:
+            pesan = respons.json().get("galat")
+        except ValueError:
+            pesan = None
+        raise RuntimeError(pesan or f"Layanan penasihat mengembalikan HTTP {respons.status_code}.")
+
+    def skor_profil(self, nilai: dict, minat, toleransi: str) -> dict:
+        return self._kirim("POST", "/skor", json={"nilai": nilai, "minat": minat, "toleransi": toleransi})
+
+    def rekomendasi_awal(self, sesi_id: str, profil: dict, profil_jawaban: str = PROFIL_DEFAULT,
+                         terstruktur: bool = TERSTRUKTUR_DEFAULT) -> dict:
+        data = {"sesi_id": sesi_id, "profil": profil, "profil_jawaban": profil_jawaban, "terstruktur": terstruktur}
+        return self._kirim("POST", "/rekomendasi", json=data)
+
+    def ambil_susulan(self, sesi_id: str) -> dict:
+        return self._kirim("GET", "/rekomendasi/susulan", params={"sesi_id": sesi_id})
+
+    def indeks_lampiran(self, lampiran, lapor=None, sesi_id: str = None) -> dict:
+        lampiran = list(lampiran)
+        if not lampiran:
+            return {"lampiran_id": None, "nama_lampiran": "", "peringatan": None}
+        if lapor:
+            lapor(0.1, f"Mengunggah {len(lampiran)} lampiran ke layanan penasihat...")
+        berkas = [("berkas", (nama, data, mime or "application/octet-stream")) for nama, data, mime in lampiran]
+        return self._kirim("POST", "/lampiran", files=berkas, data={"sesi_id": sesi_id} if sesi_id else None)
+
+    @staticmethod
+    def _data_chat(sesi_id, ringkasan_profil, pertanyaan, lampiran_id, profil_jawaban, profil_skor) -> dict:
+        return {
+            "sesi_id": sesi_id,
+            "ringkasan_profil": ringkasan_profil,
+            "pertanyaan": pertanyaan,
+            "lampiran_id": lampiran_id,
+            "profil_jawaban": profil_jawaban,
+            "profil_skor": profil_skor,
+        }
+
+    def jawab(self, sesi_id: str, ringkasan_profil: str, pertanyaan: str, lampiran_id: str = None,
+              profil_jawaban: str = PROFIL_DEFAULT, profil_skor: dict = None) -> str:
+        data = self._data_chat(sesi_id, ringkasan_profil, pertanyaan, lampiran_id, profil_jawaban, profil_skor)
+        return self._kirim("POST", "/chat", json=data)["jawaban"]
+
+    def alirkan_jawaban(self, sesi_id: str, ringkasan_profil: str, pertanyaan: str, lampiran_id: str = None,
+                        profil_jawaban: str = PROFIL_DEFAULT, profil_skor: dict = None):
+        data = self._data_chat(sesi_id, ringkasan_profil, pertanyaan, lampiran_id, profil_jawaban, profil_skor)
+        with self._http.stream("POST", "/chat/aliran", json=data) as respons:
+            self._periksa(respons)
+            yield from respons.iter_text()
+
+    def hapus_sesi(self, sesi_id: str):
+        self._kirim("DELETE", f"/sesi/{sesi_id}")
+
+    def statistik(self, sesi_id: str = None) -> dict:
+        return self._kirim("GET", "/statistik", params={"sesi_id": sesi_id} if sesi_id else None)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Konfigurasi berlapis + preset kinerja per deployment.
+
+Semua kenop kinerja dibaca modul-modul `penasihat` dari environment variable
+`PENASIHAT_*` saat diimpor. Modul ini menyusun nilainya dari beberapa lapisan, dari
+yang paling lemah ke yang paling kuat:
+
+    bawaan modul → preset → berkas konfigurasi → Streamlit secrets → environment variable
+
+lalu menuliskan hasilnya ke `os.environ` sebelum modul lain diimpor. Environment
+variable yang sudah diset dari luar tidak pernah ditimpa.
+
+Preset (`preset = "..."` di berkas/secrets, atau `PENASIHAT_PRESET`):
+    standar       nilai bawaan modul
+    low-latency   model ringan, jawaban ringkas, potongan kecil, hedging aktif
+    high-quality  model terbesar, jawaban lengkap, lebih banyak konteks, batas waktu longgar
+    offline       tanpa panggilan Gemini: rekomendasi rule-based + router intent lokal
+
+Berkas konfigurasi: `PENASIHAT_KONFIGURASI` (default `penasihat.toml` jika ada), TOML
+atau JSON datar. Kunci boleh berupa nama pendek di `KUNCI` (mis. `model`, `k`) atau nama
+environment variable lengkap (`PENASIHAT_OCR_DPI`). Di Streamlit secrets, kunci yang sama
+ditaruh di bagian `[penasihat]` atau langsung sebagai `PENASIHAT_*` di tingkat atas.
+
+Nilai dibaca sekali per proses (saat modul lain pertama kali diimpor); perubahan
+berkas/secrets berlaku setelah aplikasi dijalankan ulang.
+"""
+
+import json
+import os
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: hanya berkas JSON
+    tomllib = None
+
+BERKAS_KONFIGURASI = os.environ.get("PENASIHAT_KONFIGURASI", "penasihat.toml")
+PRESET_DEFAULT = "standar"
+
+# nama pendek → environment variable yang dibaca modul
+KUNCI = {
+    "model": "PENASIHAT_MODEL",
+    "model_embedding": "PENASIHAT_MODEL_EMBEDDING",
+    "suhu": "PENASIHAT_SUHU",
+    "ukuran_potongan": "PENASIHAT_UKURAN_POTONGAN",
+    "tumpang_tindih": "PENASIHAT_TUMPANG_TINDIH",
+    "k": "PENASIHAT_K",
+    "profil_jawaban": "PENASIHAT_PROFIL_JAWABAN",
+    "jawaban_terstruktur": "PENASIHAT_JAWABAN_TERSTRUKTUR",
+    "anggaran_berpikir": "PENASIHAT_ANGGARAN_BERPIKIR",
+    "batas_waktu_llm": "PENASIHAT_BATAS_WAKTU_LLM",
+    "batas_waktu_api": "PENASIHAT_API_BATAS_WAKTU",
+    "tenggat_chat": "PENASIHAT_TENGGAT_CHAT",
+    "tenggat_lampiran": "PENASIHAT_TENGGAT_LAMPIRAN",
+    "tenggat_rekomendasi": "PENASIHAT_TENGGAT_REKOMENDASI",
+    "cache_konteks": "PENASIHAT_CACHE_KONTEKS",
+    "router": "PENASIHAT_ROUTER",
+    "hedge": "PENASIHAT_HEDGE",
+    "hedge_model": "PENASIHAT_HEDGE_MODEL",
+    "ambang_indeks_datar": "PENASIHAT_AMBANG_INDEKS_DATAR",
+    "vektor_dtype": "PENASIHAT_VEKTOR_DTYPE",
+    "embedding_paralel": "PENASIHAT_EMBEDDING_PARALEL",
+    "normalisasi": "PENASIHAT_NORMALISASI",
+    "ocr_maks_halaman": "PENASIHAT_OCR_MAKS_HALAMAN",
+    "luring": "PENASIHAT_LURING",
+}
+
+PRESET = {
+    "standar": {},
+    "low-latency": {
+        "model": "gemini-2.5-flash-lite",
+        "suhu": 0.3,
+        "ukuran_potongan": 1200,
+        "tumpang_tindih": 150,
+        "k": 3,
+        "profil_jawaban": "ringkas",
+        "batas_waktu_llm": 8,
+        "tenggat_chat": 30,
+        "router": True,
+        "hedge": True,
+        "ocr_maks_halaman": 8,
+    },
+    "high-quality": {
+        "model": "gemini-2.5-pro",
+        "suhu": 0.7,
+        "ukuran_potongan": 2000,
+        "tumpang_tindih": 300,
+        "k": 8,
+        "profil_jawaban": "lengkap",
+        # gemini-2.5-pro tidak bisa mematikan mode berpikir (anggaran minimal 128)
+        "anggaran_berpikir": 1024,
+        "batas_waktu_llm": 60,
+        "batas_waktu_api": 300,
+        "tenggat_chat": 180,
+        "tenggat_rekomendasi": 240,
+        "router": False,
+        "hedge": False,
+    },
+    "offline": {
+        "luring": True,
+        "router": True,
+        "hedge": False,
+        "cache_konteks": "lokal",
+    },
+}
+
+_diterapkan = {}  # environment variable → nilai yang ditulis modul ini (boleh ditimpa lapisan baru)
+
+
+def _teks(nilai) -> str:
+    if isinstance(nilai, bool):
+        return "1" if nilai else "0"
+    return str(nilai)
+
+
+def _normalisasi(data) -> dict:
+    """Kunci pendek/lengkap → {ENV: nilai}; kunci yang tidak dikenal ditolak."""
+    hasil = {}
+    for kunci, nilai in dict(data or {}).items():
+        if kunci == "preset" or nilai is None:
+            continue
+        nama = KUNCI.get(kunci, kunci)
+        if not nama.startswith("PENASIHAT_"):
+            raise ValueError(f"Kunci konfigurasi tidak dikenal: {kunci}")
+        hasil[nama] = _teks(nilai)
+    return hasil
+
+
+def baca_berkas(jalur=None) -> dict:
+    """Isi berkas konfigurasi (TOML/JSON), atau {} jika tidak ada."""
+    jalur = Path(jalur or BERKAS_KONFIGURASI)
+    if not jalur.is_file():
+        return {}
+    if jalur.suffix == ".json":
+        return json.loads(jalur.read_text(encoding="utf-8"))
+    if tomllib is None:
+        raise ValueError(f"Berkas {jalur} butuh Python 3.11+ (tomllib); gunakan format JSON.")
+    with jalur.open("rb") as f:
+        return tomllib.load(f)
+
+
+def _dari_secrets(sekret) -> dict:
+    if not sekret:
+        return {}
+    data = {k: v for k, v in dict(sekret).items() if k == "preset" or str(k).startswith("PENASIHAT_")}
+    data.update(dict(sekret.get("penasihat", {})))
+    return data
+
+
+def _dari_luar(nama: str) -> bool:
+    """Apakah environment variable ini diset dari luar (bukan oleh `terapkan`)."""
+    return nama in os.environ and os.environ[nama] != _diterapkan.get(nama)
+
+
+def terapkan(sekret=None, berkas=None) -> dict:
+    """
+    Susun lapisan konfigurasi lalu tulis ke `os.environ`. Dipanggil otomatis saat paket
+    `penasihat` diimpor (tanpa secrets) dan sekali lagi oleh aplikasi Streamlit dengan
+    `st.secrets` sebelum mengimpor mesin.
+
+    Hasil: {"preset", "nilai": {ENV: nilai}, "sumber": {ENV: lapisan}}.
+    """
+    data_berkas = baca_berkas(berkas)
+    data_sekret = _dari_secrets(sekret)
+    if _dari_luar("PENASIHAT_PRESET"):
+        preset = os.environ["PENASIHAT_PRESET"]
+    else:
+        preset = data_sekret.get("preset") or data_berkas.get("preset") or PRESET_DEFAULT
+    if preset not in PRESET:
+        raise ValueError(f"Preset tidak dikenal: {preset} (pilihan: {', '.join(PRESET)})")
+
+    nilai, sumber = {}, {}
+    for lapisan, data in (("preset", PRESET[preset]), ("berkas", data_berkas), ("secrets", data_sekret)):
+        for nama, isi in _normalisasi(data).items():
+            nilai[nama] = isi
+            sumber[nama] = lapisan
+    nilai["PENASIHAT_PRESET"] = preset
+    sumber["PENASIHAT_PRESET"] = "env" if _dari_luar("PENASIHAT_PRESET") else "konfigurasi"
+
+    for nama in [n for n in _diterapkan if n not in nilai]:
+        # Ditulis oleh lapisan sebelumnya yang kini tidak berlaku (mis. preset berganti)
+        if not _dari_luar(nama):
+            os.environ.pop(nama, None)
+        del _diterapkan[nama]
+    for nama, isi in nilai.items():
+        if _dari_luar(nama):
+            nilai[nama] = os.environ[nama]
+            sumber[nama] = "env"
+            continue
+        os.environ[nama] = _diterapkan[nama] = isi
+    return {"preset": preset, "nilai": nilai, "sumber": sumber}
+
+
+def api_key(sekret=None):
+    """API key Gemini dari environment lalu Streamlit secrets, atau None."""
+    if os.environ.get("GOOGLE_API_KEY"):
+        return os.environ["GOOGLE_API_KEY"]
+    if sekret:
+        return sekret.get("GOOGLE_API_KEY") or None
+    return None
@@ -0,0 +1,636 @@
+# -*- coding: utf-8 -*-
+"""
+Mesin penasihat: operasi inti tanpa Streamlit.
+
+Skor profil, pengindeksan lampiran, rekomendasi awal, dan chat (biasa/streaming).
+Dipakai langsung oleh aplikasi Streamlit (mode satu proses) dan oleh layanan HTTP
+`penasihat.api`. State antar-permintaan dikirim ulang oleh pemanggil (ringkasan
+profil, id lampiran) atau disimpan di disk bersama (indeks lampiran, indeks profil),
+sehingga permintaan sesi yang sama bisa dilayani worker mana pun.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as BatasWaktuHabis
+from datetime import datetime
+from pathlib import Path
+
+import google.generativeai as genai
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from penasihat.cache_konteks import PESAN_JAWABAN_KOSONG, JawabanTidakLengkap, buat_cache_konteks, prompt_pertanyaan
+from penasihat.ekstraksi import ekstrak_banyak
+from penasihat.embedding_batch import EmbeddingBatch
+from penasihat.format_jawaban import (
+    PROFIL_DEFAULT,
+    TERSTRUKTUR_DEFAULT,
+    konfigurasi_generasi,
+    ambil_profil,
+    prompt_rekomendasi_terstruktur,
+    render_rekomendasi,
+    urai_rekomendasi,
+)
+from penasihat.indeks_profil import IndeksProfil
+from penasihat.indeks_vektor import IndeksVektorDatar
+from penasihat.katalog import muat_katalog
+from penasihat.mode_darurat import (
+    BATAS_WAKTU_LLM,
+    LURING,
+    PESAN_CHAT_DARURAT,
+    PESAN_CHAT_LURING,
+    PemutusSirkuit,
+    rekomendasi_darurat,
+)
+from penasihat.normalisasi_teks import NORMALISASI_AKTIF, normalisasi
+from penasihat.ocr import statistik_ocr
+from penasihat.pemetaan import buat_ringkasan_profil, skor_bidang_dari_map
+from penasihat.pemotong_rapor import K_DEFAULT, TUMPANG_TINDIH, UKURAN_POTONGAN, RetrieverRapor, potong_dokumen
+from penasihat.profil_kinerja import tahap
+from penasihat.router_intent import ROUTER_AKTIF, PencatatRute, jawab_lokal, klasifikasikan
+from penasihat.tenggat import (
+    DIBATALKAN,
+    GAGAL,
+    HABIS_WAKTU,
+    PESAN_WAKTU_HABIS,
+    SELESAI,
+    TENGGAT_CHAT,
+    TENGGAT_LAMPIRAN,
+    TENGGAT_REKOMENDASI,
+    Dibatalkan,
+    PengelolaTenggat,
+    PermintaanDihentikan,
+    WaktuHabis,
+    dalam,
+    iterasi,
+)
+
+MODEL_GEMINI = os.environ.get("PENASIHAT_MODEL", "gemini-2.5-flash")
+MODEL_EMBEDDING = os.environ.get("PENASIHAT_MODEL_EMBEDDING", "models/gemini-embedding-exp-03-07")
+DIREKTORI_INDEKS_LAMPIRAN = os.environ.get("PENASIHAT_DIR_INDEKS_LAMPIRAN", ".indeks_lampiran")
+KOLEKSI_LAMPIRAN = "lampiran"
+# Penanda bahwa indeks sudah lengkap (ditulis paling akhir); menunjuk ke subdirektori versi
+# indeks yang aktif, karena Chroma tidak bisa menulis ulang direktori yang sudah dibuka di proses yang sama
+BERKAS_META = "meta.json"
+# Masa simpan status rekomendasi susulan di penyimpanan sesi (detik)
+TTL_SUSULAN = int(TENGGAT_REKOMENDASI or BATAS_WAKTU_LLM) + 300
+# Lampiran dengan potongan sebanyak ini atau kurang diindeks dengan indeks vektor datar
+# NumPy (tanpa klien/koleksi Chroma); 0 = selalu Chroma
+AMBANG_INDEKS_DATAR = int(os.environ.get("PENASIHAT_AMBANG_INDEKS_DATAR", "2000"))
+JENIS_DATAR = "datar"
+JENIS_CHROMA = "chroma"
+PEKERJA_LLM = int(os.environ.get("PENASIHAT_PEKERJA_LLM", "8"))
+
+
+# --------------------------------------------------------------------------------------
+# Util profil & dokumen
+# --------------------------------------------------------------------------------------
+def buat_dokumen_langchain(teks: str, sumber: str, bagian: str = None):
+    metadata = {
+        "source": sumber,
+        "processed_at": datetime.now().isoformat(),
+        "char_count": len(teks),
+        "word_count": len(teks.split()),
+    }
+    if bagian:
+        metadata["bagian"] = bagian
+    return [Document(page_content=teks, metadata=metadata)]
+
+
+def format_konteks(docs):
+    if not docs:
+        return None
+    return "\n".join([f"--- Konteks {i+1} ---\n{d.page_content}" for i, d in enumerate(docs)])
+
+
+def prompt_rekomendasi_awal(top5, arahan: str = None) -> str:
+    """Prompt rekomendasi awal (profil sudah ada di prefix cache; cukup kirim hasil rule-based)."""
+    return f"""
+Hasil pemetaan awal (rule-based) memberi kandidat teratas:
+- {top5[0] if len(top5)>0 else '-'}
+- {top5[1] if len(top5)>1 else '-'}
+- {top5[2] if len(top5)>2 else '-'}
+- {top5[3] if len(top5)>3 else '-'}
+- {top5[4] if len(top5)>4 else '-'}
+
+Tolong:
+1) Validasi & pertajam 3-5 rekomendasi bidang/jurusan (boleh menambah/menyusun ulang).
+2) Jelaskan alasan (hubungkan dengan nilai mapel, minat, gaya belajar, dan toleransi matematika).
+3) Beri alternatif jika siswa ingin jalur yang lebih/kurang intensif Matematika.
+4) Buat rencana aksi 90 hari (materi yang diperdalam, proyek mini, lomba/ekskul).
+5) Hindari menyebut universitas spesifik; gunakan saran generik.
+
+Susun jawaban ringkas, terstruktur (heading + bullet), dan ramah siswa.
+{arahan or ''}
+"""
+
+
+def id_lampiran(lampiran) -> str:
+    """
+    Id indeks lampiran dari isi berkas; unggahan ulang berkas yang sama memakai indeks yang sama.
+    Model embedding, ukuran potongan, dan normalisasi ikut di-hash agar preset yang berbeda
+    tidak berbagi indeks.
+    """
+    h = hashlib.sha256(f"{MODEL_EMBEDDING}|{UKURAN_POTONGAN}|{TUMPANG_TINDIH}|{NORMALISASI_AKTIF}".encode())
+    for nama, data, _mime in sorted(lampiran, key=lambda b: b[0]):
+        h.update(nama.encode("utf-8"))
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()[:32]
+
+
+# --------------------------------------------------------------------------------------
+# Mesin
+# --------------------------------------------------------------------------------------
+class MesinPenasihat:
+    """Operasi penasihat untuk satu API key Gemini (aman dipakai dari banyak thread)."""
+
+    def __init__(self, api_key: str, direktori_indeks: str = DIREKTORI_INDEKS_LAMPIRAN, penyimpanan=None):
+        """
+        penyimpanan: penyimpanan sesi (opsional). Jika ada, potongan lampiran ikut disimpan
+        agar indeks bisa dibangun ulang di replika yang tidak punya direktori indeksnya.
+        """
+        genai.configure(api_key=api_key)
+        self.cache_konteks = buat_cache_konteks(MODEL_GEMINI, genai.GenerativeModel(MODEL_GEMINI))
+        # Potongan lampiran di-embed per batch, tanpa duplikat, beberapa batch sekaligus
+        self.embeddings = EmbeddingBatch(GoogleGenerativeAIEmbeddings(google_api_key=api_key, model=MODEL_EMBEDDING))
+        self.indeks_profil = IndeksProfil()
+        # Katalog program studi nasional (PENASIHAT_KATALOG); None → 18 bidang bawaan
+        self.katalog = muat_katalog()
+        self.direktori_indeks = Path(direktori_indeks)
+        self.penyimpanan = penyimpanan
+        self._retriever = {}
+        self._lock = threading.Lock()
+        # Mode darurat: pemutus sirkuit + rekomendasi Gemini yang tiba setelah batas waktu
+        self.pemutus = PemutusSirkuit()
+        self._pelaksana_llm = ThreadPoolExecutor(PEKERJA_LLM, thread_name_prefix="penasihat-llm")
+        self._susulan = {}
+        self._statistik_darurat = {"jawaban_darurat": 0, "batas_waktu": 0, "susulan": 0}
+        # Router intent: pertanyaan sederhana dijawab lokal tanpa retrieval + Gemini
+        self.router = PencatatRute() if ROUTER_AKTIF else None
+        # Tenggat + pembatalan permintaan yang digantikan/sesi yang diakhiri
+        # (lintas worker lewat penyimpanan sesi bersama jika ada)
+        self.tenggat = PengelolaTenggat(self.penyimpanan)
+        # Karakter/potongan yang dibuang normalisasi teks lampiran (kumulatif)
+        self._statistik_normalisasi = {"dokumen": 0, "karakter_dihapus": 0, "potongan_dihapus": 0}
+
+    # ---- skor & rekomendasi -----------------------------------------------------------
+    def skor_profil(self, nilai: dict, minat, toleransi: str) -> dict:
+        """Skor bidang + 5 teratas. Dengan katalog, `skor` hanya berisi program teratas."""
+        if self.katalog is not None:
+            teratas = self.katalog.teratas(nilai, minat, toleransi, k=5)
+            return {"skor": {p["nama"]: p["skor"] for p in teratas}, "top5": [p["nama"] for p in teratas]}
+        skor = skor_bidang_dari_map(nilai, minat, toleransi)
+        urut = heapq.nlargest(5, skor.items(), key=lambda x: x[1])
+        return {"skor": skor, "top5": [b for b, _ in urut]}
+
+    def skor_lengkap(self, nilai: dict, minat, toleransi: str) -> dict:
+        """Skor semua bidang (atau semua program katalog) dari sumber yang sama dengan `skor_profil`."""
+        if self.katalog is not None:
+            return dict(zip(self.katalog.nama, self.katalog.skor(nilai, minat, toleransi).tolist()))
+        return skor_bidang_dari_map(nilai, minat, toleransi)
+
+    def rekomendasi_awal(self, sesi_id: str, profil: dict, profil_jawaban: str = PROFIL_DEFAULT,
+                         terstruktur: bool = TERSTRUKTUR_DEFAULT) -> dict:
+        """
+        profil: dict {nama, tingkat, gaya_belajar, minat, toleransi, nilai}.
+        Mendaftarkan prefix cache sesi lalu memakai ulang rekomendasi profil serupa
+        atau membuat rekomendasi baru lewat Gemini.
+
+        Dengan `terstruktur`, Gemini mengembalikan JSON (SKEMA_REKOMENDASI) yang dirender
+        di sini; JSON-nya ikut dikembalikan sebagai `data` dan disimpan di indeks profil.
+
+        Jika pemutus sirkuit terbuka, Gemini gagal, atau melewati `BATAS_WAKTU_LLM`, hasilnya
+        rekomendasi lokal (`mode_darurat`). Setelah batas waktu, panggilan Gemini tetap
+        berjalan; hasilnya diambil lewat `ambil_susulan` (`menunggu_susulan` bernilai True).
+        Setiap panggilan dicatat sekali ke pemutus sirkuit: batas waktu terlewati dihitung
+        gagal, hasil yang menyusul tidak dihitung lagi.
+        """
+        nama = profil.get("nama", "")
+        ringkasan = buat_ringkasan_profil(
+            nama=nama,
+            tingkat=profil["tingkat"],
+            gaya_belajar=profil["gaya_belajar"],
+            minat_bidang=profil["minat"],
+            toleransi_mtk=profil["toleransi"],
+            nilai_mapel=profil["nilai"],
+        )
+        hasil_skor = self.skor_profil(profil["nilai"], profil["minat"], profil["toleransi"])
+        top5 = hasil_skor["top5"]
+
+        # Entri indeks dipisah per format & profil jawaban agar tidak tercampur
+        varian = f"{'json' if terstruktur else 'md'}:{profil_jawaban}"
+        argumen_indeks = (profil["nilai"], profil["minat"], profil["toleransi"], profil["gaya_belajar"], top5)
+        hasil = {"ringkasan": ringkasan, "top5": top5, "terstruktur": terstruktur}
+        cocok = self.indeks_profil.cari(*argumen_indeks, nama, varian=varian)
+        if cocok:
+            # Prefix cache tetap didaftarkan untuk chat, tanpa menahan jawaban
+            self._pelaksana_llm.submit(self.cache_konteks.daftarkan, sesi_id, ringkasan)
+            return {**hasil, **self._hasil_rekomendasi(cocok["rekomendasi"], terstruktur), "dipakai_ulang": True}
+
+        def _darurat(susulan: bool = False) -> dict:
+            # Skor lengkap: dengan katalog, `hasil_skor["skor"]` hanya berisi 5 teratas
+            skor = self.skor_lengkap(profil["nilai"], profil["minat"], profil["toleransi"])
+            data = rekomendasi_darurat(profil, skor, top5, profil_jawaban, susulan=susulan)
+            return {
+                **hasil,
+                "rekomendasi": render_rekomendasi(data),
+                "terstruktur": False,
+                "dipakai_ulang": False,
+                "mode_darurat": True,
+                "menunggu_susulan": susulan,
+            }
+
+        if not self.pemutus.boleh():
+            self._catat_darurat("jawaban_darurat")
+            return _darurat()
+
+        dicatat = []
+
+        def _catat_pemutus(catat):
+            with self._lock:
+                if dicatat:
+                    return
+                dicatat.append(True)
+            catat()
+
+        def _buat():
+            # Tenggat mencakup hasil susulan; analisis ulang di sesi yang sama membatalkannya
+            with self.tenggat.kelola(sesi_id, "rekomendasi", TENGGAT_REKOMENDASI) as aktif:
+                self.cache_konteks.daftarkan(sesi_id, ringkasan)
+                aktif.periksa("daftarkan")
+                konfigurasi = konfigurasi_generasi(profil_jawaban, terstruktur)
+                if terstruktur:
+                    prompt = prompt_rekomendasi_terstruktur(top5, profil_jawaban)
+                else:
+                    prompt = prompt_rekomendasi_awal(top5, ambil_profil(profil_jawaban)["arahan"])
+                try:
+                    rekomendasi = self.cache_konteks.hasilkan(sesi_id, prompt, konfigurasi)
+                except Dibatalkan:
+                    raise
+                except JawabanTidakLengkap:
+                    # Gemini menjawab (tanpa teks) → layanan sehat, pakai rekomendasi lokal
+                    _catat_pemutus(self.pemutus.berhasil)
+                    raise
+                except Exception:
+                    _catat_pemutus(self.pemutus.gagal)
+                    raise
+            _catat_pemutus(self.pemutus.berhasil)
+            keluaran = self._hasil_rekomendasi(rekomendasi, terstruktur)
+            if keluaran["terstruktur"] == terstruktur:
+                # JSON yang gagal diurai tidak disimpan (akan dibuat ulang di permintaan berikutnya)
+                self.indeks_profil.tambah(*argumen_indeks, rekomendasi, nama, varian=varian)
+            return {**hasil, **keluaran, "dipakai_ulang": False}
+
+        tugas = self._pelaksana_llm.submit(_buat)
+        try:
+            return tugas.result(timeout=BATAS_WAKTU_LLM)
+        except BatasWaktuHabis:
+            # Gemini terlambat: tampilkan rekomendasi lokal, hasil Gemini menyusul
+            _catat_pemutus(self.pemutus.gagal)
+            self._catat_darurat("batas_waktu")
+            self._tunggu_susulan(sesi_id, tugas)
+            return _darurat(susulan=True)
+        except Exception:
+            self._catat_darurat("jawaban_darurat")
+            return _darurat()
+
+    def _catat_darurat(self, jenis: str):
+        with self._lock:
+            self._statistik_darurat[jenis] += 1
+            if jenis == "batas_waktu":
+                self._statistik_darurat["jawaban_darurat"] += 1
+
+    def _tunggu_susulan(self, sesi_id: str, tugas):
+        """
+        Simpan rekomendasi yang menyusul. Dengan penyimpanan sesi, status + hasilnya ditulis
+        ke sana agar polling yang diterima worker lain tetap mendapatkannya.
+        """
+        if self.penyimpanan is None:
+            with self._lock:
+                self._susulan[sesi_id] = tugas
+            return
+        kunci, token = f"susulan:{sesi_id}", uuid.uuid4().hex
+        self.penyimpanan.simpan_status(kunci, {"status": "menunggu", "token": token}, TTL_SUSULAN)
+
+        def _selesai(t):
+            try:
+                data = {"status": "siap", "hasil": t.result(), "token": token}
+            except Exception as e:
+                data = {"status": "gagal", "galat": str(e) or e.__class__.__name__, "token": token}
+            try:
+                # Rekomendasi yang sudah digantikan analisis baru tidak menimpa statusnya
+                lama = self.penyimpanan.muat_status(kunci)
+                if lama is not None and lama.get("token") == token:
+                    self.penyimpanan.simpan_status(kunci, data, TTL_SUSULAN)
+            except Exception:
+                pass
+
+        tugas.add_done_callback(_selesai)
+
+    def ambil_susulan(self, sesi_id: str) -> dict:
+        """
+        Rekomendasi Gemini yang tiba setelah mode darurat. status: "menunggu", "siap"
+        (dengan `hasil`), "gagal", atau "tidak_ada" (belum/tidak tercatat; bukan berarti
+        gagal, mis. status belum tertulis atau sudah kedaluwarsa).
+        """
+        if self.penyimpanan is not None:
+            kunci = f"susulan:{sesi_id}"
+            data = self.penyimpanan.muat_status(kunci)
+            if data is None:
+                return {"status": "tidak_ada"}
+            if data["status"] == "menunggu":
+                return {"status": "menunggu"}
+            self.penyimpanan.hapus_status(kunci)
+            if data["status"] == "gagal":
+                return {"status": "gagal", "galat": data.get("galat")}
+            self._catat_darurat("susulan")
+            return {"status": "siap", "hasil": data["hasil"]}
+        with self._lock:
+            tugas = self._susulan.get(sesi_id)
+            if tugas is None:
+                return {"status": "tidak_ada"}
+            if not tugas.done():
+                return {"status": "menunggu"}
+            del self._susulan[sesi_id]
+        try:
+            hasil = tugas.result()
+        except Exception as e:
+            return {"status": "gagal", "galat": str(e)}
+        self._catat_darurat("susulan")
+        return {"status": "siap", "hasil": hasil}
+
+    @staticmethod
+    def _hasil_rekomendasi(teks: str, terstruktur: bool) -> dict:
+        """Markdown siap tampil (+ data JSON jika terstruktur); JSON rusak ditampilkan apa adanya."""
+        if not terstruktur:
+            return {"rekomendasi": teks, "terstruktur": False}
+        try:
+            data = urai_rekomendasi(teks)
+        except ValueError:
+            return {"rekomendasi": teks, "terstruktur": False}
+        return {"rekomendasi": render_rekomendasi(data), "data": data, "terstruktur": True}
+
+    # ---- lampiran ---------------------------------------------------------------------
+    def indeks_lampiran(self, lampiran, lapor=None, sesi_id: str = None) -> dict:
+        """
+        Ekstraksi + pengindeksan lampiran. lampiran: list (nama, data_bytes, mime).
+        Indeks disimpan di disk dengan id dari isi berkas; hasil berisi lampiran_id
+        (None jika tidak ada teks yang bisa dipakai), nama_lampiran, dan peringatan.
+        sesi_id menandai berkas profil kinerja; unggahan baru di sesi yang sama (atau
+        `hapus_sesi`) membatalkan pengindeksan yang masih berjalan (`PermintaanDihentikan`).
+        """
+        lapor = lapor or (lambda kemajuan, tahap: None)
+        lampiran = list(lampiran)
+        if not lampiran:
+            return {"lampiran_id": None, "nama_lampiran": "", "peringatan": None}
+        if LURING:
+            # Embedding butuh Gemini → lampiran tidak dianalisis di mode luring
+            return {"lampiran_id": None, "nama_lampiran": "",
+                    "peringatan": "Mode luring: lampiran tidak dianalisis. Rekomendasi memakai profil saja."}
+        with self.tenggat.kelola(sesi_id, "lampiran", TENGGAT_LAMPIRAN) as aktif:
+            return self._indeks_lampiran(lampiran, lapor, sesi_id, aktif)
+
+    def _indeks_lampiran(self, lampiran, lapor, sesi_id, aktif) -> dict:
+        lampiran_id = id_lampiran(lampiran)
+        try:
+            # Berkas yang sama sudah pernah diindeks (di disk atau di penyimpanan sesi)
+            self.retriever(lampiran_id)
+            return self._hasil_indeks(lampiran_id, self._baca_meta(self.direktori_indeks / lampiran_id))
+        except KeyError:
+            pass
+
+        # Ekstrak teks semua unggahan secara paralel
+        lapor(0.1, f"Mengekstrak teks {len(lampiran)} lampiran...")
+        with tahap("ekstraksi", sesi_id):
+            hasil_ekstraksi = ekstrak_banyak(lampiran)
+        aktif.periksa("ekstraksi")
+        peringatan = None
+        gagal = [h["nama"] for h in hasil_ekstraksi if h["galat"]]
+        if gagal:
+            peringatan = f"Gagal mengekstrak teks: {', '.join(gagal)}. Analisis tetap dilanjutkan tanpa berkas tersebut."
+        berhasil = [h for h in hasil_ekstraksi if not h["galat"]]
+        if not berhasil:
+            return {"lampiran_id": None, "nama_lampiran": "", "peringatan": peringatan}
+
+        # Bersihkan kop/kaki berulang + blok tanpa isi, lalu potong per bagian rapor
+        lapor(0.3, "Membersihkan & memotong dokumen...")
+        with tahap("bangun_indeks", sesi_id):
+            doks, laporan_normalisasi = [], {}
+            for h in berhasil:
+                if NORMALISASI_AKTIF:
+                    dok, laporan_normalisasi[h["nama"]] = self._normalisasi_dokumen(h["teks"], h["nama"])
+                else:
+                    dok = buat_dokumen_langchain(h["teks"], h["nama"])
+                doks += dok
+            _, potongan = potong_dokumen(doks)
+            if not potongan:
+                raise RuntimeError("Gagal membuat indeks lampiran: tidak bisa memproses dokumen.")
+
+            lapor(0.5, f"Menyiapkan memori konteks ({len(potongan)} potongan)...")
+            aktif.periksa("pemotongan")
+            meta = {"nama_lampiran": ", ".join(h["nama"] for h in berhasil), "peringatan": peringatan,
+                    "normalisasi": laporan_normalisasi}
+            self._bangun_indeks(lampiran_id, potongan, meta)
+        if self.penyimpanan is not None:
+            self.penyimpanan.simpan_potongan(lampiran_id, {
+                "meta": meta,
+                "potongan": [{"teks": d.page_content, "metadata": d.metadata} for d in potongan],
+            })
+        return self._hasil_indeks(lampiran_id, meta)
+
+    def _normalisasi_dokumen(self, teks: str, nama: str) -> tuple:
+        """Dokumen bersih + laporan normalisasi (termasuk perkiraan potongan yang tidak jadi dibuat)."""
+        bersih, laporan = normalisasi(teks)
+        dok = buat_dokumen_langchain(bersih, nama)
+        with self._lock:
+            self._statistik_normalisasi["dokumen"] += 1
+            self._statistik_normalisasi["karakter_dihapus"] += laporan["karakter_dihapus"]
+            self._statistik_normalisasi["potongan_dihapus"] += laporan["potongan_dihapus"]
+        return dok, laporan
+
+    @staticmethod
+    def _hasil_indeks(lampiran_id: str, meta: dict) -> dict:
+        # Indeks lama (sebelum normalisasi) tidak punya "normalisasi" di meta
+        return {"lampiran_id": lampiran_id, "nama_lampiran": meta["nama_lampiran"], "peringatan": meta["peringatan"],
+                "normalisasi": meta.get("normalisasi", {})}
+
+    def _bangun_indeks(self, lampiran_id: str, potongan, meta: dict):
+        direktori = self.direktori_indeks / lampiran_id
+        versi = uuid.uuid4().hex[:12]
+        (direktori / versi).mkdir(parents=True, exist_ok=True)
+        if len(potongan) <= AMBANG_INDEKS_DATAR:
+            jenis = JENIS_DATAR
+            vs = IndeksVektorDatar.from_documents(potongan, self.embeddings)
+            vs.simpan(direktori / versi)
+        else:
+            jenis = JENIS_CHROMA
+            vs = Chroma.from_documents(
+                documents=potongan,
+                embedding=self.embeddings,
+                collection_name=KOLEKSI_LAMPIRAN,
+                persist_directory=str(direktori / versi),
+            )
+        sementara = direktori / f"{BERKAS_META}.{versi}.tmp"
+        sementara.write_text(json.dumps({**meta, "versi": versi, "jenis": jenis}, ensure_ascii=False), encoding="utf-8")
+        os.replace(sementara, direktori / BERKAS_META)
+        retriever = RetrieverRapor(vectorstore=vs, k=K_DEFAULT)
+        with self._lock:
+            self._retriever[lampiran_id] = retriever
+        return retriever
+
+    @staticmethod
+    def _baca_meta(direktori: Path):
+        try:
+            return json.loads((direktori / BERKAS_META).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def retriever(self, lampiran_id: str):
+        """Retriever untuk indeks lampiran; dibuka dari disk jika dibuat oleh worker lain."""
+        with self._lock:
+            retriever = self._retriever.get(lampiran_id)
+        if retriever is not None:
+            return retriever
+        if not re.fullmatch(r"[0-9a-f]{32}", lampiran_id or ""):
+            raise KeyError(f"Id lampiran tidak valid: {lampiran_id}")
+        direktori = self.direktori_indeks / lampiran_id
+        meta = self._baca_meta(direktori)
+        if meta is None:
+            # Direktori indeks tidak ada di replika ini → bangun ulang dari potongan tersimpan
+            simpanan = self.penyimpanan.muat_potongan(lampiran_id) if self.penyimpanan is not None else None
+            if not simpanan:
+                raise KeyError(f"Indeks lampiran {lampiran_id} tidak ditemukan.")
+            potongan = [Document(page_content=p["teks"], metadata=p["metadata"]) for p in simpanan["potongan"]]
+            return self._bangun_indeks(lampiran_id, potongan, simpanan["meta"])
+        if meta.get("jenis") == JENIS_DATAR:
+            vs = IndeksVektorDatar.muat(direktori / meta["versi"], self.embeddings)
+        else:
+            # Indeks lama (tanpa "jenis") dibuat dengan Chroma
+            vs = Chroma(
+                collection_name=KOLEKSI_LAMPIRAN,
+                embedding_function=self.embeddings,
+                persist_directory=str(direktori / meta["versi"]),
+            )
+        retriever = RetrieverRapor(vectorstore=vs, k=K_DEFAULT)
+        with self._lock:
+            self._retriever[lampiran_id] = retriever
+        return retriever
+
+    # ---- chat -------------------------------------------------------------------------
+    def _konteks_chat(self, sesi_id, ringkasan_profil, pertanyaan, lampiran_id):
+        self.cache_konteks.pastikan(sesi_id, ringkasan_profil)
+        konteks = None
+        if lampiran_id:
+            try:
+                with tahap("konteks_chat", sesi_id):
+                    konteks = format_konteks(self.retriever(lampiran_id).invoke(pertanyaan))
+            except KeyError:
+                pass  # indeks tidak bisa dipulihkan → jawab dengan konteks profil saja
+        return konteks
+
+    def _jawab_lokal(self, sesi_id: str, pertanyaan: str, profil_skor: dict = None):
+        """Jawaban router intent (dan catat keputusannya), atau None jika perlu Gemini."""
+        if self.router is None:
+            return None
+        rute = klasifikasikan(pertanyaan)
+        jawaban = None
+        # Dengan katalog, perbandingan tanpa profil tidak bisa dicocokkan ke program → Gemini
+        if rute["intent"] != "llm" and (profil_skor or self.katalog is None):
+            skor = None
+            if profil_skor:
+                skor = self.skor_lengkap(profil_skor["nilai"], profil_skor.get("minat") or [], profil_skor.get("toleransi"))
+            jawaban = jawab_lokal(rute, profil_skor, skor)
+        self.router.catat(sesi_id, pertanyaan, rute, jawaban is not None)
+        return jawaban
+
+    def jawab(self, sesi_id: str, ringkasan_profil: str, pertanyaan: str, lampiran_id: str = None,
+              profil_jawaban: str = PROFIL_DEFAULT, profil_skor: dict = None) -> str:
+        return "".join(
+            self.alirkan_jawaban(sesi_id, ringkasan_profil, pertanyaan, lampiran_id, profil_jawaban, profil_skor)
+        )
+
+    def alirkan_jawaban(self, sesi_id: str, ringkasan_profil: str, pertanyaan: str, lampiran_id: str = None,
+                        profil_jawaban: str = PROFIL_DEFAULT, profil_skor: dict = None):
+        """
+        Seperti `jawab`, tetapi menghasilkan potongan teks selama model menulis.
+        profil_skor: {nilai, minat, toleransi} (opsional) untuk jawaban lokal router intent.
+        """
+        jawaban = self._jawab_lokal(sesi_id, pertanyaan, profil_skor)
+        if jawaban is not None:
+            yield jawaban
+            return
+        if not self.pemutus.boleh():
+            self._catat_darurat("jawaban_darurat")
+            yield PESAN_CHAT_LURING if LURING else PESAN_CHAT_DARURAT
+            return
+
+        # Pesan baru di sesi yang sama menggantikan jawaban yang masih dialirkan
+        aktif = self.tenggat.mulai(sesi_id, "chat", TENGGAT_CHAT)
+        # Berhenti tanpa pengecualian = pembaca pergi (rerun Streamlit, tab ditutup)
+        status = DIBATALKAN
+        try:
+            with dalam(aktif):
+                konteks = self._konteks_chat(sesi_id, ringkasan_profil, pertanyaan, lampiran_id)
+            aktif.periksa("retrieval")
+            prompt = prompt_pertanyaan(pertanyaan, konteks, ambil_profil(profil_jawaban)["arahan"])
+            aliran = self.cache_konteks.alirkan(sesi_id, prompt, konfigurasi_generasi(profil_jawaban))
+            yield from iterasi(aktif, aliran, "generasi")
+            status = SELESAI
+        except PermintaanDihentikan as e:
+            status = e.status
+            if isinstance(e, WaktuHabis):
+                self.pemutus.gagal()
+                yield f"\n\n{PESAN_WAKTU_HABIS}"
+            return
+        except JawabanTidakLengkap:
+            # Kandidat kosong (mis. batas token habis) bukan gangguan layanan
+            status = GAGAL
+            yield PESAN_JAWABAN_KOSONG
+            return
+        except Exception:
+            status = HABIS_WAKTU if aktif.lewat else GAGAL
+            self.pemutus.gagal()
+            raise
+        finally:
+            self.tenggat.selesai(aktif, status)
+        self.pemutus.berhasil()
+
+    # ---- sesi & statistik -------------------------------------------------------------
+    def hapus_sesi(self, sesi_id: str):
+        # Hentikan chat, pengindeksan, dan rekomendasi susulan yang masih berjalan
+        self.tenggat.batalkan_sesi(sesi_id)
+        self.cache_konteks.hapus(sesi_id)
+        with self._lock:
+            self._susulan.pop(sesi_id, None)
+        if self.penyimpanan is not None:
+            self.penyimpanan.hapus_status(f"susulan:{sesi_id}")
+
+    def tutup(self):
+        """
+        Lepaskan sumber daya mesin (thread LLM, cache konteks Gemini, retriever terbuka).
+        Dipanggil saat proses/worker berhenti; mesin tidak dipakai lagi setelahnya.
+        """
+        self._pelaksana_llm.shutdown(wait=False, cancel_futures=True)
+        self.cache_konteks.tutup()
+        with self._lock:
+            self._retriever.clear()
+            self._susulan.clear()
+
+    def statistik(self, sesi_id: str = None) -> dict:
+        return {
+            "indeks_profil": self.indeks_profil.statistik(),
+            "cache_konteks": self.cache_konteks.statistik(sesi_id),
+            "mode_darurat": {**self._statistik_darurat, "pemutus": self.pemutus.statistik()},
+            "router": self.router.statistik() if self.router is not None else None,
+            "embedding": self.embeddings.statistik(),
+            "tenggat": self.tenggat.statistik(),
+            "ocr": statistik_ocr(),
+            "normalisasi": dict(self._statistik_normalisasi),
+        }
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Mode darurat: rekomendasi lokal tanpa Gemini + pemutus sirkuit.
+
+Saat Gemini lambat, kena batas kuota, atau tidak tersedia, siswa tetap mendapat
+rekomendasi yang berguna dalam sekejap: 5 besar pemetaan berbasis aturan, kontribusi
+tiap mapel ke skor bidang, deskripsi singkat bidang, dan templat rencana 90 hari dari
+tabel lokal. Keluarannya berbentuk data rekomendasi terstruktur
+(`penasihat.format_jawaban`) sehingga dirender dengan templat yang sama.
+
+Mode ini aktif otomatis jika panggilan Gemini melewati batas waktu atau pemutus
+sirkuit terbuka (beberapa kegagalan beruntun). Selama terbuka, panggilan ke Gemini
+langsung dilewati; satu panggilan percobaan diizinkan setiap jeda untuk menguji
+apakah layanan sudah pulih.
+
+Diatur lewat environment variable:
+    PENASIHAT_BATAS_WAKTU_LLM   batas waktu rekomendasi awal sebelum mode darurat (default 20 detik)
+    PENASIHAT_PEMUTUS_AMBANG    kegagalan beruntun sebelum pemutus terbuka (default 3)
+    PENASIHAT_PEMUTUS_JEDA      detik sebelum panggilan percobaan berikutnya (default 30)
+"""
+
+import os
+import threading
+import time
+
+from penasihat.format_jawaban import ambil_profil
+from penasihat.pemetaan import BIDANG_INTENSIF_MTK, MAPEL_ALIAS, PETA_BOBOT
+
+BATAS_WAKTU_LLM = float(os.environ.get("PENASIHAT_BATAS_WAKTU_LLM", "20"))
+AMBANG_PEMUTUS = int(os.environ.get("PENASIHAT_PEMUTUS_AMBANG", "3"))
+JEDA_PEMUTUS = float(os.environ.get("PENASIHAT_PEMUTUS_JEDA", "30"))
+# Mode luring (preset "offline"): Gemini tidak pernah dipanggil, semua jawaban rule-based/lokal
+LURING = os.environ.get("PENASIHAT_LURING", "0") == "1"
+
+PESAN_CHAT_DARURAT = (
+    "⚠️ Penasihat AI sedang tidak tersedia atau sangat lambat, jadi pertanyaan ini belum bisa dijawab. "
+    "Rekomendasi berbasis aturan di atas tetap berlaku; coba kirim pertanyaanmu lagi dalam beberapa saat."
+)
+CATATAN_DARURAT = (
+    "Disusun otomatis dari pemetaan berbasis aturan karena penasihat AI sedang lambat atau tidak tersedia. "
+    "Jawaban AI akan menggantikan ringkasan ini jika tiba."
+)
+# Pemutus terbuka / Gemini gagal: tidak ada jawaban AI yang menyusul
+CATATAN_SIRKUIT_TERBUKA = (
+    "Disusun otomatis dari pemetaan berbasis aturan karena penasihat AI sedang tidak tersedia. "
+    "Analisis ulang profilmu beberapa saat lagi untuk mendapatkan rekomendasi AI."
+)
+PESAN_CHAT_LURING = (
+    "📴 Aplikasi berjalan dalam mode luring, jadi hanya pertanyaan sederhana (bidang teratas, skor, "
+    "perbandingan bidang) yang bisa dijawab. Rekomendasi berbasis aturan di atas tetap berlaku."
+)
+CATATAN_LURING = "Disusun otomatis dari pemetaan berbasis aturan (mode luring, tanpa penasihat AI)."
+
+# Deskripsi singkat + templat rencana 90 hari per bidang (tanpa menyebut institusi)
+TABEL_BIDANG = {
+    "Kedokteran": (
+        "mempelajari tubuh manusia, penyakit, dan penanganannya; padat hafalan dan praktik klinis",
+        ["Perdalam Biologi sel, sistem organ, dan genetika", "Latihan soal Kimia organik dasar",
+         "Ikut PMR atau kegiatan kesehatan sekolah"],
+    ),
+    "Farmasi": (
+        "meracik, menguji, dan memahami kerja obat; kuat di Kimia dan laboratorium",
+        ["Perdalam Kimia organik dan stoikiometri", "Buat proyek mini uji kandungan bahan alami sederhana",
+         "Ikut KIR atau lomba sains bidang Kimia"],
+    ),
+    "Keperawatan": (
+        "merawat dan mendampingi pasien; memadukan sains kesehatan dan komunikasi",
+        ["Perdalam Biologi sistem tubuh manusia", "Latih komunikasi empatik lewat kegiatan sosial",
+         "Ikut PMR atau pelatihan pertolongan pertama"],
+    ),
+    "Teknik Informatika / Ilmu Komputer": (
+        "merancang algoritma dan perangkat lunak; banyak logika dan Matematika diskrit",
+        ["Kuasai dasar pemrograman (Python) dan logika algoritma", "Bangun proyek mini: aplikasi atau web sederhana",
+         "Ikut ekskul robotik/coding atau lomba OSN Informatika"],
+    ),
+    "Data Science / AI": (
+        "mengolah data dan membangun model prediksi; memadukan statistik dan pemrograman",
+        ["Perdalam statistika dan peluang", "Proyek mini analisis data nyata (mis. data sekolah) dengan Python",
+         "Ikut kompetisi data/AI tingkat pelajar"],
+    ),
+    "Teknik Sipil": (
+        "merancang dan membangun infrastruktur; banyak Fisika mekanika dan perhitungan struktur",
+        ["Perdalam Fisika mekanika (gaya, momen, kesetimbangan)", "Buat maket jembatan stik dan uji bebannya",
+         "Ikut lomba rancang bangun atau ekskul teknik"],
+    ),
+    "Teknik Lingkungan / HSE": (
+        "mengelola air, limbah, dan keselamatan kerja; memadukan Kimia, Biologi, dan Geografi",
+        ["Perdalam Kimia larutan dan pencemaran", "Proyek mini pengukuran kualitas air/sampah di lingkungan sekolah",
+         "Ikut ekskul pecinta alam atau program Adiwiyata"],
+    ),
+    "Teknik Industri": (
+        "mengoptimalkan sistem produksi dan layanan; memadukan Matematika, statistik, dan manajemen",
+        ["Perdalam Matematika (fungsi, statistika)", "Proyek mini: petakan dan perbaiki alur antrean kantin",
+         "Ikut lomba karya tulis atau bisnis/inovasi"],
+    ),
+    "Arsitektur": (
+        "merancang bangunan dan ruang; memadukan kreativitas, gambar, dan perhitungan",
+        ["Latih sketsa bangunan dan gambar perspektif", "Buat maket ruang sederhana atau desain 3D dasar",
+         "Ikut lomba desain atau ekskul seni rupa"],
+    ),
+    "Perencanaan Wilayah & Kota": (
+        "merencanakan tata ruang kota dan wilayah; banyak data geografis dan kebijakan",
+        ["Perdalam Geografi (peta, tata guna lahan)", "Proyek mini: amati dan petakan masalah lalu lintas/ruang di sekitarmu",
+         "Ikut lomba esai atau olimpiade Geografi"],
+    ),
+    "Manajemen/Marketing": (
+        "mengelola organisasi, produk, dan pemasaran; banyak komunikasi dan analisis pasar",
+        ["Perdalam Ekonomi mikro dasar", "Jalankan usaha kecil (mis. bazar) dan catat hasilnya",
+         "Ikut OSIS atau lomba rencana bisnis"],
+    ),
+    "Akuntansi/Keuangan": (
+        "mencatat, menganalisis, dan merencanakan keuangan; teliti dan kuantitatif",
+        ["Perdalam siklus akuntansi dan laporan keuangan", "Proyek mini: susun laporan keuangan kegiatan kelas",
+         "Ikut lomba akuntansi atau olimpiade Ekonomi"],
+    ),
+    "Hukum": (
+        "memahami aturan, hak, dan penyelesaian sengketa; banyak membaca dan berargumen",
+        ["Perbanyak membaca teks argumentatif dan latihan menulis esai", "Pelajari kasus hukum sederhana dan diskusikan",
+         "Ikut debat atau simulasi sidang"],
+    ),
+    "Psikologi": (
+        "mempelajari perilaku dan proses mental manusia; memadukan sains sosial dan statistik",
+        ["Perdalam Sosiologi dan dasar statistika", "Proyek mini: survei kecil tentang kebiasaan belajar teman",
+         "Ikut kegiatan konseling sebaya atau relawan sosial"],
+    ),
+    "Ilmu Komunikasi": (
+        "menyusun dan menyampaikan pesan lewat media; banyak menulis, berbicara, dan produksi konten",
+        ["Latih menulis artikel dan berbicara di depan umum", "Buat konten (podcast/video) bertema sekolah",
+         "Ikut jurnalistik sekolah atau lomba pidato"],
+    ),
+    "HI (Hubungan Internasional)": (
+        "mempelajari politik, diplomasi, dan isu global; kuat di bahasa dan sejarah",
+        ["Perdalam B. Inggris dan sejarah dunia", "Ikuti dan rangkum isu global setiap minggu",
+         "Ikut Model United Nations atau debat bahasa Inggris"],
+    ),
+    "Sastra/Filologi": (
+        "mengkaji bahasa, teks, dan karya sastra; banyak membaca dan menulis",
+        ["Perbanyak membaca karya sastra dan menulis ulasan", "Proyek mini: antologi cerpen/puisi kelas",
+         "Ikut lomba menulis atau ekskul teater"],
+    ),
+    "DKV/Desain": (
+        "merancang komunikasi visual: ilustrasi, tipografi, dan media digital",
+        ["Latih gambar dan dasar desain grafis", "Buat portofolio 5-10 karya (poster, logo, ilustrasi)",
+         "Ikut lomba poster atau ekskul seni/multimedia"],
+    ),
+}
+
+
+class PemutusSirkuit:
+    """
+    Pemutus sirkuit sederhana untuk panggilan Gemini (aman dipakai dari banyak thread).
+
+    Tertutup: semua panggilan diizinkan. Setelah `ambang` kegagalan beruntun pemutus
+    terbuka dan panggilan ditolak, kecuali satu panggilan percobaan setiap `jeda` detik.
+    Percobaan yang berhasil menutup kembali pemutus. Dengan `luring=True` pemutus
+    selalu terbuka tanpa percobaan.
+    """
+
+    def __init__(self, ambang: int = AMBANG_PEMUTUS, jeda: float = JEDA_PEMUTUS, luring: bool = LURING):
+        self.ambang = max(1, ambang)
+        self.jeda = jeda
+        self.luring = luring
+        self._lock = threading.Lock()
+        self._gagal_beruntun = 0
+        self._dibuka_pada = None
+        self._statistik = {"ditolak": 0, "dibuka": 0}
+
+    @property
+    def terbuka(self) -> bool:
+        with self._lock:
+            return self.luring or self._dibuka_pada is not None
+
+    def boleh(self) -> bool:
+        """Apakah panggilan boleh dikirim (termasuk satu percobaan saat pemutus terbuka)."""
+        with self._lock:
+            if self.luring:
+                self._statistik["ditolak"] += 1
+                return False
+            if self._dibuka_pada is None:
+                return True
+            sekarang = time.monotonic()
+            if sekarang - self._dibuka_pada >= self.jeda:
+                self._dibuka_pada = sekarang  # satu percobaan per jeda
+                return True
+            self._statistik["ditolak"] += 1
+            return False
+
+    def berhasil(self):
+        with self._lock:
+            self._gagal_beruntun = 0
+            self._dibuka_pada = None
+
+    def gagal(self):
+        with self._lock:
+            self._gagal_beruntun += 1
+            if self._dibuka_pada is not None:
+                self._dibuka_pada = time.monotonic()
+            elif self._gagal_beruntun >= self.ambang:
+                self._dibuka_pada = time.monotonic()
+                self._statistik["dibuka"] += 1
+
+    def statistik(self) -> dict:
+        with self._lock:
+            return {
+                **self._statistik,
+                "status": "luring" if self.luring else ("terbuka" if self._dibuka_pada is not None else "tertutup"),
+                "gagal_beruntun": self._gagal_beruntun,
+            }
+
+
+def kontribusi_mapel(nilai: dict, bidang: str) -> list:
+    """Kontribusi tiap mapel ke skor dasar bidang: list (mapel, nilai, bobot), terbesar dulu."""
+    hasil = []
+    for mapel, bobot in PETA_BOBOT.get(bidang, {}).items():
+        v = nilai.get(MAPEL_ALIAS.get(mapel, mapel), 0)
+        hasil.append((mapel, v, bobot))
+    return sorted(hasil, key=lambda x: x[1] * x[2], reverse=True)
+
+
+def _alasan(bidang: str, skor: float, profil: dict) -> str:
+    kontribusi = kontribusi_mapel(profil["nilai"], bidang)
+    deskripsi = TABEL_BIDANG.get(bidang, ("", []))[0]
+    if not kontribusi:
+        return f"Skor pemetaan {skor:.1f}." + (f" Bidang ini {deskripsi}." if deskripsi else "")
+    rincian = ", ".join(f"{m} {v:g}×{b:g}" for m, v, b in kontribusi[:3])
+    alasan = f"Skor pemetaan {skor:.1f}, terutama dari {rincian}"
+    if profil.get("minat"):
+        alasan += f"; minat: {', '.join(profil['minat'])}"
+    alasan += "."
+    if deskripsi:
+        alasan += f" Bidang ini {deskripsi}."
+    return alasan
+
+
+def rekomendasi_darurat(profil: dict, skor: dict, top5: list, nama_profil: str = None,
+                        susulan: bool = False) -> dict:
+    """
+    Data rekomendasi terstruktur (skema `format_jawaban`) dari hasil pemetaan saja.
+    profil: dict {nilai, minat, toleransi, ...}; skor: skor SEMUA bidang/program (bukan
+    hanya 5 teratas) agar alternatif bisa diambil dari kandidat berikutnya.
+    susulan: True jika jawaban Gemini masih ditunggu (batas waktu), sehingga catatannya
+    menjanjikan pengganti; jalur pemutus terbuka/gagal memakai `CATATAN_SIRKUIT_TERBUKA`.
+    """
+    batas = ambil_profil(nama_profil)["batas_daftar"]
+    bidang = [{"nama": b, "alasan": _alasan(b, skor.get(b, 0.0), profil)} for b in top5[:batas["bidang"]]]
+
+    # Alternatif: kandidat berikutnya, diutamakan yang berbeda intensitas Matematikanya
+    sisa = [b for b in sorted(skor, key=skor.get, reverse=True) if b not in top5[:batas["bidang"]]]
+    intensif = bool(top5) and top5[0] in BIDANG_INTENSIF_MTK
+    beda = [b for b in sisa if (b in BIDANG_INTENSIF_MTK) != intensif]
+    alternatif = []
+    if beda:
+        arah = "kurang" if intensif else "lebih"
+        alternatif.append(f"{beda[0]} — jalur yang {arah} intensif Matematika.")
+    alternatif += [f"{b} — kandidat berikutnya menurut pemetaan." for b in sisa if b not in beda[:1]]
+    alternatif = alternatif[:batas["alternatif"]]
+
+    # Rencana 90 hari: langkah templat bergiliran dari bidang teratas
+    templat = [TABEL_BIDANG[b["nama"]][1] for b in bidang if b["nama"] in TABEL_BIDANG]
+    rencana = []
+    for i in range(max((len(t) for t in templat), default=0)):
+        rencana += [t[i] for t in templat if i < len(t) and t[i] not in rencana]
+    if not rencana:
+        rencana = ["Perdalam mapel dengan kontribusi terbesar pada bidang teratasmu",
+                   "Cari proyek mini atau ekskul yang terkait bidang tersebut"]
+    return {
+        "bidang": bidang,
+        "alternatif": alternatif,
+        "rencana_90_hari": rencana[:batas["rencana_90_hari"]],
+        "catatan": CATATAN_LURING if LURING else CATATAN_DARURAT if susulan else CATATAN_SIRKUIT_TERBUKA,
+    }
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Normalisasi teks lampiran sebelum dipotong dan di-embed.
+
+Teks hasil ekstraksi rapor penuh pengulang: kop sekolah dan judul yang dicetak ulang
+di setiap halaman, nomor halaman, blok tanda tangan wali kelas/kepala sekolah, garis
+isian, dan deretan spasi. Semuanya ikut dipotong dan di-embed sehingga jumlah
+potongan, biaya embedding, dan token prompt membengkak. Tahap ini dijalankan di antara
+ekstraksi dan `RecursiveCharacterTextSplitter`:
+
+1. Baris berulang antar-halaman: baris di beberapa baris teratas/terbawah halaman yang
+   muncul di sebagian besar halaman dibuang ("Halaman 2 dari 5" dan "Halaman 3 dari 5"
+   dianggap sama). Hanya baris di tepi halaman itu yang dibuang; baris yang sama di
+   tengah halaman (mis. baris tabel nilai yang kebetulan mirip kop) tetap dipertahankan.
+   Judul bagian rapor ("Semester 2", "Nilai Mata Pelajaran") dan baris yang menyebut
+   mapel tidak pernah dibuang karena dipakai pemotong untuk metadata.
+2. Spasi: spasi/tab beruntun menjadi satu, baris kosong beruntun menjadi satu.
+3. Blok berinformasi rendah: blok tanpa huruf/angka (garis, titik-titik isian), blok
+   yang hampir seluruhnya tanda baca, nomor halaman, dan blok tanda tangan pendek
+   ("Mengetahui, Kepala Sekolah ... NIP ...") yang sebagian besar barisnya berisi kata
+   kunci tanda tangan. Blok yang memuat judul bagian, mapel, atau identitas siswa
+   ("Nama Siswa", "NISN") tidak pernah dibuang meskipun menyebut wali kelas/NIP.
+
+Halaman dipisah dengan form feed (`PEMISAH_HALAMAN`) oleh ekstraktor PDF; dokumen tanpa
+pemisah (DOCX/TXT) diperlakukan sebagai satu halaman sehingga hanya langkah 2-3 berlaku.
+
+Laporan menghitung yang dibuang selama normalisasi itu sendiri; jumlah potongan yang
+tidak jadi dibuat diperkirakan dari karakter yang dibuang (langkah efektif pemotong =
+ukuran potongan - tumpang tindih), tanpa memotong teks mentah hanya untuk pembanding.
+
+Diatur lewat environment variable:
+    PENASIHAT_NORMALISASI              1 = aktif (default), 0 = teks dipotong apa adanya
+    PENASIHAT_AMBANG_BARIS_BERULANG    fraksi halaman minimal agar baris dianggap berulang (default 0.5)
+"""
+
+import os
+import re
+
+from penasihat.pemotong_rapor import TUMPANG_TINDIH, UKURAN_POTONGAN, adalah_judul_bagian, menyebut_mapel
+
+NORMALISASI_AKTIF = os.environ.get("PENASIHAT_NORMALISASI", "1") == "1"
+AMBANG_BARIS_BERULANG = float(os.environ.get("PENASIHAT_AMBANG_BARIS_BERULANG", "0.5"))
+PEMISAH_HALAMAN = "\f"
+# Baris teratas/terbawah tiap halaman yang diperiksa sebagai kop/kaki halaman
+BARIS_TEPI = 4
+# Blok tanda tangan yang lebih panjang dari ini dianggap berisi informasi lain
+PANJANG_MAKS_TANDA_TANGAN = 300
+# Rasio minimal huruf/angka terhadap karakter bukan spasi
+RASIO_MIN_ALFANUMERIK = 0.3
+
+POLA_SPASI = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u3000\ufeff]+")
+POLA_BARIS_KOSONG = re.compile(r"\n{3,}")
+POLA_NOMOR_HALAMAN = re.compile(
+    r"^\s*(?:(?:halaman|hal\.?|page)\s*\d+(?:\s*(?:dari|of|/)\s*\d+)?|-\s*\d+\s*-)\s*$", re.IGNORECASE
+)
+POLA_TANDA_TANGAN = re.compile(
+    r"\b(mengetahui|tanda tangan|ttd|nip|nuptk|kepala sekolah|wali kelas|orang tua|wali murid)\b",
+    re.IGNORECASE,
+)
+# Identitas siswa: blok yang memuatnya bukan blok tanda tangan
+POLA_IDENTITAS = re.compile(r"\b(nama|nisn|nis|no\.? induk|nomor induk)\b", re.IGNORECASE)
+
+
+def _kunci_baris(baris: str) -> str:
+    if POLA_NOMOR_HALAMAN.match(baris):
+        return "#nomor-halaman"
+    return POLA_SPASI.sub(" ", baris).strip().lower()
+
+
+def _terlindungi(baris: str) -> bool:
+    return adalah_judul_bagian(baris) or menyebut_mapel(baris)
+
+
+def _indeks_tepi(baris: list) -> set:
+    """Indeks BARIS_TEPI baris tidak kosong teratas dan terbawah halaman."""
+    isi = [i for i, b in enumerate(baris) if b.strip()]
+    return set(isi[:BARIS_TEPI] + isi[-BARIS_TEPI:])
+
+
+def _baris_berulang(halaman: list) -> set:
+    """Kunci baris kop/kaki yang muncul di tepi ≥ AMBANG_BARIS_BERULANG halaman."""
+    if len(halaman) < 2:
+        return set()
+    hitungan = {}
+    for teks in halaman:
+        baris = teks.splitlines()
+        for kunci in {_kunci_baris(baris[i]) for i in _indeks_tepi(baris)}:
+            hitungan[kunci] = hitungan.get(kunci, 0) + 1
+    minimal = max(2, AMBANG_BARIS_BERULANG * len(halaman))
+    return {k for k, n in hitungan.items() if n >= minimal}
+
+
+def _informasi_rendah(blok: str) -> bool:
+    padat = re.sub(r"\s", "", blok)
+    alfanumerik = sum(c.isalnum() for c in padat)
+    if not alfanumerik:
+        return True
+    if len(padat) > 10 and alfanumerik / len(padat) < RASIO_MIN_ALFANUMERIK:
+        return True
+    baris = [b for b in blok.splitlines() if b.strip()]
+    if all(POLA_NOMOR_HALAMAN.match(b) for b in baris):
+        return True
+    if len(blok) > PANJANG_MAKS_TANDA_TANGAN or POLA_IDENTITAS.search(blok):
+        return False
+    if any(_terlindungi(b.strip()) for b in baris):
+        return False
+    # Blok tanda tangan: lebih dari separuh barisnya berisi kata kunci tanda tangan
+    return 2 * sum(bool(POLA_TANDA_TANGAN.search(b)) for b in baris) > len(baris)
+
+
+def normalisasi(teks: str) -> tuple:
+    """
+    Bersihkan teks hasil ekstraksi. Hasil: (teks_bersih, laporan) dengan laporan berisi
+    karakter_awal, karakter_akhir, karakter_dihapus, baris_berulang, blok_dibuang, dan
+    potongan_dihapus (perkiraan).
+    """
+    halaman = teks.split(PEMISAH_HALAMAN)
+    berulang = _baris_berulang(halaman)
+    baris_dibuang = 0
+    bersih = []
+    for isi in halaman:
+        baris_halaman = []
+        semua_baris = isi.splitlines()
+        tepi = _indeks_tepi(semua_baris) if berulang else ()
+        for i, baris in enumerate(semua_baris):
+            if i in tepi and _kunci_baris(baris) in berulang and not _terlindungi(baris.strip()):
+                baris_dibuang += 1
+                continue
+            baris_halaman.append(POLA_SPASI.sub(" ", baris).strip())
+        bersih.append("\n".join(baris_halaman))
+
+    blok_dibuang = 0
+    blok_tersisa = []
+    for blok in POLA_BARIS_KOSONG.sub("\n\n", "\n\n".join(bersih)).split("\n\n"):
+        if not blok.strip():
+            continue
+        if _informasi_rendah(blok):
+            blok_dibuang += 1
+            continue
+        blok_tersisa.append(blok.strip("\n"))
+    hasil = "\n\n".join(blok_tersisa)
+    dihapus = len(teks) - len(hasil)
+    return hasil, {
+        "karakter_awal": len(teks),
+        "karakter_akhir": len(hasil),
+        "karakter_dihapus": dihapus,
+        "baris_berulang": baris_dibuang,
+        "blok_dibuang": blok_dibuang,
+        "potongan_dihapus": max(0, dihapus) // max(1, UKURAN_POTONGAN - TUMPANG_TINDIH),
+    }
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+OCR untuk halaman PDF hasil scan (rapor yang berupa gambar).
+
+Halaman tanpa teks dirasterisasi dengan PyMuPDF lalu dibaca oleh Tesseract (CPU) di
+pool proses, satu halaman per tugas. Hasil disimpan di cache disk berdasarkan hash
+gambar halaman sehingga unggahan ulang atau template rapor sekolah yang sama tidak
+di-OCR dua kali. DPI, batas halaman, dan batas waktu bisa diatur lewat environment
+variable agar latensi worker tetap terjaga. Tenggat permintaan yang aktif
+(`penasihat.tenggat`) diperiksa di antara halaman, sehingga unggahan yang dibatalkan
+tidak menunggu OCR sisa halaman. Jumlah halaman per hasil ada di `statistik_ocr()`
+(ditampilkan di `MesinPenasihat.statistik()["ocr"]`).
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as BatasWaktuFuture
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from penasihat import tenggat
+
+# Mesin OCR bersifat opsional: tanpa pytesseract/Tesseract, PDF scan dilewati seperti sebelumnya
+try:
+    try:
+        import pymupdf
+    except ImportError:  # PyMuPDF < 1.24
+        import fitz as pymupdf
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pymupdf = None
+    pytesseract = None
+
+DPI_OCR = int(os.environ.get("PENASIHAT_OCR_DPI", "200"))
+MAKS_HALAMAN_OCR = int(os.environ.get("PENASIHAT_OCR_MAKS_HALAMAN", "20"))
+BATAS_WAKTU_HALAMAN = float(os.environ.get("PENASIHAT_OCR_BATAS_WAKTU_HALAMAN", "30"))
+BATAS_WAKTU_TOTAL = float(os.environ.get("PENASIHAT_OCR_BATAS_WAKTU_TOTAL", "120"))
+BAHASA_OCR = os.environ.get("PENASIHAT_OCR_BAHASA", "ind+eng")
+PEKERJA_OCR = int(os.environ.get("PENASIHAT_OCR_PEKERJA", str(max(1, (os.cpu_count() or 2) // 2))))
+DIREKTORI_CACHE_OCR = os.environ.get("PENASIHAT_DIR_CACHE_OCR", ".cache_ocr")
+# Halaman dengan teks lebih pendek dari ini dianggap hasil scan
+MINIMAL_KARAKTER = 20
+
+_pool = None
+_lock_pool = threading.Lock()
+_tersedia = None
+_statistik = {"halaman_ocr": 0, "hit_cache": 0, "habis_waktu": 0, "gagal": 0, "dilewati": 0}
+_lock_statistik = threading.Lock()
+
+
+def ocr_tersedia() -> bool:
+    """True jika PyMuPDF, pytesseract, dan biner Tesseract tersedia (dicek sekali)."""
+    global _tersedia
+    if _tersedia is None:
+        try:
+            _tersedia = pymupdf is not None and pytesseract is not None and bool(pytesseract.get_tesseract_version())
+        except Exception:
+            _tersedia = False
+    return _tersedia
+
+
+def statistik_ocr() -> dict:
+    """Halaman di-OCR, hit cache, habis waktu, gagal, dan dilewati (kumulatif per proses)."""
+    with _lock_statistik:
+        return dict(_statistik)
+
+
+def _catat(kunci: str, jumlah: int = 1):
+    with _lock_statistik:
+        _statistik[kunci] += jumlah
+
+
+def halaman_tanpa_teks(teks_halaman) -> list:
+    """Indeks halaman yang (hampir) tidak punya lapisan teks."""
+    return [i for i, t in enumerate(teks_halaman) if len((t or "").strip()) < MINIMAL_KARAKTER]
+
+
+def _pool_ocr() -> ProcessPoolExecutor:
+    # "spawn" agar aman dipakai dari server Streamlit yang multi-thread
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PEKERJA_OCR, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool():
+    """Buang pool yang rusak (mis. proses pekerja mati) agar permintaan berikutnya membuat pool baru."""
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _ocr_gambar(png: bytes, bahasa: str, batas_waktu: float) -> str:
+    """Dijalankan di proses pekerja."""
+    return pytesseract.image_to_string(Image.open(io.BytesIO(png)), lang=bahasa, timeout=batas_waktu)
+
+
+def _jalur_cache(kunci: str) -> Path:
+    return Path(DIREKTORI_CACHE_OCR) / kunci[:2] / f"{kunci}.txt"
+
+
+def _baca_cache(kunci: str):
+    try:
+        return _jalur_cache(kunci).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _tulis_cache(kunci: str, teks: str):
+    jalur = _jalur_cache(kunci)
+    try:
+        jalur.parent.mkdir(parents=True, exist_ok=True)
+        sementara = jalur.with_suffix(f".{os.getpid()}.tmp")
+        sementara.write_text(teks, encoding="utf-8")
+        os.replace(sementara, jalur)
+    except OSError:
+        pass
+
+
+def ocr_halaman_pdf(data_pdf: bytes, indeks_halaman, dpi: int = DPI_OCR, maks_halaman: int = MAKS_HALAMAN_OCR,
+                    batas_waktu_total: float = BATAS_WAKTU_TOTAL) -> dict:
+    """
+    OCR halaman tertentu dari PDF. Mengembalikan dict {indeks_halaman: teks}.
+
+    Halaman di luar `maks_halaman` atau yang melewati batas waktu dilewati (tidak ada di hasil).
+    Tenggat permintaan aktif diperiksa sebelum tiap halaman; `PermintaanDihentikan`
+    diteruskan ke pemanggil setelah sisa tugas OCR dibatalkan.
+    """
+    if not ocr_tersedia() or not indeks_halaman:
+        return {}
+    indeks_halaman = list(indeks_halaman)
+    if len(indeks_halaman) > maks_halaman:
+        _catat("dilewati", len(indeks_halaman) - maks_halaman)
+        indeks_halaman = indeks_halaman[:maks_halaman]
+
+    aktif = tenggat.aktif()
+    hasil = {}
+    tugas = {}
+    try:
+        with pymupdf.open(stream=data_pdf, filetype="pdf") as dok:
+            for i in indeks_halaman:
+                _periksa(aktif)
+                png = dok[i].get_pixmap(dpi=dpi).tobytes("png")
+                kunci = hashlib.sha256(png + BAHASA_OCR.encode()).hexdigest()
+                teks = _baca_cache(kunci)
+                if teks is not None:
+                    _catat("hit_cache")
+                    hasil[i] = teks
+                    continue
+                try:
+                    tugas[i] = (kunci, _pool_ocr().submit(_ocr_gambar, png, BAHASA_OCR, BATAS_WAKTU_HALAMAN))
+                except BrokenProcessPool:
+                    _reset_pool()
+                    _catat("gagal")
+
+        batas = time.monotonic() + batas_waktu_total
+        for i, (kunci, future) in tugas.items():
+            try:
+                teks = _tunggu(future, batas, aktif)
+            except tenggat.PermintaanDihentikan:
+                raise
+            except BatasWaktuFuture:
+                future.cancel()
+                _catat("habis_waktu")
+                continue
+            except BrokenProcessPool:
+                _reset_pool()
+                _catat("gagal")
+                continue
+            except RuntimeError as e:
+                # pytesseract menghentikan proses Tesseract saat batas waktu per halaman terlampaui
+                _catat("habis_waktu" if "timeout" in str(e).lower() else "gagal")
+                continue
+            except Exception:
+                _catat("gagal")
+                continue
+            _catat("halaman_ocr")
+            _tulis_cache(kunci, teks)
+            hasil[i] = teks
+        return hasil
+    finally:
+        # Permintaan dihentikan → halaman yang belum dikerjakan tidak menghabiskan pekerja OCR
+        for _, future in tugas.values():
+            future.cancel()
+
+
+def _periksa(aktif):
+    if aktif is not None:
+        aktif.periksa("ocr")
+
+
+def _tunggu(future, batas: float, aktif, interval: float = 0.5):
+    """Hasil satu halaman; tenggat permintaan diperiksa tiap `interval` detik selama menunggu."""
+    while True:
+        _periksa(aktif)
+        sisa = batas - time.monotonic()
+        try:
+            return future.result(timeout=max(0.0, min(sisa, interval)))
+        except BatasWaktuFuture:
+            if sisa <= interval:
+                raise
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Pemanasan saat proses mulai + sinyal kesiapan.
+
+Tanpa pemanasan, siswa pertama di pod baru menanggung semua biaya awal: impor modul
+ekstraksi, penyiapan pemotong teks, inisialisasi chromadb pertama, dan jabat tangan TLS
+ke endpoint Gemini. Modul ini menjalankan semuanya sekali di awal proses: satu
+ekstraksi + pemotongan contoh rapor, satu indeks vektor datar dan satu koleksi Chroma
+sementara (masing-masing dengan satu embedding kecil), dan satu generasi 1 token ke
+backend yang dikonfigurasi. Tanpa API key dipakai embedding palsu lokal sehingga hanya
+sumber daya lokal yang dipanaskan.
+
+Kegagalan satu langkah dicatat tetapi tidak menahan kesiapan: mode darurat tetap bisa
+melayani siswa walau Gemini sedang bermasalah.
+
+Sinyal kesiapan:
+- Layanan API: `GET /siap` (503 sampai pemanasan selesai); `/kesehatan` tetap untuk liveness.
+- Streamlit: jalankan lewat modul ini agar pemanasan terjadi di proses yang sama sebelum
+  server dibuka, lalu berkas penanda `PENASIHAT_BERKAS_SIAP` ditulis:
+      python -m penasihat.pemanasan ai_penasihat_akademik.py [argumen streamlit...]
+  Probe orkestrator: `python -m penasihat.pemanasan --cek` (kode keluar 0 jika siap),
+  atau `/_stcore/health` Streamlit yang baru aktif setelah pemanasan selesai.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+BERKAS_SIAP = os.environ.get("PENASIHAT_BERKAS_SIAP", ".penasihat_siap")
+
+CONTOH_RAPOR = """Semester 1
+Nilai Mata Pelajaran
+Matematika 85
+Fisika 80
+Ekstrakurikuler
+Robotik - aktif
+"""
+
+# Modul berat yang diimpor di langkah pertama (waktunya ikut tercatat)
+MODUL_BERAT = (
+    "penasihat.mesin",
+    "penasihat.ekstraksi",
+    "penasihat.pemotong_rapor",
+    "penasihat.indeks_vektor",
+    "langchain_community.vectorstores",
+    "chromadb",
+)
+
+_lock = threading.Lock()
+_status = {"siap": False, "mulai": None, "selesai": None, "langkah": {}}
+_mesin_siap = {}  # api_key → mesin yang sudah dipanaskan di proses ini
+
+
+def status() -> dict:
+    with _lock:
+        return {**_status, "langkah": dict(_status["langkah"])}
+
+
+def siap() -> bool:
+    with _lock:
+        return _status["siap"]
+
+
+def mesin_terpanaskan(api_key: str):
+    """Mesin yang dibangun & dipanaskan saat proses mulai untuk API key ini, atau None."""
+    with _lock:
+        return _mesin_siap.get(api_key)
+
+
+def _chroma_sementara(embeddings):
+    from langchain_community.vectorstores import Chroma
+
+    vs = Chroma(collection_name=f"pemanasan-{uuid.uuid4().hex[:8]}", embedding_function=embeddings)
+    try:
+        vs.add_texts(["pemanasan"])
+        vs.similarity_search("pemanasan", k=1)
+    finally:
+        vs.delete_collection()
+
+
+def _indeks_datar_sementara(embeddings):
+    from penasihat.indeks_vektor import IndeksVektorDatar
+
+    IndeksVektorDatar.from_texts(["pemanasan"], embeddings).similarity_search("pemanasan", k=1)
+
+
+def panaskan(mesin=None, lapor=None) -> dict:
+    """Jalankan semua langkah pemanasan; hasil per langkah {detik, galat}."""
+
+    # Impor berat ditunda ke langkah ini agar probe `--cek` tetap ringan
+    def _impor():
+        for nama in MODUL_BERAT:
+            importlib.import_module(nama)
+
+    def _ekstraksi():
+        from penasihat.ekstraksi import ekstrak_berkas
+
+        ekstrak_berkas("pemanasan.txt", CONTOH_RAPOR.encode("utf-8"), "text/plain")
+
+    def _pemotong():
+        from penasihat.mesin import buat_dokumen_langchain
+        from penasihat.pemotong_rapor import potong_dokumen
+
+        potong_dokumen(buat_dokumen_langchain(CONTOH_RAPOR, "pemanasan.txt"))
+
+    if mesin is not None:
+        embeddings = mesin.embeddings
+    else:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+
+        embeddings = DeterministicFakeEmbedding(size=8)
+
+    langkah = [
+        ("impor", _impor),
+        ("ekstraksi", _ekstraksi),
+        ("pemotong", _pemotong),
+        ("indeks_datar", lambda: _indeks_datar_sementara(embeddings)),
+        ("chroma_embedding", lambda: _chroma_sementara(embeddings)),
+    ]
+    if mesin is not None and not mesin.pemutus.luring:
+        langkah.append(("generasi", mesin.cache_konteks.panaskan))
+
+    hasil = {}
+    for nama, fungsi in langkah:
+        mulai = time.perf_counter()
+        try:
+            fungsi()
+            galat = None
+        except Exception as e:
+            galat = str(e) or e.__class__.__name__
+        hasil[nama] = {"detik": round(time.perf_counter() - mulai, 3), "galat": galat}
+        if lapor:
+            lapor(nama, hasil[nama])
+    return hasil
+
+
+def mulai(mesin=None, api_key: str = None, lapor=None) -> dict:
+    """
+    Pemanasan proses ini lalu tandai siap. Jika `api_key` diberikan (tanpa `mesin`),
+    mesin dibangun di sini dan disimpan untuk dipakai ulang lewat `mesin_terpanaskan`.
+    """
+    with _lock:
+        _status.update(siap=False, mulai=time.time(), selesai=None, langkah={})
+    if BERKAS_SIAP:
+        Path(BERKAS_SIAP).unlink(missing_ok=True)
+
+    if mesin is None and api_key:
+        from penasihat.mesin import MesinPenasihat
+        from penasihat.penyimpanan_sesi import buat_penyimpanan_sesi
+
+        mesin = MesinPenasihat(api_key, penyimpanan=buat_penyimpanan_sesi())
+    langkah = panaskan(mesin, lapor)
+
+    with _lock:
+        if mesin is not None and api_key:
+            _mesin_siap[api_key] = mesin
+        _status.update(siap=True, selesai=time.time(), langkah=langkah)
+        hasil = {**_status}
+    if BERKAS_SIAP:
+        Path(BERKAS_SIAP).write_text(json.dumps(hasil, ensure_ascii=False), encoding="utf-8")
+    return hasil
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pemanasan proses penasihat (opsional lalu menjalankan Streamlit).")
+    parser.add_argument("--cek", action="store_true", help="Probe kesiapan: keluar 0 jika berkas penanda ada")
+    parser.add_argument("skrip", nargs="?", help="Skrip Streamlit yang dijalankan setelah pemanasan")
+    parser.add_argument("argumen_streamlit", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.cek:
+        sys.exit(0 if BERKAS_SIAP and Path(BERKAS_SIAP).exists() else 1)
+
+    # Dipanggil lewat `python -m`: pakai modul yang bisa diimpor agar status/mesin yang
+    # dipanaskan terlihat oleh skrip Streamlit di proses yang sama
+    from penasihat import pemanasan
+
+    hasil = pemanasan.mulai(
+        api_key=os.environ.get("GOOGLE_API_KEY"),
+        lapor=lambda nama, h: print(f"[pemanasan] {nama:<17} {h['detik']:.2f} dtk" + (f"  galat: {h['galat']}" if h["galat"] else "")),
+    )
+    print(f"[pemanasan] siap dalam {hasil['selesai'] - hasil['mulai']:.2f} dtk")
+    if args.skrip:
+        from streamlit.web import cli as stcli
+
+        sys.argv = ["streamlit", "run", args.skrip, *args.argumen_streamlit]
+        sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
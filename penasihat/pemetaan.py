@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Pemetaan berbasis aturan: mata pelajaran → jurusan/bidang.
+
+Tabel bobot dan pengali sengaja dibuat sederhana & transparan agar mudah
+disesuaikan dengan konteks sekolah/kurikulum. Hasil kalibrasi terhadap data lulusan
+(`python -m penasihat.kalibrasi`) bisa menggantikan bobot bawaan lewat
+environment variable `PENASIHAT_ATURAN` (jalur berkas aturan JSON).
+"""
+
+import json
+import os
+
+JALUR_ATURAN = os.environ.get("PENASIHAT_ATURAN")
+
+# Bobot per bidang (sederhana & transparan)
+PETA_BOBOT = {
+    "Kedokteran": {"Biologi": 3, "Kimia": 2, "B. Inggris": 1},
+    "Farmasi": {"Kimia": 3, "Biologi": 2, "Matematika": 1},
+    "Keperawatan": {"Biologi": 2, "B. Indonesia": 1, "B. Inggris": 1},
+    "Teknik Informatika / Ilmu Komputer": {"Matematika": 3, "TIK": 3, "Fisika": 1, "B. Inggris": 1},
+    "Data Science / AI": {"Matematika": 3, "TIK": 3, "B. Inggris": 1},
+    "Teknik Sipil": {"Matematika": 2, "Fisika": 2, "Geografi": 1},
+    "Teknik Lingkungan / HSE": {"Kimia": 2, "Biologi": 1, "Geografi": 2, "Fisika": 1},
+    "Teknik Industri": {"Matematika": 2, "Fisika": 2, "B. Inggris": 1},
+    "Arsitektur": {"Matematika": 2, "Fisika": 1, "B. Indonesia": 1},
+    "Perencanaan Wilayah & Kota": {"Geografi": 3, "Matematika": 1, "Sejarah": 1},
+    "Manajemen/Marketing": {"Ekonomi": 2, "B. Indonesia": 1, "B. Inggris": 1},
+    "Akuntansi/Keuangan": {"Akuntansi": 3, "Matematika": 2, "Ekonomi": 2},
+    "Hukum": {"B. Indonesia": 2, "Sejarah": 2, "Sosiologi": 1},
+    "Psikologi": {"Biologi": 1, "Sosiologi": 2, "Matematika": 1},
+    "Ilmu Komunikasi": {"B. Indonesia": 2, "B. Inggris": 1, "Sejarah": 1},
+    "HI (Hubungan Internasional)": {"B. Inggris": 2, "Sejarah": 2, "Sosiologi": 1},
+    "Sastra/Filologi": {"B. Indonesia": 2, "B. Inggris": 2},
+    "DKV/Desain": {"B. Indonesia": 1},  # kreatif → tidak dipetakan murni dari mapel; LLM akan menambah konteks
+}
+
+# Konversi label mapel
+MAPEL_ALIAS = {
+    "Matematika": "Matematika",
+    "Fisika": "Fisika",
+    "Kimia": "Kimia",
+    "Biologi": "Biologi",
+    "TIK": "TIK",
+    "Ekonomi": "Ekonomi",
+    "Akuntansi": "Akuntansi",
+    "Geografi": "Geografi",
+    "Sosiologi": "Sosiologi",
+    "Sejarah": "Sejarah",
+    "B. Indonesia": "B. Indonesia",
+    "B. Inggris": "B. Inggris",
+}
+
+# Bonus preferensi minat
+PREFERENSI_BONUS = {
+    "Kesehatan": ["Kedokteran", "Farmasi", "Keperawatan"],
+    "Sains": ["Farmasi", "Psikologi", "Data Science / AI"],
+    "Teknologi": ["Teknik Informatika / Ilmu Komputer", "Data Science / AI", "Teknik Industri"],
+    "Bisnis/Manajemen": ["Manajemen/Marketing", "Akuntansi/Keuangan"],
+    "Sosial/Humaniora": ["Hukum", "HI (Hubungan Internasional)", "Ilmu Komunikasi", "Sastra/Filologi", "Psikologi"],
+    "Seni/Desain": ["DKV/Desain", "Arsitektur"],
+    "Lingkungan": ["Teknik Lingkungan / HSE", "PWK (Perencanaan Wilayah & Kota)"],
+    "Hukum/Pemerintahan": ["Hukum", "HI (Hubungan Internasional)"],
+    "Komunikasi/Media": ["Ilmu Komunikasi", "DKV/Desain"],
+}
+BONUS_MINAT = 1.08  # bonus 8%
+
+# Penalti/tuning untuk Matematika
+BIDANG_INTENSIF_MTK = [
+    "Teknik Informatika / Ilmu Komputer", "Data Science / AI", "Teknik Sipil",
+    "Teknik Industri", "Arsitektur", "Akuntansi/Keuangan",
+]
+FAKTOR_TOLERANSI_MTK = {
+    "Rendah": 0.87,  # kurangi 13%
+    "Sedang": 1.0,
+    "Tinggi": 1.06,  # tambah 6%
+}
+
+
+def muat_aturan(jalur: str) -> dict:
+    """Baca berkas aturan hasil kalibrasi: peta_bobot, bonus_minat, faktor_toleransi_mtk."""
+    with open(jalur, encoding="utf-8") as f:
+        aturan = json.load(f)
+    kurang = [k for k in ("peta_bobot", "bonus_minat", "faktor_toleransi_mtk") if k not in aturan]
+    if kurang:
+        raise ValueError(f"Berkas aturan {jalur} tidak lengkap: {', '.join(kurang)}")
+    asing = set(aturan["peta_bobot"]) - set(PETA_BOBOT)
+    if asing:
+        raise ValueError(f"Bidang tidak dikenal di berkas aturan {jalur}: {', '.join(sorted(asing))}")
+    return aturan
+
+
+if JALUR_ATURAN:
+    # Bidang yang tidak ada di berkas aturan tetap memakai bobot bawaan
+    _aturan = muat_aturan(JALUR_ATURAN)
+    PETA_BOBOT = {**PETA_BOBOT, **_aturan["peta_bobot"]}
+    BONUS_MINAT = float(_aturan["bonus_minat"])
+    FAKTOR_TOLERANSI_MTK = {**FAKTOR_TOLERANSI_MTK, **_aturan["faktor_toleransi_mtk"]}
+
+
+def skor_bidang_dari_map(nilai, preferensi, toleransi_mtk):
+    """
+    Menghitung skor awal berbagai bidang berdasarkan kekuatan mata pelajaran + preferensi.
+    nilai: dict {mapel: skor 0-10}
+    preferensi: list bidang
+    toleransi_mtk: 'Rendah' | 'Sedang' | 'Tinggi'
+    """
+    skor = {k: 0.0 for k in PETA_BOBOT.keys()}
+
+    for bidang, bobot_mapel in PETA_BOBOT.items():
+        total = 0.0
+        for m, b in bobot_mapel.items():
+            # ambil nilai mapel
+            nm = MAPEL_ALIAS.get(m, m)
+            v = nilai.get(nm, 0)
+            total += b * v
+        skor[bidang] = total
+
+    for p in preferensi:
+        for bidang in PREFERENSI_BONUS.get(p, []):
+            if bidang in skor:
+                skor[bidang] *= BONUS_MINAT
+
+    faktor = FAKTOR_TOLERANSI_MTK.get(toleransi_mtk, 1.0)
+    if faktor != 1.0:
+        for bidang in BIDANG_INTENSIF_MTK:
+            skor[bidang] *= faktor
+
+    return skor
+
+
+def buat_ringkasan_profil(nama, tingkat, gaya_belajar, minat_bidang, toleransi_mtk, nilai_mapel):
+    ringkas = []
+    if nama:
+        ringkas.append(f"Nama: {nama}")
+    ringkas.append(f"Kelas: {tingkat}")
+    ringkas.append(f"Gaya belajar: {', '.join(gaya_belajar) if gaya_belajar else '-'}")
+    ringkas.append(f"Minat: {', '.join(minat_bidang) if minat_bidang else '-'}")
+    ringkas.append(f"Kenyamanan Matematika: {toleransi_mtk}")
+    ringkas.append(
+        "Skor Mapel: " + ", ".join([f"{k} {v}/10" for k, v in nilai_mapel.items()])
+    )
+    return "\n".join(ringkas)
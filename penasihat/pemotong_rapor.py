@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Pemotong dokumen yang mengenali struktur rapor + retriever berfilter metadata.
+
+Alih-alih memotong teks per 2000 karakter tanpa peduli isi, lampiran dipecah per bagian
+(semester, nilai mata pelajaran, ekstrakurikuler, sertifikat) dan setiap potongan diberi
+metadata. Saat menjawab, metadata yang tersirat di pertanyaan ("nilai Fisika semester 3",
+"ekskul apa saja") dipakai untuk menyaring kandidat sebelum pencarian vektor.
+Ringkasan profil siswa selalu disertakan tanpa perlu di-embed.
+"""
+
+import os
+import re
+from typing import Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+UKURAN_POTONGAN = int(os.environ.get("PENASIHAT_UKURAN_POTONGAN", "2000"))
+TUMPANG_TINDIH = int(os.environ.get("PENASIHAT_TUMPANG_TINDIH", "300"))
+K_DEFAULT = int(os.environ.get("PENASIHAT_K", "8"))
+# Baris yang lebih panjang dari ini dianggap isi, bukan judul bagian
+PANJANG_MAKS_JUDUL = 80
+
+BAGIAN_PROFIL = "profil"
+BAGIAN_UMUM = "umum"
+BAGIAN_NILAI = "nilai"
+BAGIAN_EKSKUL = "ekstrakurikuler"
+BAGIAN_SERTIFIKAT = "sertifikat"
+
+POLA_SEMESTER = re.compile(r"\bsemester\s*[:\-]?\s*(\d{1,2}|[ivx]{1,4})\b", re.IGNORECASE)
+POLA_EKSKUL = re.compile(r"\b(ekstra\s*kurikuler|ekskul|organisasi)\b", re.IGNORECASE)
+POLA_SERTIFIKAT = re.compile(r"\b(sertifikat|piagam|penghargaan|prestasi|lomba|olimpiade)\b", re.IGNORECASE)
+POLA_NILAI = re.compile(r"\b(nilai|mata pelajaran|capaian kompetensi|rapor|raport)\b", re.IGNORECASE)
+
+# kunci metadata → pola nama mapel di teks/pertanyaan
+ALIAS_MAPEL = {
+    "matematika": r"matematika|\bmtk\b",
+    "fisika": r"fisika",
+    "kimia": r"kimia",
+    "biologi": r"biologi",
+    "tik": r"informatika|\btik\b",
+    "ekonomi": r"ekonomi",
+    "akuntansi": r"akuntansi",
+    "geografi": r"geografi",
+    "sosiologi": r"sosiologi",
+    "sejarah": r"sejarah",
+    "b_indonesia": r"bahasa indonesia|b\.\s*indonesia",
+    "b_inggris": r"bahasa inggris|b\.\s*inggris|english",
+}
+_POLA_MAPEL = {k: re.compile(p, re.IGNORECASE) for k, p in ALIAS_MAPEL.items()}
+_ROMAWI = {"i": 1, "ii": 2, "iii": 3, "iv": 4, "v": 5, "vi": 6}
+
+
+def _angka_semester(teks: str) -> int:
+    teks = teks.lower()
+    if teks.isdigit():
+        return int(teks)
+    return _ROMAWI.get(teks, 0)
+
+
+def _metadata_mapel(teks: str) -> dict:
+    return {f"mapel_{k}": True for k, pola in _POLA_MAPEL.items() if pola.search(teks)}
+
+
+def _bagian_dari_judul(baris: str):
+    """Kembalikan (bagian, semester) jika baris adalah judul bagian, selain itu None."""
+    if len(baris) > PANJANG_MAKS_JUDUL:
+        return None
+    if POLA_EKSKUL.search(baris):
+        return BAGIAN_EKSKUL, None
+    if POLA_SERTIFIKAT.search(baris):
+        return BAGIAN_SERTIFIKAT, None
+    m = POLA_SEMESTER.search(baris)
+    if m:
+        return BAGIAN_NILAI, _angka_semester(m.group(1))
+    if POLA_NILAI.search(baris):
+        return BAGIAN_NILAI, None
+    return None
+
+
+def menyebut_mapel(teks: str) -> bool:
+    return any(pola.search(teks) for pola in _POLA_MAPEL.values())
+
+
+def adalah_judul_bagian(baris: str) -> bool:
+    """Apakah baris dikenali sebagai judul bagian (dipakai normalisasi agar tidak dibuang)."""
+    return _bagian_dari_judul(baris) is not None
+
+
+def _pecah_bagian(teks: str) -> list:
+    """Pecah teks menjadi list (bagian, semester, isi) sesuai judul-judul yang dikenali."""
+    bagian, semester = BAGIAN_UMUM, 0
+    hasil, baris_aktif = [], []
+    for baris in teks.splitlines():
+        judul = _bagian_dari_judul(baris.strip()) if baris.strip() else None
+        # Baris yang cocok dengan bagian yang sedang aktif (mis. "Juara 2 Olimpiade" di bawah
+        # judul "Sertifikat") tetap isi bagian tersebut, bukan awal bagian baru
+        if judul and judul[0] == bagian and judul[1] in (None, semester):
+            judul = None
+        if judul:
+            if any(b.strip() for b in baris_aktif):
+                hasil.append((bagian, semester, "\n".join(baris_aktif).strip()))
+            baris_aktif = []
+            bagian = judul[0]
+            if judul[1] is not None:
+                semester = judul[1]
+        baris_aktif.append(baris)
+    if any(b.strip() for b in baris_aktif):
+        hasil.append((bagian, semester, "\n".join(baris_aktif).strip()))
+    return hasil
+
+
+def _gabung_pendek(pecahan: list, ukuran: int) -> list:
+    """
+    Gabungkan pecahan (metadata, bagian, semester, isi) bersebelahan yang metadatanya sama
+    selama hasilnya muat dalam satu potongan, agar bagian pendek tidak jadi potongan sendiri.
+    """
+    hasil = []
+    for metadata, bagian, semester, isi in pecahan:
+        if hasil:
+            m, b, s, i = hasil[-1]
+            if (m, b, s) == (metadata, bagian, semester) and len(i) + 2 + len(isi) <= ukuran:
+                hasil[-1] = (m, b, s, i + "\n\n" + isi)
+                continue
+        hasil.append((metadata, bagian, semester, isi))
+    return hasil
+
+
+def potong_dokumen(dokumen, ukuran: int = UKURAN_POTONGAN, tumpang_tindih: int = TUMPANG_TINDIH):
+    """
+    Potong dokumen menurut struktur rapor.
+
+    Mengembalikan (dokumen_profil, potongan): dokumen profil tidak dipotong/di-embed,
+    potongan lampiran membawa metadata bagian, semester, dan mapel_<nama>=True. Bagian
+    pendek bersebelahan dengan metadata sama digabung sebelum dipotong.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=ukuran,
+        chunk_overlap=tumpang_tindih,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""],
+    )
+    profil, pecahan, potongan = [], [], []
+    for d in dokumen:
+        if d.metadata.get("bagian") == BAGIAN_PROFIL:
+            profil.append(d)
+            continue
+        pecahan += [(d.metadata, bagian, semester, isi) for bagian, semester, isi in _pecah_bagian(d.page_content)]
+    for dasar, bagian, semester, isi in _gabung_pendek(pecahan, ukuran):
+        teks_pecahan = [isi] if len(isi) <= ukuran else splitter.split_text(isi)
+        for teks in teks_pecahan:
+            metadata = dict(dasar)
+            metadata.update({"bagian": bagian, "semester": semester, "char_count": len(teks)})
+            metadata.update(_metadata_mapel(teks))
+            potongan.append(Document(page_content=teks, metadata=metadata))
+    return profil, potongan
+
+
+def filter_dari_pertanyaan(pertanyaan: str):
+    """Filter metadata (sintaks filter Chroma) yang tersirat dari pertanyaan, atau None."""
+    syarat = []
+    semester = sorted({_angka_semester(m.group(1)) for m in POLA_SEMESTER.finditer(pertanyaan)} - {0})
+    if len(semester) == 1:
+        syarat.append({"semester": semester[0]})
+    elif semester:
+        syarat.append({"$or": [{"semester": s} for s in semester]})
+
+    if POLA_EKSKUL.search(pertanyaan):
+        syarat.append({"bagian": BAGIAN_EKSKUL})
+    elif POLA_SERTIFIKAT.search(pertanyaan):
+        syarat.append({"bagian": BAGIAN_SERTIFIKAT})
+
+    mapel = list(_metadata_mapel(pertanyaan))
+    if len(mapel) == 1:
+        syarat.append({mapel[0]: True})
+    elif mapel:
+        syarat.append({"$or": [{m: True} for m in mapel]})
+
+    if not syarat:
+        return None
+    return syarat[0] if len(syarat) == 1 else {"$and": syarat}
+
+
+class RetrieverRapor(BaseRetriever):
+    """
+    Retriever: dokumen profil selalu ikut, lalu potongan lampiran dicari dengan filter
+    metadata dari pertanyaan. Jika filter tidak menghasilkan apa pun, pencarian diulang
+    tanpa filter.
+    """
+
+    vectorstore: Optional[VectorStore] = None
+    dokumen_tetap: list = []
+    k: int = K_DEFAULT
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun):
+        hasil = list(self.dokumen_tetap)
+        if self.vectorstore is None:
+            return hasil
+        saring = filter_dari_pertanyaan(query)
+        ditemukan = []
+        if saring:
+            try:
+                ditemukan = self.vectorstore.similarity_search(query, k=self.k, filter=saring)
+            except Exception:
+                ditemukan = []
+        if not ditemukan:
+            ditemukan = self.vectorstore.similarity_search(query, k=self.k)
+        return hasil + ditemukan
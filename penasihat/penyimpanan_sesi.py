@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Penyimpanan state sesi di luar proses Streamlit.
+
+State yang bisa diserialisasi (ringkasan profil, rekomendasi awal, skor, pesan
+terbaru, referensi indeks lampiran) disimpan per sesi agar restart pod atau
+perpindahan replika di load balancer tidak menghapus sesi siswa. Indeks vektor
+sendiri tidak disimpan; yang disimpan hanya id lampiran + potongan dokumennya
+sehingga replika mana pun bisa membangun ulang indeks tanpa ekstraksi/OCR ulang.
+
+Arsip riwayat chat (pesan lama yang keluar dari jendela memori `penasihat.riwayat`)
+juga disimpan di backend yang sama (`tambah_arsip`/`muat_arsip`), sehingga arsip ikut
+terbawa ke replika lain tanpa sticky session atau volume bersama.
+
+Selain itu ada status singkat lintas worker (`simpan_status`/`muat_status`), mis.
+rekomendasi yang menyusul setelah mode darurat: permintaan polling bisa diterima worker
+lain dari worker yang menunggu Gemini.
+
+Backend dipilih lewat `PENASIHAT_SESI_URL`:
+    sqlite:///.sesi/sesi.sqlite3   (default, satu host / volume bersama)
+    redis://host:6379/0           (butuh paket `redis`; untuk banyak replika)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Backend Redis bersifat opsional
+try:
+    import redis
+except ImportError:
+    redis = None
+
+URL_PENYIMPANAN_SESI = os.environ.get("PENASIHAT_SESI_URL", "sqlite:///.sesi/sesi.sqlite3")
+TTL_SESI = int(os.environ.get("PENASIHAT_SESI_TTL", str(7 * 24 * 3600)))
+AWALAN_REDIS = "penasihat:"
+
+
+class PenyimpananSesiSQLite:
+    """State sesi + potongan lampiran dalam satu berkas SQLite."""
+
+    def __init__(self, jalur_db: str, ttl_detik: int = TTL_SESI):
+        self.ttl_detik = ttl_detik
+        self._lock = threading.Lock()
+        Path(jalur_db).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(jalur_db, check_same_thread=False, timeout=10)
+        # WAL: beberapa proses (worker API / replika di volume yang sama) bisa membaca sambil menulis
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sesi ("
+            "sesi_id TEXT PRIMARY KEY, data TEXT NOT NULL, diperbarui REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS potongan ("
+            "lampiran_id TEXT PRIMARY KEY, data TEXT NOT NULL, diperbarui REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS status ("
+            "kunci TEXT PRIMARY KEY, data TEXT NOT NULL, kedaluwarsa REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS arsip ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, sesi_id TEXT NOT NULL, data TEXT NOT NULL, dibuat REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS arsip_sesi ON arsip (sesi_id, id)")
+        self._db.commit()
+
+    def muat(self, sesi_id: str):
+        with self._lock:
+            baris = self._db.execute(
+                "SELECT data, diperbarui FROM sesi WHERE sesi_id = ?", (sesi_id,)
+            ).fetchone()
+        if baris is None or time.time() - baris[1] > self.ttl_detik:
+            return None
+        return json.loads(baris[0])
+
+    def simpan(self, sesi_id: str, data: dict):
+        sekarang = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sesi (sesi_id, data, diperbarui) VALUES (?, ?, ?)",
+                (sesi_id, json.dumps(data, ensure_ascii=False), sekarang),
+            )
+            # Sesi kedaluwarsa (beserta arsipnya) dibuang sambil jalan (murah karena jarang ada)
+            self._db.execute("DELETE FROM sesi WHERE diperbarui < ?", (sekarang - self.ttl_detik,))
+            self._db.execute("DELETE FROM arsip WHERE dibuat < ?", (sekarang - self.ttl_detik,))
+            self._db.commit()
+
+    def hapus(self, sesi_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sesi WHERE sesi_id = ?", (sesi_id,))
+            self._db.commit()
+
+    def tambah_arsip(self, sesi_id: str, pesan: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO arsip (sesi_id, data, dibuat) VALUES (?, ?, ?)",
+                (sesi_id, json.dumps(pesan, ensure_ascii=False), time.time()),
+            )
+            self._db.commit()
+
+    def jumlah_arsip(self, sesi_id: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM arsip WHERE sesi_id = ?", (sesi_id,)).fetchone()[0]
+
+    def muat_arsip(self, sesi_id: str, jumlah: int) -> list:
+        """`jumlah` pesan arsip terakhir, urut kronologis."""
+        with self._lock:
+            baris = self._db.execute(
+                "SELECT data FROM arsip WHERE sesi_id = ? ORDER BY id DESC LIMIT ?", (sesi_id, jumlah)
+            ).fetchall()
+        return [json.loads(b[0]) for b in reversed(baris)]
+
+    def hapus_arsip(self, sesi_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM arsip WHERE sesi_id = ?", (sesi_id,))
+            self._db.commit()
+
+    def simpan_potongan(self, lampiran_id: str, potongan: list):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO potongan (lampiran_id, data, diperbarui) VALUES (?, ?, ?)",
+                (lampiran_id, json.dumps(potongan, ensure_ascii=False), time.time()),
+            )
+            self._db.commit()
+
+    def muat_potongan(self, lampiran_id: str):
+        with self._lock:
+            baris = self._db.execute(
+                "SELECT data FROM potongan WHERE lampiran_id = ?", (lampiran_id,)
+            ).fetchone()
+        return json.loads(baris[0]) if baris else None
+
+    def simpan_status(self, kunci: str, data: dict, ttl_detik: int = None):
+        sekarang = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO status (kunci, data, kedaluwarsa) VALUES (?, ?, ?)",
+                (kunci, json.dumps(data, ensure_ascii=False), sekarang + (ttl_detik or self.ttl_detik)),
+            )
+            self._db.execute("DELETE FROM status WHERE kedaluwarsa < ?", (sekarang,))
+            self._db.commit()
+
+    def muat_status(self, kunci: str):
+        with self._lock:
+            baris = self._db.execute(
+                "SELECT data, kedaluwarsa FROM status WHERE kunci = ?", (kunci,)
+            ).fetchone()
+        if baris is None or baris[1] < time.time():
+            return None
+        return json.loads(baris[0])
+
+    def hapus_status(self, kunci: str):
+        with self._lock:
+            self._db.execute("DELETE FROM status WHERE kunci = ?", (kunci,))
+            self._db.commit()
+
+
+class PenyimpananSesiRedis:
+    """State sesi di Redis (atau server yang kompatibel) dengan TTL per kunci."""
+
+    def __init__(self, url: str, ttl_detik: int = TTL_SESI):
+        if redis is None:
+            raise RuntimeError("Paket `redis` belum terpasang. Jalankan: pip install redis")
+        self.ttl_detik = ttl_detik
+        self._redis = redis.Redis.from_url(url)
+
+    def muat(self, sesi_id: str):
+        data = self._redis.get(f"{AWALAN_REDIS}sesi:{sesi_id}")
+        return json.loads(data) if data else None
+
+    def simpan(self, sesi_id: str, data: dict):
+        self._redis.set(f"{AWALAN_REDIS}sesi:{sesi_id}", json.dumps(data, ensure_ascii=False), ex=self.ttl_detik)
+
+    def hapus(self, sesi_id: str):
+        self._redis.delete(f"{AWALAN_REDIS}sesi:{sesi_id}")
+
+    def tambah_arsip(self, sesi_id: str, pesan: dict):
+        kunci = f"{AWALAN_REDIS}arsip:{sesi_id}"
+        pipa = self._redis.pipeline()
+        pipa.rpush(kunci, json.dumps(pesan, ensure_ascii=False))
+        pipa.expire(kunci, self.ttl_detik)
+        pipa.execute()
+
+    def jumlah_arsip(self, sesi_id: str) -> int:
+        return int(self._redis.llen(f"{AWALAN_REDIS}arsip:{sesi_id}"))
+
+    def muat_arsip(self, sesi_id: str, jumlah: int) -> list:
+        """`jumlah` pesan arsip terakhir, urut kronologis."""
+        if jumlah <= 0:
+            return []
+        return [json.loads(d) for d in self._redis.lrange(f"{AWALAN_REDIS}arsip:{sesi_id}", -jumlah, -1)]
+
+    def hapus_arsip(self, sesi_id: str):
+        self._redis.delete(f"{AWALAN_REDIS}arsip:{sesi_id}")
+
+    def simpan_potongan(self, lampiran_id: str, potongan: list):
+        self._redis.set(f"{AWALAN_REDIS}potongan:{lampiran_id}", json.dumps(potongan, ensure_ascii=False), ex=self.ttl_detik)
+
+    def muat_potongan(self, lampiran_id: str):
+        data = self._redis.get(f"{AWALAN_REDIS}potongan:{lampiran_id}")
+        return json.loads(data) if data else None
+
+    def simpan_status(self, kunci: str, data: dict, ttl_detik: int = None):
+        self._redis.set(f"{AWALAN_REDIS}status:{kunci}", json.dumps(data, ensure_ascii=False),
+                        ex=int(ttl_detik or self.ttl_detik))
+
+    def muat_status(self, kunci: str):
+        data = self._redis.get(f"{AWALAN_REDIS}status:{kunci}")
+        return json.loads(data) if data else None
+
+    def hapus_status(self, kunci: str):
+        self._redis.delete(f"{AWALAN_REDIS}status:{kunci}")
+
+
+def buat_penyimpanan_sesi(url: str = URL_PENYIMPANAN_SESI):
+    """Pilih backend dari URL (`sqlite:///jalur` atau `redis://...`)."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return PenyimpananSesiRedis(url)
+    if url.startswith("sqlite:///"):
+        return PenyimpananSesiSQLite(url[len("sqlite:///"):])
+    raise ValueError(f"URL penyimpanan sesi tidak dikenal: {url}")
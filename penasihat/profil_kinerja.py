@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Profiling opsional per rerun dan per tahap bernama.
+
+Saat satu interaksi lambat di produksi, yang dibutuhkan adalah profil rerun itu
+sendiri. Modul ini membungkus satu rerun skrip (atau fragment) maupun tahap bernama
+(`ekstraksi`, `bangun_indeks`, `konteks_chat`, `generate_content`) dan menulis satu
+berkas profil bertanda waktu + id sesi per tangkapan.
+
+Diatur lewat environment variable:
+    PENASIHAT_PROFIL              mati (default) | sampling | deterministik
+    PENASIHAT_PROFIL_RASIO        fraksi rerun/tahap yang diprofil (default 1.0; mis. 0.01 di pod canary)
+    PENASIHAT_PROFIL_INTERVAL_MS  interval sampling (default 5 ms)
+    PENASIHAT_DIR_PROFIL          direktori keluaran (default .profil_kinerja)
+
+Mode `sampling` memakai thread pengambil sampel stack (overhead kecil, aman dibiarkan
+menyala) dan menulis stack terlipat `.folded` untuk flamegraph/speedscope. Mode
+`deterministik` memakai cProfile (`.prof`, baca dengan pstats/snakeviz). Rerun penuh
+selalu memakai sampler karena rerun bisa berakhir lewat `st.rerun()`/`st.stop()` tanpa
+kembali ke skrip. Sesi tertentu bisa dipaksa diprofil (mis. dari saklar admin di
+sidebar) dengan `paksa_sesi`, terlepas dari mode dan rasio.
+"""
+
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+MODE_PROFIL = os.environ.get("PENASIHAT_PROFIL", "mati")  # mati | sampling | deterministik
+RASIO_PROFIL = float(os.environ.get("PENASIHAT_PROFIL_RASIO", "1.0"))
+INTERVAL_PROFIL = float(os.environ.get("PENASIHAT_PROFIL_INTERVAL_MS", "5")) / 1000
+DIREKTORI_PROFIL = os.environ.get("PENASIHAT_DIR_PROFIL", ".profil_kinerja")
+# Pengaman: sampler rerun berhenti sendiri jika rerun tidak kunjung selesai
+MAKS_DETIK_PROFIL = 300
+
+_sesi_paksa = set()
+_lock = threading.Lock()
+_sampler_rerun = {}  # id thread skrip → sampler rerun yang sedang berjalan
+_lokal = threading.local()
+
+
+def paksa_sesi(sesi_id: str, aktif: bool = True):
+    """Profil semua rerun/tahap sesi ini (di proses ini) tanpa memedulikan mode dan rasio."""
+    with _lock:
+        if aktif:
+            _sesi_paksa.add(sesi_id)
+        else:
+            _sesi_paksa.discard(sesi_id)
+
+
+def sesi_dipaksa(sesi_id: str) -> bool:
+    with _lock:
+        return sesi_id in _sesi_paksa
+
+
+def _mode_untuk(sesi_id: str = None):
+    """Mode profiler untuk satu tangkapan, atau None jika tangkapan ini dilewati."""
+    if sesi_id and sesi_dipaksa(sesi_id):
+        return MODE_PROFIL if MODE_PROFIL != "mati" else "sampling"
+    if MODE_PROFIL == "mati" or random.random() >= RASIO_PROFIL:
+        return None
+    return MODE_PROFIL
+
+
+def _jalur_berkas(nama: str, sesi_id: str, ekstensi: str) -> Path:
+    direktori = Path(DIREKTORI_PROFIL)
+    direktori.mkdir(parents=True, exist_ok=True)
+    waktu = datetime.now().strftime("%Y%m%dT%H%M%S_%f")
+    aman = re.sub(r"[^0-9A-Za-z_-]", "-", f"{sesi_id or 'tanpa-sesi'}_{nama}")
+    return direktori / f"{waktu}_{aman}.{ekstensi}"
+
+
+def _label(frame) -> str:
+    kode = frame.f_code
+    return f"{kode.co_name} ({Path(kode.co_filename).name}:{kode.co_firstlineno})"
+
+
+class PenyampelStack:
+    """
+    Profiler sampling untuk satu thread: thread lain membaca stack-nya tiap `interval`
+    detik dan menghitung stack terlipat (format `a;b;c jumlah`).
+
+    Jika `akar` diisi (frame terluar skrip yang sedang dijalankan), sampler berhenti
+    sendiri begitu frame itu tidak ada lagi di stack thread target, yaitu saat rerun
+    selesai, termasuk lewat exception seperti `st.rerun()`/`st.stop()`.
+    """
+
+    def __init__(self, id_thread: int, interval: float = INTERVAL_PROFIL, akar=None, saat_selesai=None):
+        self.id_thread = id_thread
+        self.interval = interval
+        self.akar = akar
+        self.saat_selesai = saat_selesai
+        self.stack = Counter()
+        self.sampel = 0
+        self._berhenti = threading.Event()
+        self._thread = threading.Thread(target=self._jalankan, name="penasihat-profil", daemon=True)
+
+    def mulai(self):
+        self.mulai_pada = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def hentikan(self):
+        self._berhenti.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        return self
+
+    def _ambil(self) -> bool:
+        frame = sys._current_frames().get(self.id_thread)
+        if frame is None:
+            return False  # thread target sudah selesai
+        urutan = []
+        akar_ada = self.akar is None
+        while frame is not None:
+            urutan.append(_label(frame))
+            akar_ada = akar_ada or frame is self.akar
+            frame = frame.f_back
+        if not akar_ada:
+            return False
+        self.stack[";".join(reversed(urutan))] += 1
+        self.sampel += 1
+        return True
+
+    def _jalankan(self):
+        batas = self.mulai_pada + MAKS_DETIK_PROFIL
+        while not self._berhenti.wait(self.interval):
+            if not self._ambil() or time.perf_counter() > batas:
+                break
+        self.durasi = time.perf_counter() - self.mulai_pada
+        self.akar = None  # lepaskan referensi frame skrip
+        if self.saat_selesai is not None:
+            self.saat_selesai(self)
+
+    def tulis(self, jalur: Path):
+        baris = [f"{stack} {jumlah}" for stack, jumlah in self.stack.most_common()]
+        jalur.write_text("\n".join(baris) + "\n", encoding="utf-8")
+        return jalur
+
+
+@contextmanager
+def tahap(nama: str, sesi_id: str = None):
+    """
+    Profil blok `with` di thread saat ini jika aktif untuk tangkapan ini.
+    Tahap di dalam tahap lain tidak diprofil terpisah (sudah tercakup profil luarnya).
+    """
+    mode = None if getattr(_lokal, "aktif", False) else _mode_untuk(sesi_id)
+    if mode is None:
+        yield
+        return
+    _lokal.aktif = True
+    try:
+        if mode == "deterministik":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(_jalur_berkas(nama, sesi_id, "prof"))
+        else:
+            sampler = PenyampelStack(threading.get_ident()).mulai()
+            try:
+                yield
+            finally:
+                sampler.hentikan().tulis(_jalur_berkas(nama, sesi_id, "folded"))
+    finally:
+        _lokal.aktif = False
+
+
+def mulai_rerun(sesi_id: str, berkas_skrip: str, nama: str = "rerun"):
+    """
+    Mulai profil sampling untuk rerun (atau rerun fragment) yang sedang berjalan, dipanggil
+    dari dalam skrip Streamlit. Berkas ditulis otomatis saat rerun berakhir. Panggilan dari
+    fragment di tengah rerun penuh tidak memulai profil baru. Mengembalikan sampler atau None.
+    """
+    id_thread = threading.get_ident()
+    berkas_skrip = os.path.abspath(berkas_skrip)
+    stack = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    with _lock:
+        berjalan = _sampler_rerun.get(id_thread)
+    if berjalan is not None and any(f is berjalan.akar for f in stack):
+        return berjalan
+    if _mode_untuk(sesi_id) is None:
+        return None
+
+    # Frame terluar dari berkas skrip: modul (rerun penuh) atau fungsi fragment
+    akar = next((f for f in reversed(stack) if os.path.abspath(f.f_code.co_filename) == berkas_skrip), None)
+    del stack
+    if akar is None:
+        return None
+
+    def _selesai(sampler):
+        with _lock:
+            if _sampler_rerun.get(id_thread) is sampler:
+                del _sampler_rerun[id_thread]
+        if sampler.sampel:
+            sampler.tulis(_jalur_berkas(nama, sesi_id, "folded"))
+
+    sampler = PenyampelStack(id_thread, akar=akar, saat_selesai=_selesai)
+    with _lock:
+        _sampler_rerun[id_thread] = sampler
+    return sampler.mulai()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Penyimpanan riwayat chat yang ringkas.
+
+Hanya sejumlah pesan terbaru yang disimpan di memori; pesan yang lebih lama dipindahkan
+ke arsip append-only per sesi. Dengan begitu biaya render setiap rerun Streamlit tetap
+konstan berapa pun panjang sesi konsultasi.
+
+Jika penyimpanan sesi (`penasihat.penyimpanan_sesi`, SQLite/Redis) diberikan, arsip
+disimpan di sana sehingga ikut terbawa ke replika lain. Tanpa itu arsip ditulis ke
+berkas JSON Lines lokal di `PENASIHAT_DIR_RIWAYAT`, yang hanya terlihat dari host yang
+sama (banyak replika butuh sticky session atau volume bersama).
+"""
+
+import json
+import os
+from collections import deque
+from pathlib import Path
+
+# Lokasi default berkas arsip (bisa diganti lewat environment variable)
+DIREKTORI_ARSIP = os.environ.get("PENASIHAT_DIR_RIWAYAT", ".riwayat_sesi")
+BATAS_MEMORI = 30
+
+
+class PenyimpananPesan:
+    """
+    Riwayat pesan dengan jendela memori terbatas + arsip (penyimpanan sesi atau disk).
+
+    Antarmukanya mengikuti list pesan lama (append, len, iterasi) agar kode UI
+    tidak perlu banyak berubah. Iterasi hanya mengembalikan pesan di memori.
+    """
+
+    def __init__(self, sesi_id: str, direktori: str = DIREKTORI_ARSIP, batas_memori: int = BATAS_MEMORI,
+                 penyimpanan=None):
+        self.sesi_id = sesi_id
+        self.batas_memori = max(1, batas_memori)
+        self.penyimpanan = penyimpanan
+        self.jalur = Path(direktori) / f"{sesi_id}.jsonl"
+        self._terbaru = deque()
+        if penyimpanan is not None:
+            self._offset_arsip = None
+            self._jumlah_arsip = penyimpanan.jumlah_arsip(sesi_id)
+        else:
+            # Offset byte awal tiap baris arsip → baca mundur tanpa memindai seluruh berkas
+            self._offset_arsip = self._pindai_arsip()
+
+    # ---------------------------------------------------------------------------------
+    # Antarmuka mirip list
+    # ---------------------------------------------------------------------------------
+    def append(self, pesan: dict):
+        self._terbaru.append({"role": pesan["role"], "content": pesan["content"]})
+        while len(self._terbaru) > self.batas_memori:
+            self._arsipkan(self._terbaru.popleft())
+
+    def __len__(self):
+        return self.jumlah_arsip + len(self._terbaru)
+
+    def __iter__(self):
+        return iter(list(self._terbaru))
+
+    def __getitem__(self, indeks):
+        return list(self._terbaru)[indeks]
+
+    def ganti(self, konten_lama: str, konten_baru: str) -> bool:
+        """Ganti isi pesan terbaru (di memori) yang isinya `konten_lama`; False jika tidak ada."""
+        for pesan in reversed(self._terbaru):
+            if pesan["content"] == konten_lama:
+                pesan["content"] = konten_baru
+                return True
+        return False
+
+    # ---------------------------------------------------------------------------------
+    # Serialisasi (penyimpanan sesi eksternal)
+    # ---------------------------------------------------------------------------------
+    def ke_dict(self) -> dict:
+        """Pesan di memori saja; arsip sudah tersimpan terpisah."""
+        return {"terbaru": list(self._terbaru)}
+
+    @classmethod
+    def dari_dict(cls, sesi_id: str, data: dict, **kwargs):
+        pesan = cls(sesi_id, **kwargs)
+        pesan._terbaru.extend(data.get("terbaru", []))
+        return pesan
+
+    # ---------------------------------------------------------------------------------
+    # Arsip
+    # ---------------------------------------------------------------------------------
+    def _pindai_arsip(self) -> list:
+        """Offset baris arsip yang sudah ada (mis. sesi dilanjutkan di proses lain)."""
+        offset = []
+        try:
+            with open(self.jalur, "rb") as f:
+                posisi = 0
+                for baris in f:
+                    offset.append(posisi)
+                    posisi += len(baris)
+        except OSError:
+            pass
+        return offset
+
+    @property
+    def jumlah_arsip(self) -> int:
+        if self.penyimpanan is not None:
+            return self._jumlah_arsip
+        return len(self._offset_arsip)
+
+    def _arsipkan(self, pesan: dict):
+        if self.penyimpanan is not None:
+            self.penyimpanan.tambah_arsip(self.sesi_id, pesan)
+            self._jumlah_arsip += 1
+            return
+        self.jalur.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.jalur, "ab") as f:
+            self._offset_arsip.append(f.tell())
+            f.write(json.dumps(pesan, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def muat_sebelumnya(self, jumlah: int) -> list:
+        """Ambil `jumlah` pesan arsip terakhir (urut kronologis)."""
+        jumlah = min(jumlah, self.jumlah_arsip)
+        if jumlah <= 0:
+            return []
+        if self.penyimpanan is not None:
+            return self.penyimpanan.muat_arsip(self.sesi_id, jumlah)
+        hasil = []
+        try:
+            with open(self.jalur, "rb") as f:
+                f.seek(self._offset_arsip[-jumlah])
+                for _ in range(jumlah):
+                    baris = f.readline()
+                    if not baris:
+                        break
+                    hasil.append(json.loads(baris))
+        except (OSError, ValueError):
+            return []
+        return hasil
+
+    def bersihkan(self):
+        self._terbaru.clear()
+        if self.penyimpanan is not None:
+            self.penyimpanan.hapus_arsip(self.sesi_id)
+            self._jumlah_arsip = 0
+            return
+        self._offset_arsip = []
+        try:
+            self.jalur.unlink()
+        except FileNotFoundError:
+            pass
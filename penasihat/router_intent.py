@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Router intent lokal di depan jalur chat.
+
+Banyak pertanyaan chat strukturnya sederhana ("apa 5 jurusan teratas saya?", "berapa
+skor Teknik Sipil saya?", "apa beda Farmasi dan Kedokteran?") tetapi tetap melewati
+embedding, retrieval, dan generasi Gemini penuh. Router ini mengenali intent tersebut
+dengan aturan kata kunci dan menjawabnya secara deterministik dari pemetaan berbasis
+aturan dan tabel bidang lokal (`mode_darurat.TABEL_BIDANG`). Pertanyaan terbuka
+(mis. mengandung "kenapa", "bagaimana", "saran") dan pertanyaan bersyarat (negasi,
+pengecualian, kualifikasi, pengandaian: "tidak", "selain", "kecuali", "tanpa", "yang ...",
+"kalau", "jika", "seandainya") juga tetap diteruskan ke Gemini, karena jawaban lokal
+tidak bisa memenuhi syaratnya.
+
+Skor diambil dari sumber skor mesin (katalog program jika dimuat, selain itu 18 bidang
+bawaan), sama untuk semua intent. Bidang yang disebut tetapi tidak ada di sumber skor
+itu diteruskan ke Gemini.
+
+Setiap keputusan dicatat ke berkas JSON Lines agar aturan bisa disetel. Secara default
+yang dicatat hanya hash pertanyaan (bukan teksnya), dan berkas diputar saat melewati
+batas ukuran (satu berkas lama `.1` disimpan, yang lebih lama dibuang):
+    PENASIHAT_LOG_RUTE            jalur log (default .log_rute/rute.jsonl; kosong = tidak dicatat)
+    PENASIHAT_LOG_RUTE_TEKS       1 = catat teks pertanyaan (default 0 = hash saja)
+    PENASIHAT_LOG_RUTE_MAKS_BYTE  ukuran log sebelum diputar (default 5000000)
+    PENASIHAT_ROUTER              0 = matikan router (default 1)
+
+Ringkasan log (sebaran intent + contoh pertanyaan yang diteruskan ke Gemini):
+    python -m penasihat.router_intent .log_rute/rute.jsonl
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from penasihat.mode_darurat import TABEL_BIDANG, kontribusi_mapel
+from penasihat.pemetaan import (
+    BIDANG_INTENSIF_MTK,
+    BONUS_MINAT,
+    FAKTOR_TOLERANSI_MTK,
+    PETA_BOBOT,
+    PREFERENSI_BONUS,
+)
+
+ROUTER_AKTIF = os.environ.get("PENASIHAT_ROUTER", "1") == "1"
+JALUR_LOG_RUTE = os.environ.get("PENASIHAT_LOG_RUTE", ".log_rute/rute.jsonl")
+LOG_RUTE_TEKS = os.environ.get("PENASIHAT_LOG_RUTE_TEKS", "0") == "1"
+MAKS_BYTE_LOG_RUTE = int(os.environ.get("PENASIHAT_LOG_RUTE_MAKS_BYTE", "5000000"))
+MAKS_PANJANG_LOG = 200
+
+# Alias tambahan selain bagian nama bidang (dipisah "/" atau di dalam kurung)
+ALIAS_TAMBAHAN = {
+    "Teknik Informatika / Ilmu Komputer": ["informatika", "ilmu komputer", "teknik komputer"],
+    "Data Science / AI": ["data science", "sains data", "kecerdasan buatan", "artificial intelligence"],
+    "Teknik Sipil": ["sipil"],
+    "Teknik Lingkungan / HSE": ["teknik lingkungan", "hse", "k3"],
+    "Perencanaan Wilayah & Kota": ["pwk", "planologi", "perencanaan wilayah"],
+    "Manajemen/Marketing": ["manajemen", "marketing", "pemasaran"],
+    "Akuntansi/Keuangan": ["akuntansi", "keuangan"],
+    "HI (Hubungan Internasional)": ["hubungan internasional"],
+    "Sastra/Filologi": ["sastra", "filologi"],
+    "DKV/Desain": ["dkv", "desain komunikasi visual"],
+    "Kedokteran": ["dokter"],
+}
+
+# Alias di bawah 3 huruf diabaikan (terlalu mudah cocok di kata biasa), kecuali yang ini
+ALIAS_PENDEK = {"hi", "ai", "k3"}
+# Bagian nama bidang yang terlalu umum untuk jadi alias ("desain interior" bukan DKV)
+ALIAS_DIABAIKAN = {"desain"}
+
+# Kata yang menandai pertanyaan terbuka → selalu ke Gemini
+POLA_TERBUKA = re.compile(r"\b(kenapa|mengapa|bagaimana|gimana|jelaskan|saran|sarankan|tips|cara|rencana|prospek|kerja)\b")
+# Negasi/pengecualian/kualifikasi/pengandaian → jawaban lokal tanpa syarat akan salah, selalu ke Gemini
+POLA_BERSYARAT = re.compile(
+    r"\b(tidak|tak|bukan|selain|kecuali|tanpa|jangan|nggak|ngga|gak|enggak|yang|lain|lainnya|kurang|lebih"
+    r"|kalau|kalo|jika|jikalau|apabila|bila|seandainya|andai|andaikan|misal|misalnya|umpama)\b"
+)
+POLA_TERATAS = re.compile(r"\b(teratas|top|terbaik|paling cocok|5 besar|lima besar|rekomendasi)\b")
+POLA_JURUSAN = re.compile(r"\b(jurusan|bidang|prodi|program studi)\b")
+POLA_SKOR = re.compile(r"\b(skor|skornya|nilai pemetaan|peringkat|ranking)\b")
+POLA_BEDA = re.compile(r"\b(beda|bedanya|perbedaan|bandingkan|perbandingan|dibanding|vs|versus)\b")
+
+
+def _normalisasi(teks: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s&]", " ", teks.lower())).strip()
+
+
+def _bangun_alias() -> list:
+    """(alias, bidang) terurut dari alias terpanjang agar "teknik sipil" menang atas "sipil"."""
+    pasangan = []
+    for bidang in PETA_BOBOT:
+        bagian = re.split(r"[/()]", bidang) + [bidang] + ALIAS_TAMBAHAN.get(bidang, [])
+        for alias in {_normalisasi(b) for b in bagian}:
+            if alias in ALIAS_DIABAIKAN:
+                continue
+            if len(alias) >= 3 or alias in ALIAS_PENDEK:
+                pasangan.append((alias, bidang))
+    return sorted(pasangan, key=lambda p: len(p[0]), reverse=True)
+
+
+_ALIAS = _bangun_alias()
+
+
+def cari_bidang(teks: str) -> list:
+    """Bidang yang disebut di teks, urut kemunculan (tanpa duplikat)."""
+    teks = _normalisasi(teks)
+    ditemukan = []
+    terpakai = [False] * len(teks)
+    for alias, bidang in _ALIAS:
+        for m in re.finditer(rf"\b{re.escape(alias)}\b", teks):
+            if any(terpakai[m.start():m.end()]):
+                continue
+            terpakai[m.start():m.end()] = [True] * (m.end() - m.start())
+            ditemukan.append((m.start(), bidang))
+    hasil = []
+    for _, bidang in sorted(ditemukan):
+        if bidang not in hasil:
+            hasil.append(bidang)
+    return hasil
+
+
+def klasifikasikan(pertanyaan: str) -> dict:
+    """
+    Intent pertanyaan: {"intent", "bidang", "alasan"} dengan intent "teratas", "skor",
+    "beda", atau "llm" (diteruskan ke Gemini).
+    """
+    teks = _normalisasi(pertanyaan)
+    bidang = cari_bidang(pertanyaan)
+    if POLA_TERBUKA.search(teks):
+        return {"intent": "llm", "bidang": bidang, "alasan": "pertanyaan terbuka"}
+    if POLA_BERSYARAT.search(teks):
+        return {"intent": "llm", "bidang": bidang, "alasan": "pertanyaan bersyarat"}
+    if POLA_BEDA.search(teks) and len(bidang) >= 2:
+        return {"intent": "beda", "bidang": bidang[:2], "alasan": "perbandingan dua bidang"}
+    if POLA_SKOR.search(teks) and bidang:
+        return {"intent": "skor", "bidang": bidang, "alasan": "skor bidang"}
+    if POLA_TERATAS.search(teks) and POLA_JURUSAN.search(teks) and not bidang:
+        return {"intent": "teratas", "bidang": [], "alasan": "daftar teratas"}
+    return {"intent": "llm", "bidang": bidang, "alasan": "tidak ada aturan yang cocok"}
+
+
+# --------------------------------------------------------------------------------------
+# Penjawab deterministik
+# --------------------------------------------------------------------------------------
+CATATAN_LOKAL = "_Dijawab langsung dari pemetaan berbasis aturan (tanpa AI). Tanyakan \"kenapa ...\" untuk pembahasan lebih rinci._"
+
+
+def _pengali(bidang: str, profil_skor: dict) -> list:
+    pengali = []
+    bonus = sum(bidang in PREFERENSI_BONUS.get(p, []) for p in profil_skor.get("minat") or [])
+    if bonus:
+        pengali.append(f"minat ×{BONUS_MINAT ** bonus:.2f}")
+    faktor = FAKTOR_TOLERANSI_MTK.get(profil_skor.get("toleransi"), 1.0)
+    if bidang in BIDANG_INTENSIF_MTK and faktor != 1.0:
+        pengali.append(f"kenyamanan Matematika ×{faktor:.2f}")
+    return pengali
+
+
+def _jawab_teratas(skor: dict) -> str:
+    baris = ["Berdasarkan pemetaan berbasis aturan, 5 bidang teratasmu:"]
+    teratas = heapq.nlargest(5, skor.items(), key=lambda x: x[1])
+    baris += [f"{i}. **{b}** — skor {s:.1f}" for i, (b, s) in enumerate(teratas, 1)]
+    return "\n".join(baris + ["", CATATAN_LOKAL])
+
+
+def _jawab_skor(bidang_diminta: list, profil_skor: dict, skor: dict) -> str:
+    baris = []
+    for bidang in bidang_diminta:
+        peringkat = 1 + sum(s > skor[bidang] for s in skor.values())
+        baris.append(f"**{bidang}**: skor **{skor[bidang]:.1f}** (peringkat {peringkat} dari {len(skor)})")
+        kontribusi = kontribusi_mapel(profil_skor["nilai"], bidang)
+        if kontribusi:
+            baris.append("- Kontribusi mapel: " + ", ".join(f"{m} {v:g}×{b:g} = {v * b:g}" for m, v, b in kontribusi))
+        pengali = _pengali(bidang, profil_skor)
+        if pengali:
+            baris.append("- Pengali: " + ", ".join(pengali))
+        baris.append("")
+    return "\n".join(baris + [CATATAN_LOKAL])
+
+
+def _jawab_beda(bidang: list, skor: dict = None) -> str:
+    a, b = bidang[:2]
+
+    def _mapel(x):
+        return ", ".join(f"{m} (bobot {w})" for m, w in sorted(PETA_BOBOT.get(x, {}).items(), key=lambda p: -p[1])) or "-"
+
+    baris = [
+        f"| | {a} | {b} |",
+        "|---|---|---|",
+        f"| Fokus | {TABEL_BIDANG.get(a, ('-',))[0]} | {TABEL_BIDANG.get(b, ('-',))[0]} |",
+        f"| Mapel kunci | {_mapel(a)} | {_mapel(b)} |",
+        f"| Intensif Matematika | {'Ya' if a in BIDANG_INTENSIF_MTK else 'Tidak'} | {'Ya' if b in BIDANG_INTENSIF_MTK else 'Tidak'} |",
+    ]
+    if skor is not None:
+        baris.append(f"| Skor pemetaanmu | {skor[a]:.1f} | {skor[b]:.1f} |")
+    return "\n".join(baris + ["", CATATAN_LOKAL])
+
+
+def jawab_lokal(rute: dict, profil_skor: dict = None, skor: dict = None):
+    """
+    Jawaban deterministik untuk rute ini, atau None jika harus diteruskan ke Gemini.
+
+    skor: skor lengkap profil {bidang/program: skor} dari sumber skor mesin (katalog jika
+    dimuat), dipakai semua intent. Bidang yang disebut tetapi tidak ada di situ → None.
+    """
+    if skor is not None and any(b not in skor for b in rute["bidang"]):
+        return None
+    if rute["intent"] == "beda":
+        return _jawab_beda(rute["bidang"], skor)
+    if rute["intent"] == "skor" and profil_skor and skor is not None:
+        return _jawab_skor(rute["bidang"], profil_skor, skor)
+    if rute["intent"] == "teratas" and skor:
+        return _jawab_teratas(skor)
+    return None
+
+
+# --------------------------------------------------------------------------------------
+# Log keputusan
+# --------------------------------------------------------------------------------------
+def hash_pertanyaan(pertanyaan: str) -> str:
+    """Hash pertanyaan ternormalisasi: pertanyaan yang sama bisa dihitung tanpa menyimpan teksnya."""
+    return hashlib.sha256(_normalisasi(pertanyaan).encode("utf-8")).hexdigest()[:16]
+
+
+class PencatatRute:
+    """Hitungan per intent + log JSON Lines berputar (aman dipakai dari banyak thread)."""
+
+    def __init__(self, jalur: str = JALUR_LOG_RUTE, teks: bool = LOG_RUTE_TEKS, maks_byte: int = MAKS_BYTE_LOG_RUTE):
+        self.jalur = Path(jalur) if jalur else None
+        self.teks = teks
+        self.maks_byte = maks_byte
+        self._lock = threading.Lock()
+        self._hitungan = Counter()
+        if self.jalur is not None:
+            self.jalur.parent.mkdir(parents=True, exist_ok=True)
+
+    def catat(self, sesi_id: str, pertanyaan: str, rute: dict, lokal: bool):
+        entri = {
+            "waktu": datetime.now().isoformat(timespec="seconds"),
+            "sesi": sesi_id,
+            "hash": hash_pertanyaan(pertanyaan),
+            "intent": rute["intent"],
+            "bidang": rute["bidang"],
+            "alasan": rute["alasan"],
+            "lokal": lokal,
+        }
+        if self.teks:
+            entri["pertanyaan"] = pertanyaan[:MAKS_PANJANG_LOG]
+        with self._lock:
+            self._hitungan["lokal" if lokal else "llm"] += 1
+            self._hitungan[f"intent_{rute['intent']}"] += 1
+            if self.jalur is not None:
+                self._putar()
+                with open(self.jalur, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entri, ensure_ascii=False) + "\n")
+
+    def _putar(self):
+        """Log melewati batas ukuran → jadi `.1` (menimpa yang lama), mulai berkas baru."""
+        try:
+            if self.maks_byte and self.jalur.stat().st_size >= self.maks_byte:
+                os.replace(self.jalur, self.jalur.with_name(self.jalur.name + ".1"))
+        except FileNotFoundError:
+            pass
+
+    def statistik(self) -> dict:
+        with self._lock:
+            s = dict(self._hitungan)
+        total = s.get("lokal", 0) + s.get("llm", 0)
+        s["rasio_lokal"] = s.get("lokal", 0) / total if total else 0.0
+        return s
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ringkas log keputusan router intent.")
+    parser.add_argument("log", nargs="?", default=JALUR_LOG_RUTE)
+    parser.add_argument("--contoh", type=int, default=20, help="Jumlah contoh pertanyaan yang diteruskan ke Gemini")
+    args = parser.parse_args(argv)
+
+    with open(args.log, encoding="utf-8") as f:
+        entri = [json.loads(b) for b in f if b.strip()]
+    intent = Counter(e["intent"] for e in entri)
+    lokal = sum(e["lokal"] for e in entri)
+    print(f"{len(entri)} pertanyaan, {lokal} dijawab lokal ({lokal / len(entri):.0%})" if entri else "Log kosong.")
+    for nama, jumlah in intent.most_common():
+        print(f"  {nama:<8} {jumlah}")
+    # Log default hanya berisi hash; teks pertanyaan ada jika PENASIHAT_LOG_RUTE_TEKS=1
+    diteruskan = Counter(e.get("pertanyaan") or f"#{e.get('hash')}" for e in entri if not e["lokal"])
+    if diteruskan:
+        print("\nPertanyaan yang diteruskan ke Gemini (terbanyak):")
+        for pertanyaan, jumlah in diteruskan.most_common(args.contoh):
+            print(f"  {jumlah:>4}× {pertanyaan}")
+
+
+if __name__ == "__main__":
+    main()
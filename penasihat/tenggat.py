@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Tenggat per permintaan + pembatalan kooperatif.
+
+Tanpa ini, jika siswa mengirim pesan baru, menekan "🧹 Bersihkan Obrolan", atau menutup
+tab, panggilan yang sedang berjalan (ekstraksi, embedding, retrieval, generate_content)
+tetap dijalankan sampai selesai: kuota terbuang dan thread pekerja tertahan.
+
+Setiap permintaan berat mendapat satu `Tenggat` (batas waktu + tanda batal):
+- Permintaan baru dengan jenis yang sama di sesi yang sama membatalkan yang lama
+  ("digantikan"); `hapus_sesi` membatalkan semua milik sesi itu.
+- Tenggat aktif dibawa lewat context variable sehingga lapisan bawah bisa memeriksanya
+  tanpa mengubah tanda tangan fungsi: ekstraksi per berkas, embedding per batch,
+  retrieval, dan generasi. Generasi Gemini juga diberi `request_options={"timeout": sisa}`
+  sehingga tenggat tetap berlaku saat menunggu token pertama.
+- Pemeriksaan dilakukan di antara langkah (kooperatif): panggilan jaringan yang sudah
+  terkirim tidak diputus paksa, tetapi potongan berikutnya tidak dibaca lagi.
+
+Dengan beberapa worker API, permintaan pengganti atau DELETE /sesi bisa diterima worker
+lain dari worker yang sedang menjalankan permintaan lama. Jika `PengelolaTenggat` diberi
+penyimpanan sesi bersama, pembatalan ikut ditulis ke sana: permintaan terbaru per
+(sesi, jenis) dan waktu sesi diakhiri. Setiap `periksa` membaca penyimpanan paling sering
+sekali per `PENASIHAT_TENGGAT_INTERVAL_BERSAMA` detik, jadi pembatalan lintas worker
+berlaku dengan jeda paling lama selama itu. Waktu sesi diakhiri dibandingkan dengan jam
+dinding, sehingga jam antar-host perlu tersinkron (NTP).
+
+Jumlah permintaan yang selesai, dibatalkan, dan melewati tenggat (per tahap) tersedia
+di `statistik()` agar terlihat berapa banyak pekerjaan yang terbuang.
+
+Diatur lewat environment variable (detik, 0 = tanpa tenggat):
+    PENASIHAT_TENGGAT_CHAT              retrieval + generasi satu jawaban chat (default 90)
+    PENASIHAT_TENGGAT_LAMPIRAN          ekstraksi + embedding lampiran (default 300)
+    PENASIHAT_TENGGAT_REKOMENDASI       rekomendasi awal termasuk susulan (default 120)
+    PENASIHAT_TENGGAT_INTERVAL_BERSAMA  jarak minimum pemeriksaan pembatalan lintas worker (default 1)
+"""
+
+import contextlib
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+TENGGAT_CHAT = float(os.environ.get("PENASIHAT_TENGGAT_CHAT", "90"))
+TENGGAT_LAMPIRAN = float(os.environ.get("PENASIHAT_TENGGAT_LAMPIRAN", "300"))
+TENGGAT_REKOMENDASI = float(os.environ.get("PENASIHAT_TENGGAT_REKOMENDASI", "120"))
+INTERVAL_BERSAMA = float(os.environ.get("PENASIHAT_TENGGAT_INTERVAL_BERSAMA", "1"))
+# Masa simpan tanda pembatalan di penyimpanan bersama: cukup untuk tenggat terpanjang
+TTL_BATAL = int(max(TENGGAT_CHAT, TENGGAT_LAMPIRAN, TENGGAT_REKOMENDASI) or 3600) + 60
+
+SELESAI = "selesai"
+DIBATALKAN = "dibatalkan"
+HABIS_WAKTU = "habis_waktu"
+GAGAL = "gagal"
+
+PESAN_WAKTU_HABIS = (
+    "⏱️ Jawaban dihentikan karena melewati batas waktu. Coba kirim ulang pertanyaanmu, "
+    "atau pilih panjang jawaban yang lebih ringkas di sidebar."
+)
+
+
+class PermintaanDihentikan(Exception):
+    """Permintaan dihentikan sebelum selesai; `tahap` = tempat pemeriksaan yang gagal."""
+
+    status = DIBATALKAN
+
+    def __init__(self, tahap: str, alasan: str):
+        super().__init__(f"Permintaan {alasan} saat {tahap}.")
+        self.tahap = tahap
+        self.alasan = alasan
+
+
+class Dibatalkan(PermintaanDihentikan):
+    status = DIBATALKAN
+
+
+class WaktuHabis(PermintaanDihentikan):
+    status = HABIS_WAKTU
+
+
+class Tenggat:
+    """Batas waktu + tanda batal untuk satu permintaan (aman dibaca dari banyak thread)."""
+
+    def __init__(self, detik: float = None, sesi_id: str = None, jenis: str = None, pengelola=None):
+        self.batas = time.monotonic() + detik if detik else None
+        self.sesi_id = sesi_id
+        self.jenis = jenis
+        self.tahap = "mulai"
+        self.alasan = None
+        self.token = uuid.uuid4().hex
+        self.dimulai = time.time()
+        self._batal = threading.Event()
+        # Pengelola dengan penyimpanan bersama: pembatalan dari worker lain ikut diperiksa
+        self._pengelola = pengelola
+        self._diperiksa_bersama = 0.0
+
+    def batalkan(self, alasan: str = "dibatalkan"):
+        if not self._batal.is_set():
+            self.alasan = alasan
+            self._batal.set()
+
+    @property
+    def dibatalkan(self) -> bool:
+        return self._batal.is_set()
+
+    def sisa(self):
+        """Detik tersisa sebelum tenggat, atau None jika tanpa batas waktu."""
+        return None if self.batas is None else self.batas - time.monotonic()
+
+    def periksa(self, tahap: str):
+        """Lempar `Dibatalkan`/`WaktuHabis` jika permintaan tidak boleh dilanjutkan."""
+        self.tahap = tahap
+        if self._pengelola is not None and not self._batal.is_set():
+            sekarang = time.monotonic()
+            if sekarang - self._diperiksa_bersama >= INTERVAL_BERSAMA:
+                self._diperiksa_bersama = sekarang
+                self._pengelola.periksa_bersama(self)
+        if self._batal.is_set():
+            raise Dibatalkan(tahap, self.alasan)
+        if self.lewat:
+            raise WaktuHabis(tahap, "melewati tenggat")
+
+    @property
+    def lewat(self) -> bool:
+        sisa = self.sisa()
+        return sisa is not None and sisa <= 0
+
+    def opsi_permintaan(self):
+        """`request_options` untuk google.generativeai, atau None jika tanpa batas waktu."""
+        sisa = self.sisa()
+        return None if sisa is None else {"timeout": max(0.1, sisa)}
+
+
+_aktif = ContextVar("penasihat_tenggat", default=None)
+
+
+def aktif():
+    """Tenggat permintaan yang sedang berjalan di konteks ini, atau None."""
+    return _aktif.get()
+
+
+@contextlib.contextmanager
+def dalam(tenggat):
+    """Jadikan `tenggat` aktif selama blok (hanya untuk blok sinkron, bukan di antara yield)."""
+    token = _aktif.set(tenggat)
+    try:
+        yield tenggat
+    finally:
+        _aktif.reset(token)
+
+
+def periksa(tahap: str):
+    """Periksa tenggat aktif (jika ada)."""
+    tenggat = aktif()
+    if tenggat is not None:
+        tenggat.periksa(tahap)
+
+
+def argumen_generasi() -> dict:
+    """Periksa tenggat aktif lalu kembalikan argumen tambahan untuk `generate_content`."""
+    tenggat = aktif()
+    if tenggat is None:
+        return {}
+    tenggat.periksa("generasi")
+    opsi = tenggat.opsi_permintaan()
+    return {"request_options": opsi} if opsi else {}
+
+
+def iterasi(tenggat, aliran, tahap: str):
+    """
+    Teruskan potongan dari `aliran` sambil memeriksa tenggat di antara potongan. Setiap
+    `next` dijalankan dengan tenggat aktif (thread hedging yang dibuat di dalamnya ikut
+    mewarisinya). Aliran ditutup jika pembacaan berhenti lebih awal.
+    """
+    aliran = iter(aliran)
+    try:
+        while True:
+            tenggat.periksa(tahap)
+            with dalam(tenggat):
+                try:
+                    bagian = next(aliran)
+                except StopIteration:
+                    return
+            yield bagian
+    finally:
+        tutup = getattr(aliran, "close", None)
+        if tutup is not None:
+            tutup()
+
+
+class PengelolaTenggat:
+    """
+    Tenggat yang sedang berjalan per (sesi, jenis) + penghitung hasilnya.
+
+    penyimpanan: penyimpanan sesi bersama (opsional, `penasihat.penyimpanan_sesi`). Tanpa
+    penyimpanan, pembatalan hanya berlaku di proses ini.
+    """
+
+    def __init__(self, penyimpanan=None):
+        self.penyimpanan = penyimpanan
+        self._lock = threading.Lock()
+        self._berjalan = {}
+        self._statistik = {SELESAI: 0, DIBATALKAN: 0, HABIS_WAKTU: 0, GAGAL: 0, "digantikan": 0}
+        self._per_tahap = {}
+
+    def mulai(self, sesi_id: str, jenis: str, detik: float = None) -> Tenggat:
+        """Tenggat baru; permintaan sebelumnya dengan jenis sama di sesi ini dibatalkan."""
+        tenggat = Tenggat(detik, sesi_id, jenis, self if self.penyimpanan is not None else None)
+        if sesi_id is None:
+            return tenggat
+        if self.penyimpanan is not None:
+            # Permintaan lama dengan jenis sama di worker lain melihat token ini lalu berhenti
+            self._tulis_bersama(f"tenggat:{sesi_id}:{jenis}", {"token": tenggat.token}, int(detik or TTL_BATAL) + 60)
+        with self._lock:
+            lama = self._berjalan.get((sesi_id, jenis))
+            self._berjalan[(sesi_id, jenis)] = tenggat
+            if lama is not None:
+                self._statistik["digantikan"] += 1
+        if lama is not None:
+            lama.batalkan("digantikan permintaan baru")
+        return tenggat
+
+    def selesai(self, tenggat: Tenggat, status: str = SELESAI):
+        with self._lock:
+            if self._berjalan.get((tenggat.sesi_id, tenggat.jenis)) is tenggat:
+                del self._berjalan[(tenggat.sesi_id, tenggat.jenis)]
+            self._statistik[status] += 1
+            if status in (DIBATALKAN, HABIS_WAKTU):
+                tahap = f"{tenggat.jenis}:{tenggat.tahap}"
+                per_tahap = self._per_tahap.setdefault(tahap, {DIBATALKAN: 0, HABIS_WAKTU: 0})
+                per_tahap[status] += 1
+
+    @contextlib.contextmanager
+    def kelola(self, sesi_id: str, jenis: str, detik: float = None):
+        """Blok sinkron dengan tenggat aktif; hasilnya dicatat saat blok selesai."""
+        tenggat = self.mulai(sesi_id, jenis, detik)
+        status = SELESAI
+        try:
+            with dalam(tenggat):
+                yield tenggat
+        except PermintaanDihentikan as e:
+            status = e.status
+            raise
+        except Exception:
+            # Mis. DeadlineExceeded dari request_options → tetap dihitung melewati tenggat
+            status = HABIS_WAKTU if tenggat.lewat else GAGAL
+            raise
+        finally:
+            self.selesai(tenggat, status)
+
+    def batalkan_sesi(self, sesi_id: str, alasan: str = "sesi diakhiri") -> int:
+        """Batalkan semua permintaan sesi ini; hasil = jumlah yang dibatalkan."""
+        with self._lock:
+            milik = [t for (sesi, _), t in self._berjalan.items() if sesi == sesi_id]
+        for tenggat in milik:
+            tenggat.batalkan(alasan)
+        if self.penyimpanan is not None:
+            self._tulis_bersama(f"tenggat_batal:{sesi_id}", {"waktu": time.time(), "alasan": alasan}, TTL_BATAL)
+        return len(milik)
+
+    def _tulis_bersama(self, kunci: str, data: dict, ttl: int):
+        try:
+            self.penyimpanan.simpan_status(kunci, data, ttl)
+        except Exception:
+            pass  # penyimpanan bersama tidak tersedia → pembatalan tetap berlaku di proses ini
+
+    def periksa_bersama(self, tenggat: Tenggat):
+        """Batalkan `tenggat` jika digantikan atau sesinya diakhiri di worker lain."""
+        if tenggat.sesi_id is None:
+            return
+        try:
+            terbaru = self.penyimpanan.muat_status(f"tenggat:{tenggat.sesi_id}:{tenggat.jenis}")
+            batal = self.penyimpanan.muat_status(f"tenggat_batal:{tenggat.sesi_id}")
+        except Exception:
+            return
+        if terbaru is not None and terbaru.get("token") != tenggat.token:
+            tenggat.batalkan("digantikan permintaan baru")
+        elif batal is not None and batal["waktu"] >= tenggat.dimulai:
+            tenggat.batalkan(batal.get("alasan") or "sesi diakhiri")
+
+    def statistik(self) -> dict:
+        with self._lock:
+            return {
+                **self._statistik,
+                "berjalan": len(self._berjalan),
+                "per_tahap": {k: dict(v) for k, v in self._per_tahap.items()},
+            }
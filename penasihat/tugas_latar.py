@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Tugas latar belakang sederhana dengan laporan kemajuan.
+
+Dipakai untuk pekerjaan berat (ekstraksi, pemotongan, pembuatan indeks vektor)
+agar tidak memblokir rerun Streamlit. Fungsi kerja tidak boleh memanggil `st.*`;
+kemajuan dilaporkan lewat callback `lapor(kemajuan, tahap)` dan UI membaca
+statusnya secara berkala.
+"""
+
+import threading
+
+ANTRE = "antre"
+BERJALAN = "berjalan"
+SELESAI = "selesai"
+GAGAL = "gagal"
+
+
+class TugasLatar:
+    """Status satu tugas latar belakang (aman dibaca dari thread lain)."""
+
+    def __init__(self, nama: str = ""):
+        self.nama = nama
+        self.status = ANTRE
+        self.kemajuan = 0.0
+        self.tahap = "Menunggu giliran..."
+        self.hasil = None
+        self.galat = None
+        self.future = None
+        self._lock = threading.Lock()
+
+    def lapor(self, kemajuan: float, tahap: str):
+        with self._lock:
+            self.kemajuan = max(0.0, min(1.0, kemajuan))
+            self.tahap = tahap
+
+    @property
+    def berjalan(self) -> bool:
+        return self.status in (ANTRE, BERJALAN)
+
+    @property
+    def selesai(self) -> bool:
+        return self.status == SELESAI
+
+    @property
+    def gagal(self) -> bool:
+        return self.status == GAGAL
+
+
+def jalankan_di_latar(eksekutor, fungsi, *args, nama: str = "", **kwargs) -> TugasLatar:
+    """
+    Jalankan `fungsi(lapor, *args, **kwargs)` di `eksekutor` dan kembalikan TugasLatar-nya.
+
+    Exception dari fungsi tidak dilempar ulang; pesannya disimpan di `tugas.galat`.
+    """
+    tugas = TugasLatar(nama)
+
+    def _bungkus():
+        tugas.status = BERJALAN
+        try:
+            tugas.hasil = fungsi(tugas.lapor, *args, **kwargs)
+            tugas.lapor(1.0, "Selesai")
+            tugas.status = SELESAI
+        except Exception as e:
+            tugas.galat = str(e) or e.__class__.__name__
+            tugas.status = GAGAL
+
+    tugas.future = eksekutor.submit(_bungkus)
+    return tugas
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Uji beban: berapa banyak siswa bersamaan yang sanggup dilayani satu pod.
+
+Setiap pengguna simulasi menjalankan alur aplikasi yang sebenarnya lewat
+`streamlit.testing.v1.AppTest` (headless): isi form profil, (opsional) lampiran,
+analisis, lalu beberapa giliran chat. Gemini dan embedding diganti backend palsu
+yang deterministik dengan latensi yang bisa diatur, sehingga yang terukur adalah
+biaya aplikasi sendiri (rerun, fragment, state, indeks) pada jumlah pengguna yang
+naik bertahap. Tiap pengguna berjalan di prosesnya sendiri dan berbagi CPU, disk,
+indeks, serta penyimpanan sesi yang sama.
+
+Contoh:
+    python -m penasihat.uji_beban --pengguna 1,2,4,8 --giliran 3 --latensi-llm 0.3
+
+Laporan per tahap: p50/p95/p99 latensi rerun, throughput (rerun/detik), dan
+memori resident (RSS) per sesi.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+SKRIP_DEFAULT = str(Path(__file__).resolve().parent.parent / "ai_penasihat_akademik.py")
+PERTANYAAN = [
+    "Jurusan apa yang paling cocok untukku?",
+    "Bandingkan Teknik Informatika dan Data Science.",
+    "Bagaimana nilai Fisika semester 3 saya?",
+    "Ekskul apa yang sebaiknya saya ikuti?",
+    "Apa alternatif kalau saya kurang suka Matematika?",
+]
+LAMPIRAN_CONTOH = (
+    "Rapor Semester 3\nMatematika 88\nFisika 85\nKimia 80\nBiologi 78\n"
+    "Ekstrakurikuler\nRobotik - aktif\nPramuka\n"
+    "Sertifikat\nJuara 2 Olimpiade Sains Kabupaten\n"
+)
+
+
+# --------------------------------------------------------------------------------------
+# Backend palsu
+# --------------------------------------------------------------------------------------
+class _JawabanPalsu:
+    def __init__(self, teks: str):
+        self.text = teks
+        self.usage_metadata = None
+
+
+class ModelPalsu:
+    """Pengganti `genai.GenerativeModel`: jawaban deterministik dari hash prompt."""
+
+    latensi = 0.0
+    potongan = 5
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def from_cached_content(cls, cache):
+        return cls()
+
+    def generate_content(self, prompt, stream: bool = False, **kwargs):
+        sidik = hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()[:8]
+        bagian = [f"Jawaban uji {sidik} bagian {i + 1}. " for i in range(self.potongan)]
+        if not stream:
+            time.sleep(self.latensi)
+            return _JawabanPalsu("".join(bagian))
+
+        def _aliran():
+            for teks in bagian:
+                time.sleep(self.latensi / self.potongan)
+                yield _JawabanPalsu(teks)
+        return _aliran()
+
+
+class _CachePalsu:
+    def __init__(self, **kwargs):
+        self.name = f"cachedContents/uji-{id(self)}"
+
+    def delete(self):
+        pass
+
+
+def pasang_backend_palsu(latensi_llm: float, latensi_embedding: float):
+    """Ganti Gemini, context cache, dan embedding dengan versi palsu (dipanggil sebelum app dimuat)."""
+    import google.generativeai as genai
+    from google.generativeai import caching
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    import penasihat.mesin as mesin
+
+    class EmbeddingPalsu(DeterministicFakeEmbedding):
+        def embed_documents(self, texts):
+            time.sleep(latensi_embedding)
+            return super().embed_documents(texts)
+
+        def embed_query(self, text):
+            time.sleep(latensi_embedding)
+            return super().embed_query(text)
+
+    ModelPalsu.latensi = latensi_llm
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = ModelPalsu
+    caching.CachedContent.create = staticmethod(lambda **kwargs: _CachePalsu(**kwargs))
+    mesin.GoogleGenerativeAIEmbeddings = lambda **kwargs: EmbeddingPalsu(size=256)
+
+
+# --------------------------------------------------------------------------------------
+# Pengukuran
+# --------------------------------------------------------------------------------------
+def rss_mb() -> float:
+    """Memori resident proses saat ini (MB); jatuh ke puncak RSS jika /proc tidak ada."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        maks = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maks / 1e6 if sys.platform == "darwin" else maks / 1e3
+
+
+class Pencatat:
+    def __init__(self):
+        self.latensi = []
+        self.galat = 0
+
+    def ukur(self, langkah: str, fungsi):
+        mulai = time.perf_counter()
+        hasil = fungsi()
+        self.latensi.append((langkah, time.perf_counter() - mulai))
+        if hasil is not None and hasil.exception:
+            self.galat += 1
+        return hasil
+
+
+# --------------------------------------------------------------------------------------
+# Satu pengguna simulasi
+# --------------------------------------------------------------------------------------
+def _siapkan_proses(latensi_llm: float, latensi_embedding: float):
+    # Dipanggil sekali di tiap proses pekerja, sebelum app dimuat
+    pasang_backend_palsu(latensi_llm, latensi_embedding)
+    importlib.import_module("streamlit.testing.v1")  # impor berat di luar pengukuran
+
+
+def jalankan_sesi(skrip: str, indeks: int, giliran: int, lampiran: bool, batas_waktu: float) -> dict:
+    """Alur lengkap satu siswa dalam prosesnya sendiri; mengembalikan latensi per langkah dan RSS."""
+    from streamlit.testing.v1 import AppTest
+
+    pencatat = Pencatat()
+    rss_awal = rss_mb()
+    acak = random.Random(indeks)
+    at = AppTest.from_file(skrip, default_timeout=batas_waktu)
+    at.secrets["GOOGLE_API_KEY"] = "kunci-uji"
+    pencatat.ukur("awal", at.run)
+    if len(at.sidebar.text_input):
+        pencatat.ukur("api_key", at.sidebar.text_input[0].input("kunci-uji").run)
+
+    # Isi form profil (nilai acak per pengguna agar tidak semua kena indeks profil)
+    at.text_input[0].input(f"Siswa {indeks}")
+    for slider in at.slider:
+        slider.set_value(acak.randint(3, 10))
+    tombol = next(b for b in at.button if "Analisis" in b.label)
+    pencatat.ukur("analisis", tombol.click().run)
+
+    if lampiran:
+        # AppTest belum bisa mengisi st.file_uploader → lampiran diindeks lewat mesin sesi yang sama
+        mesin = at.session_state.mesin
+        data = (LAMPIRAN_CONTOH + f"Catatan siswa {indeks}\n").encode("utf-8")
+        mulai = time.perf_counter()
+        hasil = mesin.indeks_lampiran([(f"rapor_{indeks}.txt", data, "text/plain")])
+        pencatat.latensi.append(("lampiran", time.perf_counter() - mulai))
+        at.session_state.lampiran_id = hasil["lampiran_id"]
+
+    for i in range(giliran):
+        if len(at.chat_input) == 0:
+            pencatat.galat += 1
+            break
+        at.chat_input[0].set_value(PERTANYAAN[(indeks + i) % len(PERTANYAAN)])
+        pencatat.ukur("chat", at.run)
+    return {"latensi": pencatat.latensi, "galat": pencatat.galat, "rss_mb": rss_mb() - rss_awal}
+
+
+def jalankan_tahap(skrip: str, pengguna: int, giliran: int, lampiran: bool, batas_waktu: float,
+                   latensi_llm: float, latensi_embedding: float) -> dict:
+    # Satu proses per pengguna: AppTest menyimpan state widget secara global per proses sehingga
+    # tidak aman dijalankan paralel di thread. Yang dibagi tetap sama dengan pod sungguhan:
+    # CPU, disk, indeks profil/lampiran, dan penyimpanan sesi.
+    with ProcessPoolExecutor(
+        max_workers=pengguna,
+        initializer=_siapkan_proses,
+        initargs=(latensi_llm, latensi_embedding),
+    ) as eksekutor:
+        # Pastikan semua pekerja sudah hidup & impor selesai sebelum jam dimulai
+        list(eksekutor.map(time.sleep, [0.0] * pengguna))
+        mulai = time.perf_counter()
+        sesi = list(eksekutor.map(
+            jalankan_sesi,
+            [skrip] * pengguna, range(pengguna), [giliran] * pengguna,
+            [lampiran] * pengguna, [batas_waktu] * pengguna,
+        ))
+        durasi = time.perf_counter() - mulai
+
+    latensi = [x for s in sesi for x in s["latensi"]]
+    semua = np.array([d for langkah, d in latensi if langkah != "lampiran"]) * 1000
+    per_langkah = {}
+    for langkah in sorted({l for l, _ in latensi}):
+        nilai = np.array([d for l, d in latensi if l == langkah]) * 1000
+        per_langkah[langkah] = {"n": len(nilai), "p50_ms": float(np.percentile(nilai, 50)), "p95_ms": float(np.percentile(nilai, 95))}
+    return {
+        "pengguna": pengguna,
+        "rerun": len(semua),
+        "galat": sum(s["galat"] for s in sesi),
+        "p50_ms": float(np.percentile(semua, 50)),
+        "p95_ms": float(np.percentile(semua, 95)),
+        "p99_ms": float(np.percentile(semua, 99)),
+        "throughput_rerun_per_detik": len(semua) / durasi,
+        "rss_per_sesi_mb": float(np.mean([max(0.0, s["rss_mb"]) for s in sesi])),
+        "per_langkah": per_langkah,
+    }
+
+
+def cetak_laporan(hasil):
+    print(f"{'pengguna':>8} {'rerun':>6} {'galat':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rerun/dtk':>10} {'RSS/sesi MB':>12}")
+    for h in hasil:
+        print(
+            f"{h['pengguna']:>8} {h['rerun']:>6} {h['galat']:>5} {h['p50_ms']:>8.1f} {h['p95_ms']:>8.1f} "
+            f"{h['p99_ms']:>8.1f} {h['throughput_rerun_per_detik']:>10.2f} {h['rss_per_sesi_mb']:>12.2f}"
+        )
+    print("\nPer langkah (tahap terakhir):")
+    for langkah, s in hasil[-1]["per_langkah"].items():
+        print(f"  {langkah:<9} n={s['n']:<4} p50={s['p50_ms']:.1f} ms  p95={s['p95_ms']:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban aplikasi Penasihat Akademik dengan backend palsu.")
+    parser.add_argument("--skrip", default=SKRIP_DEFAULT, help="Skrip Streamlit yang diuji")
+    parser.add_argument("--pengguna", default="1,2,4,8", help="Jumlah pengguna bersamaan per tahap, dipisah koma")
+    parser.add_argument("--giliran", type=int, default=3, help="Giliran chat per pengguna")
+    parser.add_argument("--lampiran", action="store_true", help="Indeks satu lampiran rapor per pengguna")
+    parser.add_argument("--latensi-llm", type=float, default=0.2, help="Latensi jawaban LLM palsu (detik)")
+    parser.add_argument("--latensi-embedding", type=float, default=0.02, help="Latensi per panggilan embedding palsu (detik)")
+    parser.add_argument("--batas-waktu", type=float, default=120, help="Batas waktu satu rerun AppTest (detik)")
+    parser.add_argument("--json", help="Simpan hasil lengkap ke berkas JSON")
+    args = parser.parse_args(argv)
+
+    # Semua penyimpanan di direktori sementara agar tidak mencemari data sungguhan
+    kerja = tempfile.mkdtemp(prefix="uji_beban_")
+    os.environ.update({
+        "PENASIHAT_DIR_RIWAYAT": os.path.join(kerja, "riwayat"),
+        "PENASIHAT_DB_PROFIL": os.path.join(kerja, "profil.sqlite3"),
+        "PENASIHAT_SESI_URL": f"sqlite:///{os.path.join(kerja, 'sesi.sqlite3')}",
+        "PENASIHAT_DIR_INDEKS_LAMPIRAN": os.path.join(kerja, "indeks_lampiran"),
+        "PENASIHAT_CACHE_KONTEKS": "gemini",
+    })
+    os.environ.pop("PENASIHAT_API_URL", None)
+
+    hasil = []
+    for n in [int(x) for x in args.pengguna.split(",") if x.strip()]:
+        hasil.append(jalankan_tahap(
+            args.skrip, n, args.giliran, args.lampiran, args.batas_waktu,
+            args.latensi_llm, args.latensi_embedding,
+        ))
+        print(f"tahap {n} pengguna selesai", file=sys.stderr)
+    cetak_laporan(hasil)
+    if args.json:
+        Path(args.json).write_text(json.dumps(hasil, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from penasihat.bagaimana_jika import analisis_bagaimana_jika
+from penasihat.pemetaan import skor_bidang_dari_map
+
+NILAI = {"Matematika": 10, "Fisika": 9.5, "Biologi": 7, "Kimia": 8}
+
+
+def _skor_map(nilai, minat, toleransi, bidang):
+    skor = skor_bidang_dari_map(nilai, minat, toleransi)
+    return np.array([skor[b] for b in bidang])
+
+
+def test_skenario_sama_dengan_pemetaan():
+    hasil = analisis_bagaimana_jika(NILAI, ["Teknologi"], "Sedang")
+    bidang = hasil["bidang"]
+    assert hasil["skenario"][0] == "Saat ini"
+    assert np.allclose(hasil["skor"][0], _skor_map(NILAI, ["Teknologi"], "Sedang", bidang))
+    baris = hasil["skenario"].index("Biologi +2")
+    assert np.allclose(hasil["skor"][baris], _skor_map({**NILAI, "Biologi": 9}, ["Teknologi"], "Sedang", bidang))
+    assert (hasil["selisih_peringkat"][0] == 0).all()
+
+
+@pytest.mark.parametrize("label", [
+    "Matematika +0 (diminta +1, dibatasi 0–10)",
+    "Fisika +0.5 (diminta +2, dibatasi 0–10)",
+])
+def test_skenario_terpotong_diberi_label_perubahan_sebenarnya(label):
+    hasil = analisis_bagaimana_jika(NILAI, [], "Sedang")
+    baris = hasil["skenario"].index(label)
+    assert hasil["dibatasi"][baris]
+    assert not hasil["dibatasi"][hasil["skenario"].index("Fisika -1")]
+    if label.startswith("Matematika +0"):
+        assert np.allclose(hasil["selisih_skor"][baris], 0)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from google.generativeai import protos
+from google.generativeai.types import GenerateContentResponse
+
+from penasihat import format_jawaban
+from penasihat.cache_konteks import CATATAN_TERPOTONG, CacheKonteksLokal, JawabanTidakLengkap, teks_jawaban
+from penasihat.hedge_permintaan import PengirimHedge
+
+MAX_TOKENS = protos.Candidate.FinishReason.MAX_TOKENS
+STOP = protos.Candidate.FinishReason.STOP
+
+
+def _jawaban(teks=None, alasan=STOP):
+    bagian = [protos.Part(text=teks)] if teks is not None else []
+    kandidat = protos.Candidate(content=protos.Content(parts=bagian, role="model"), finish_reason=alasan)
+    return GenerateContentResponse.from_response(protos.GenerateContentResponse(candidates=[kandidat]))
+
+
+class _ModelPalsu:
+    def __init__(self, jawaban):
+        self.jawaban = jawaban
+
+    def generate_content(self, *args, **kwargs):
+        return self.jawaban
+
+
+def test_max_tokens_tanpa_bagian_teks():
+    jawaban = _jawaban(alasan=MAX_TOKENS)
+    with pytest.raises(ValueError):
+        jawaban.text  # perilaku SDK yang dulu lolos ke pemutus sirkuit
+    with pytest.raises(JawabanTidakLengkap) as galat:
+        teks_jawaban(jawaban)
+    assert galat.value.alasan == "MAX_TOKENS"
+
+
+def test_json_terpotong_ditolak_teks_bebas_diberi_catatan():
+    jawaban = _jawaban('{"rekomendasi": [{"bidang": "Tek', MAX_TOKENS)
+    with pytest.raises(JawabanTidakLengkap):
+        teks_jawaban(jawaban, utuh=True)
+    cache = CacheKonteksLokal(_ModelPalsu(_jawaban("Teknik Informatika cocok karena", MAX_TOKENS)))
+    assert cache.hasilkan("sesi", "prompt").endswith(CATATAN_TERPOTONG)
+
+
+def test_cache_lokal_kandidat_kosong():
+    cache = CacheKonteksLokal(_ModelPalsu(_jawaban(alasan=MAX_TOKENS)))
+    with pytest.raises(JawabanTidakLengkap):
+        cache.hasilkan("sesi", "prompt", format_jawaban.konfigurasi_generasi("ringkas"))
+
+
+def test_anggaran_berpikir_di_luar_batas_jawaban(monkeypatch):
+    monkeypatch.setattr(format_jawaban, "ANGGARAN_BERPIKIR", 512)
+    konfigurasi = format_jawaban.konfigurasi_generasi("ringkas")
+    assert konfigurasi["thinking_config"] == {"thinking_budget": 512}
+    assert konfigurasi["max_output_tokens"] == format_jawaban.PROFIL_JAWABAN["ringkas"]["maks_token"] + 512
+
+
+class _ModelSerentak(_ModelPalsu):
+    """Permintaan utama dan cadangan selesai bersamaan."""
+
+    def __init__(self, jawaban):
+        super().__init__(jawaban)
+        self.serentak = threading.Barrier(2, timeout=5)
+
+    def generate_content(self, *args, **kwargs):
+        self.serentak.wait()
+        return self.jawaban
+
+
+def test_hedge_utuh_hanya_pemenang_dicatat():
+    cache = CacheKonteksLokal(_ModelSerentak(_jawaban("Teknik Informatika")))
+    cache.hedge = PengirimHedge(tunda_min=0.0, tunda_awal=0.001, rasio_maks=1.0)
+    assert cache.hasilkan("sesi", "prompt") == "Teknik Informatika"
+    time.sleep(0.2)  # percobaan yang kalah sempat selesai
+    assert cache.hedge.statistik()["hedge"] == 1
+    assert cache.statistik()["giliran"] == 1
+
+
+def test_sesi_dilepas_lru_dan_ttl():
+    cache = CacheKonteksLokal(_ModelPalsu(_jawaban("ok")))
+    cache.maks_sesi = 2
+    for kunci in ("a", "b"):
+        cache.daftarkan(kunci, "profil")
+    cache.pastikan("a", "profil")  # "a" baru dipakai → "b" yang tertua
+    cache.daftarkan("c", "profil")
+    assert list(cache._sesi) == ["a", "c"]
+    cache.ttl_sesi = 0.01
+    time.sleep(0.02)
+    cache.daftarkan("d", "profil")
+    assert list(cache._sesi) == ["d"]
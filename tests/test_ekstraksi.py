@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from penasihat import ekstraksi
+
+
+def test_pool_proses_sama_dengan_thread():
+    pdf = ekstraksi._pdf_sintetis(3)
+    berkas = [("a.pdf", pdf, "application/pdf"), ("b.txt", b"Semester 1\nFisika 88", None),
+              ("c.pdf", b"bukan pdf", None), ("d.xyz", b"?", None), ("e.pdf", pdf, None)]
+    try:
+        proses = ekstraksi.ekstrak_banyak(berkas, 2, proses=True)
+    finally:
+        ekstraksi._reset_pool()
+    assert proses == ekstraksi.ekstrak_banyak(berkas, 2, proses=False)
+    assert [h["galat"] is None for h in proses] == [True, True, False, False, True]
+    assert proses[0]["teks"].count("\f") == 2
+
+
+def test_tabel_docx_nilai_sama_bersebelahan_tidak_digabung():
+    import io
+
+    import docx
+
+    dokumen = docx.Document()
+    tabel = dokumen.add_table(rows=2, cols=4)
+    for sel, isi in zip(tabel.rows[0].cells, ["Mapel", "KKM", "Pengetahuan", "Keterampilan"]):
+        sel.text = isi
+    for sel, isi in zip(tabel.rows[1].cells, ["Matematika", "75", "85", "85"]):
+        sel.text = isi
+    judul = dokumen.add_table(rows=1, cols=3)
+    judul.rows[0].cells[0].merge(judul.rows[0].cells[2]).text = "Semester 2"
+    berkas = io.BytesIO()
+    dokumen.save(berkas)
+
+    teks = ekstraksi.ekstrak_teks_docx(io.BytesIO(berkas.getvalue()))
+    assert "Matematika | 75 | 85 | 85" in teks
+    assert "Semester 2\n" in teks and "Semester 2 |" not in teks
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from penasihat import embedding_batch
+from penasihat.embedding_batch import EmbeddingBatch, susun_batch
+
+
+class _Dasar(Embeddings):
+    """Embedding palsu yang mencatat batch dan gagal untuk teks tertentu beberapa kali."""
+
+    def __init__(self, gagal: dict = None):
+        self.palsu = DeterministicFakeEmbedding(size=8)
+        self.gagal = dict(gagal or {})
+        self.batch = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batch.append(list(texts))
+            for t in texts:
+                if self.gagal.get(t, 0) > 0:
+                    self.gagal[t] -= 1
+                    raise RuntimeError("429")
+        return self.palsu.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.palsu.embed_query(text)
+
+
+@pytest.fixture(autouse=True)
+def _tanpa_jeda(monkeypatch):
+    monkeypatch.setattr(embedding_batch, "BACKOFF_AWAL", 0.0)
+
+
+def test_susun_batch_batas_teks_dan_karakter():
+    assert susun_batch(["a"] * 5, ukuran=2) == [[0, 1], [2, 3], [4]]
+    assert susun_batch(["aaaa", "bb", "cc", "dddddd"], ukuran=10, karakter=5) == [[0], [1, 2], [3]]
+
+
+def test_duplikat_dikirim_sekali():
+    dasar = _Dasar()
+    teks = ["kop surat", "Fisika 90", "kop surat", "Kimia 85", "kop surat"]
+    embedding = EmbeddingBatch(dasar, ukuran_batch=2, paralel=2, rpm=0)
+    vektor = embedding.embed_documents(teks)
+    assert sorted(t for b in dasar.batch for t in b) == ["Fisika 90", "Kimia 85", "kop surat"]
+    assert vektor == dasar.palsu.embed_documents(teks)
+    assert embedding.statistik()["duplikat"] == 2
+
+
+def test_hanya_batch_gagal_yang_diulang():
+    dasar = _Dasar(gagal={"c": 2})
+    embedding = EmbeddingBatch(dasar, ukuran_batch=2, paralel=1, rpm=0, ulang=3)
+    vektor = embedding.embed_documents(["a", "b", "c", "d"])
+    assert vektor == dasar.palsu.embed_documents(["a", "b", "c", "d"])
+    assert dasar.batch == [["a", "b"], ["c", "d"], ["c", "d"], ["c", "d"]]
+    assert embedding.statistik()["ulang"] == 2 and embedding.statistik()["gagal"] == 0
+
+
+def test_gagal_setelah_batas_ulang():
+    embedding = EmbeddingBatch(_Dasar(gagal={"a": 5}), paralel=1, rpm=0, ulang=1)
+    with pytest.raises(RuntimeError):
+        embedding.embed_documents(["a"])
+    assert embedding.statistik()["gagal"] == 1
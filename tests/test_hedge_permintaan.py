@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from penasihat.hedge_permintaan import JENDELA_RASIO, MIN_SAMPEL, PengirimHedge
+
+
+def _lambat():
+    time.sleep(0.05)
+    yield "jawaban"
+
+
+def test_kuota_hedge_tidak_terlewati_permintaan_bersamaan():
+    pengirim = PengirimHedge(tunda_min=0.0, tunda_awal=0.001, rasio_maks=2 / JENDELA_RASIO)
+    with ThreadPoolExecutor(20) as pool:
+        list(pool.map(lambda _: "".join(pengirim.alirkan(_lambat, _lambat)), range(20)))
+    s = pengirim.statistik()
+    assert s["hedge"] == 2
+    assert s["hedge_ditolak"] == 18
+
+
+def test_jendela_latensi_per_jenis():
+    pengirim = PengirimHedge(persentil=50, tunda_min=0.0)
+    for _ in range(MIN_SAMPEL):
+        pengirim._catat_utama("aliran", 0.5)
+        pengirim._catat_utama("utuh", 8.0)
+    assert pengirim.tunda("aliran") == 0.5
+    assert pengirim.tunda("utuh") == 8.0
+    assert pengirim.statistik()["jenis"]["utuh"]["tunda"] == 8.0
+
+
+class _AliranMenggantung:
+    """Aliran yang belum memberi token pertama sampai ditutup."""
+
+    def __init__(self):
+        self.ditutup = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.ditutup.wait(5)
+        raise StopIteration
+
+    def close(self):
+        self.ditutup.set()
+
+
+def test_aliran_kalah_ditutup_sebelum_token_pertama():
+    lambat = _AliranMenggantung()
+    pengirim = PengirimHedge(tunda_min=0.0, tunda_awal=0.001, rasio_maks=1.0)
+    assert "".join(pengirim.alirkan(lambda: lambat, _lambat)) == "jawaban"
+    assert lambat.ditutup.wait(1)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from penasihat import indeks_vektor
+from penasihat.indeks_vektor import IndeksVektorDatar, cocok_filter
+
+
+@pytest.fixture
+def teks():
+    return [f"Semester {i % 6 + 1} nilai Fisika {60 + i}" for i in range(50)]
+
+
+def _hasil(indeks, kueri, **kwargs):
+    return [(d.page_content, round(s, 2)) for d, s in indeks.similarity_search_with_score(kueri, k=5, **kwargs)]
+
+
+def test_float16_per_blok_sama_dengan_float32(teks, tmp_path, monkeypatch):
+    monkeypatch.setattr(indeks_vektor, "BARIS_PER_BLOK", 7)
+    embedding = DeterministicFakeEmbedding(size=32)
+    metadata = [{"semester": i % 6 + 1} for i in range(len(teks))]
+    f32 = IndeksVektorDatar.from_texts(teks, embedding, metadatas=metadata, dtype="float32")
+    f16 = IndeksVektorDatar.from_texts(teks, embedding, metadatas=metadata, dtype="float16")
+    f16.simpan(tmp_path)
+    dimuat = IndeksVektorDatar.muat(tmp_path, embedding)
+    assert isinstance(dimuat._vektor, np.memmap)
+    for indeks in (f16, dimuat):
+        assert _hasil(indeks, teks[3]) == _hasil(f32, teks[3])
+        saring = {"semester": {"$in": [2, 3]}}
+        assert _hasil(indeks, teks[3], filter=saring) == _hasil(f32, teks[3], filter=saring)
+    assert all(d.metadata["semester"] == 5 for d in f16.similarity_search(teks[3], k=5, filter={"semester": 5}))
+    assert f16.similarity_search(teks[3], k=5, filter={"semester": 9}) == []
+
+
+def test_operator_filter_tidak_dikenal_ditolak():
+    assert cocok_filter({"semester": 4}, {"semester": {"$ne": 5}})
+    assert not cocok_filter({"semester": 5}, {"$and": [{"semester": {"$nin": [5]}}]})
+    for saring in ({"semester": {"$gt": 3}}, {"semester": {"$ne": 4, "$lt": 9}}, {"$not": {"semester": 4}}):
+        with pytest.raises(ValueError):
+            cocok_filter({"semester": 4}, saring)
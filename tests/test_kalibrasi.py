@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from penasihat.kalibrasi import (
+    DAFTAR_BIDANG,
+    DAFTAR_MAPEL,
+    _maju,
+    data_sintetis,
+    kalibrasi,
+    ke_aturan,
+    parameter_awal,
+    siapkan_data,
+    tingkat_hit,
+)
+from penasihat.pemetaan import muat_aturan, skor_bidang_dari_map
+
+
+def test_parameter_awal_sama_dengan_pemetaan():
+    df = data_sintetis(50, seed=3)
+    data = siapkan_data(df)
+    skor = _maju(parameter_awal(), data)[1]
+    for i, baris in df.iterrows():
+        acuan = skor_bidang_dari_map(baris[DAFTAR_MAPEL].to_dict(), [m for m in baris["minat"].split(";") if m],
+                                     baris["toleransi"])
+        assert np.allclose(skor[i], [acuan[b] for b in DAFTAR_BIDANG], rtol=1e-4)
+
+
+def test_baris_tidak_dikenal_dibuang_dan_kolom_wajib_diperiksa():
+    df = data_sintetis(10)
+    df.loc[0, "jurusan"] = "Astrologi"
+    df.loc[1, "toleransi"] = "Sangat"
+    data = siapkan_data(df)
+    assert data["dibuang"] == 2 and len(data["y"]) == 8
+    with pytest.raises(ValueError):
+        siapkan_data(pd.DataFrame({"jurusan": ["Farmasi"]}))
+
+
+def test_kalibrasi_memulihkan_data_sintetis(tmp_path):
+    data = siapkan_data(data_sintetis(20000, seed=1))
+    param = kalibrasi(data, iterasi=150, batch=4096)
+    sebelum, sesudah = tingkat_hit(parameter_awal(), data), tingkat_hit(param, data)
+    assert sesudah["hit@1"] > sebelum["hit@1"] + 0.05
+
+    # Berkas aturan keluaran bisa dibaca pemetaan
+    jalur = tmp_path / "aturan.json"
+    jalur.write_text(json.dumps(ke_aturan(param, {}, {})), encoding="utf-8")
+    aturan = muat_aturan(str(jalur))
+    assert set(aturan["peta_bobot"]) == set(DAFTAR_BIDANG)
+    assert aturan["faktor_toleransi_mtk"]["Sedang"] == 1.0
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import heapq
+
+import numpy as np
+import pytest
+
+from penasihat.katalog import KatalogProgram, katalog_sintetis
+from penasihat.pemetaan import PETA_BOBOT, skor_bidang_dari_map
+
+PROFIL = [
+    ({"Matematika": 9, "Fisika": 8, "Kimia": 7, "Biologi": 6}, ["Teknologi"], "Tinggi"),
+    ({"Biologi": 10, "Kimia": 9, "B. Inggris": 7}, ["Kesehatan", "Sains"], "Rendah"),
+    ({"Ekonomi": 8, "B. Indonesia": 9, "Sosiologi": 7}, [], "Sedang"),
+]
+
+
+@pytest.mark.parametrize("nilai, minat, toleransi", PROFIL)
+def test_dari_peta_bobot_sama_dengan_pemetaan(nilai, minat, toleransi):
+    katalog = KatalogProgram.dari_peta_bobot()
+    acuan = skor_bidang_dari_map(nilai, minat, toleransi)
+    assert katalog.nama == list(PETA_BOBOT)
+    assert np.allclose(katalog.skor(nilai, minat, toleransi), [acuan[b] for b in katalog.nama])
+    teratas = [p["nama"] for p in katalog.teratas(nilai, minat, toleransi, k=5)]
+    assert teratas == heapq.nlargest(5, acuan, key=acuan.get)
+
+
+def test_teratas_sama_dengan_urut_penuh():
+    katalog = katalog_sintetis(2000, seed=4)
+    nilai, minat, toleransi = PROFIL[0]
+    skor = katalog.skor(nilai, minat, toleransi)
+    urut = sorted(range(len(skor)), key=lambda i: -skor[i])[:10]
+    assert [p["nama"] for p in katalog.teratas(nilai, minat, toleransi, k=10)] == [katalog.nama[i] for i in urut]
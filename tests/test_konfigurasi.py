@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+from penasihat import konfigurasi
+
+
+@pytest.fixture(autouse=True)
+def _lingkungan_bersih(monkeypatch):
+    # Lapisan ditulis langsung ke os.environ → simpan & pulihkan seluruhnya
+    asli = dict(os.environ)
+    for nama in [n for n in os.environ if n.startswith("PENASIHAT_")]:
+        del os.environ[nama]
+    monkeypatch.setattr(konfigurasi, "_diterapkan", {})
+    yield
+    os.environ.clear()
+    os.environ.update(asli)
+
+
+@pytest.fixture
+def berkas(tmp_path):
+    jalur = tmp_path / "penasihat.json"
+    jalur.write_text(json.dumps({"preset": "low-latency", "k": 5, "model": "model-berkas"}), encoding="utf-8")
+    return jalur
+
+
+def test_urutan_lapisan(berkas):
+    os.environ["PENASIHAT_SUHU"] = "0.9"
+    sekret = {"PENASIHAT_MODEL": "model-secrets", "penasihat": {"profil_jawaban": "lengkap"}}
+    hasil = konfigurasi.terapkan(sekret=sekret, berkas=berkas)
+    assert hasil["preset"] == "low-latency"
+    harapan = {
+        "PENASIHAT_TUMPANG_TINDIH": ("150", "preset"),
+        "PENASIHAT_K": ("5", "berkas"),
+        "PENASIHAT_MODEL": ("model-secrets", "secrets"),
+        "PENASIHAT_PROFIL_JAWABAN": ("lengkap", "secrets"),
+        "PENASIHAT_SUHU": ("0.9", "env"),
+        "PENASIHAT_ROUTER": ("1", "preset"),
+    }
+    for nama, (isi, lapisan) in harapan.items():
+        assert (os.environ[nama], hasil["sumber"][nama]) == (isi, lapisan)
+
+
+def test_ganti_preset_membuang_nilai_lama(berkas):
+    os.environ["PENASIHAT_OCR_MAKS_HALAMAN"] = "20"
+    konfigurasi.terapkan(berkas=berkas)
+    assert os.environ["PENASIHAT_HEDGE"] == "1"
+    hasil = konfigurasi.terapkan(sekret={"preset": "standar"}, berkas=berkas)
+    assert hasil["preset"] == "standar"
+    assert "PENASIHAT_HEDGE" not in os.environ
+    assert os.environ["PENASIHAT_K"] == "5"
+    # Nilai dari luar tidak pernah ditimpa atau dihapus
+    assert os.environ["PENASIHAT_OCR_MAKS_HALAMAN"] == "20"
+
+
+def test_preset_dari_env_menang(berkas):
+    os.environ["PENASIHAT_PRESET"] = "offline"
+    hasil = konfigurasi.terapkan(sekret={"preset": "high-quality"}, berkas=berkas)
+    assert hasil["preset"] == "offline" and hasil["sumber"]["PENASIHAT_PRESET"] == "env"
+    assert os.environ["PENASIHAT_LURING"] == "1"
+
+
+@pytest.mark.parametrize("sekret", [{"penasihat": {"tidak_ada": 1}}, {"preset": "turbo"}])
+def test_kunci_atau_preset_tidak_dikenal(sekret):
+    with pytest.raises(ValueError):
+        konfigurasi.terapkan(sekret=sekret, berkas="/tidak/ada.json")
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import heapq
+
+import pytest
+
+from penasihat import mode_darurat
+from penasihat.mode_darurat import CATATAN_DARURAT, CATATAN_SIRKUIT_TERBUKA, rekomendasi_darurat
+from penasihat.pemetaan import skor_bidang_dari_map
+
+PROFIL = {"nilai": {"Matematika": 90, "Fisika": 85, "Biologi": 70}, "minat": ["Teknologi"], "toleransi": "Tinggi"}
+
+
+@pytest.fixture(autouse=True)
+def _daring(monkeypatch):
+    monkeypatch.setattr(mode_darurat, "LURING", False)
+
+
+def test_alternatif_dari_skor_lengkap():
+    skor = skor_bidang_dari_map(PROFIL["nilai"], PROFIL["minat"], PROFIL["toleransi"])
+    top5 = heapq.nlargest(5, skor, key=skor.get)
+    data = rekomendasi_darurat(PROFIL, skor, top5)
+    assert data["alternatif"]
+    ditampilkan = {b["nama"] for b in data["bidang"]}
+    assert not any(a.split(" — ")[0] in ditampilkan for a in data["alternatif"])
+
+
+def test_catatan_sesuai_jalur():
+    skor = skor_bidang_dari_map(PROFIL["nilai"], PROFIL["minat"], PROFIL["toleransi"])
+    top5 = heapq.nlargest(5, skor, key=skor.get)
+    assert rekomendasi_darurat(PROFIL, skor, top5, susulan=True)["catatan"] == CATATAN_DARURAT
+    # Pemutus terbuka: tidak ada jawaban AI yang menyusul, jadi tidak dijanjikan
+    assert rekomendasi_darurat(PROFIL, skor, top5)["catatan"] == CATATAN_SIRKUIT_TERBUKA
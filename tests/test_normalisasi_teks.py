@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from penasihat.normalisasi_teks import PEMISAH_HALAMAN, normalisasi
+
+KOP = "SMA NEGERI 1 CONTOH"
+
+
+def _halaman(n: int, tengah: str = "") -> str:
+    isi = [f"Kegiatan {n}: proyek sains dan lomba debat tingkat kota nomor {n}." for _ in range(8)]
+    if tengah:
+        isi.insert(4, tengah)
+    return "\n".join([KOP, *isi, f"Halaman {n} dari 3"])
+
+
+def test_baris_berulang_hanya_dibuang_di_tepi_halaman():
+    teks = PEMISAH_HALAMAN.join([_halaman(1, tengah=KOP), _halaman(2), _halaman(3)])
+    bersih, laporan = normalisasi(teks)
+    # Kop di baris pertama tiap halaman dibuang, kop di tengah halaman 1 dipertahankan
+    assert bersih.count(KOP) == 1
+    assert "Halaman" not in bersih
+    assert laporan["baris_berulang"] == 6
+    assert laporan["karakter_dihapus"] == len(teks) - len(bersih)
+    assert laporan["potongan_dihapus"] >= 0
+
+
+def test_blok_identitas_tidak_dianggap_tanda_tangan():
+    identitas = "Nama Siswa : Budi Santoso\nNISN : 0051234567\nWali Kelas : Sari, S.Pd NIP 198001012005012001"
+    catatan = "Catatan wali kelas: Budi aktif di OSIS.\nPrestasi: juara 1 lomba debat kota.\nEkstrakurikuler: Pramuka"
+    tanda_tangan = "Mengetahui,\nKepala Sekolah\nDrs. Ahmad\nNIP 196501011990031001"
+    bersih, laporan = normalisasi("\n\n".join([identitas, catatan, tanda_tangan]))
+    assert "NISN : 0051234567" in bersih and "Wali Kelas : Sari" in bersih
+    assert "juara 1 lomba debat" in bersih
+    assert "Drs. Ahmad" not in bersih
+    assert laporan["blok_dibuang"] == 1
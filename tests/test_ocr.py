@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from penasihat import ocr, tenggat
+from penasihat.ekstraksi import _pdf_sintetis
+
+pytest.importorskip("pymupdf")
+
+
+class _PoolMacet:
+    """Pool OCR palsu: tugas tidak pernah selesai."""
+
+    def __init__(self):
+        self.tugas = []
+
+    def submit(self, *args, **kwargs):
+        self.tugas.append(Future())
+        return self.tugas[-1]
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    pool = _PoolMacet()
+    monkeypatch.setattr(ocr, "ocr_tersedia", lambda: True)
+    monkeypatch.setattr(ocr, "_pool_ocr", lambda: pool)
+    monkeypatch.setattr(ocr, "DIREKTORI_CACHE_OCR", str(tmp_path))
+    return pool
+
+
+def test_ocr_berhenti_saat_permintaan_dibatalkan(pool):
+    aktif = tenggat.Tenggat(60)
+    threading.Timer(0.2, aktif.batalkan).start()
+    with tenggat.dalam(aktif), pytest.raises(tenggat.Dibatalkan):
+        ocr.ocr_halaman_pdf(_pdf_sintetis(3), [0, 1, 2], dpi=20)
+    assert len(pool.tugas) == 3
+    assert all(t.cancelled() for t in pool.tugas)
+
+
+def test_ocr_tidak_mulai_setelah_tenggat_lewat(pool):
+    lewat = tenggat.Tenggat(0.001)
+    time.sleep(0.01)
+    with tenggat.dalam(lewat), pytest.raises(tenggat.WaktuHabis):
+        ocr.ocr_halaman_pdf(_pdf_sintetis(2), [0, 1], dpi=20)
+    assert pool.tugas == []
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from langchain_core.documents import Document
+
+from penasihat.pemotong_rapor import potong_dokumen
+
+
+def test_bagian_pendek_dengan_metadata_sama_digabung():
+    dokumen = [
+        Document(page_content="Ekstrakurikuler\nPramuka: aktif", metadata={"sumber": "rapor.pdf"}),
+        Document(page_content="Ekstrakurikuler\nPaskibra: baik", metadata={"sumber": "rapor.pdf"}),
+        Document(page_content="Ekstrakurikuler\nPMR: baik", metadata={"sumber": "lain.pdf"}),
+    ]
+    _, potongan = potong_dokumen(dokumen)
+    assert [p.metadata["sumber"] for p in potongan] == ["rapor.pdf", "lain.pdf"]
+    assert "Pramuka" in potongan[0].page_content and "Paskibra" in potongan[0].page_content
+    assert potongan[0].metadata["char_count"] == len(potongan[0].page_content)
+
+
+def test_bagian_panjang_tetap_dipotong():
+    isi = "Ekstrakurikuler\n" + "\n".join(f"Kegiatan {i}: pramuka tingkat kota." for i in range(40))
+    dokumen = [Document(page_content=isi, metadata={}), Document(page_content="Ekstrakurikuler\nPMR", metadata={})]
+    _, potongan = potong_dokumen(dokumen, ukuran=300, tumpang_tindih=50)
+    assert all(len(p.page_content) <= 300 for p in potongan)
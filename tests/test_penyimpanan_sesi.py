@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from penasihat.penyimpanan_sesi import buat_penyimpanan_sesi
+from penasihat.riwayat import PenyimpananPesan
+
+
+def test_sqlite_pulang_pergi(tmp_path):
+    penyimpanan = buat_penyimpanan_sesi(f"sqlite:///{tmp_path / 'sesi.sqlite3'}")
+    data = {"ringkasan_profil": "Kelas: 12", "profil_skor": {"nilai": {"Matematika": 9}}, "pesan": {"terbaru": []}}
+    penyimpanan.simpan("sesi", data)
+    assert penyimpanan.muat("sesi") == data
+    penyimpanan.hapus("sesi")
+    assert penyimpanan.muat("sesi") is None
+
+    potongan = [{"teks": "Nilai Matematika 90", "metadata": {"bagian": "nilai", "semester": 2}}]
+    penyimpanan.simpan_potongan("lampiran", potongan)
+    assert penyimpanan.muat_potongan("lampiran") == potongan
+
+    penyimpanan.simpan_status("susulan", {"status": "selesai"})
+    assert penyimpanan.muat_status("susulan") == {"status": "selesai"}
+    penyimpanan.hapus_status("susulan")
+    assert penyimpanan.muat_status("susulan") is None
+
+
+def test_arsip_chat_terbawa_ke_replika_lain(tmp_path):
+    url = f"sqlite:///{tmp_path / 'sesi.sqlite3'}"
+    pesan = PenyimpananPesan("sesi", direktori=str(tmp_path / "lokal"), batas_memori=2,
+                             penyimpanan=buat_penyimpanan_sesi(url))
+    for i in range(5):
+        pesan.append({"role": "user", "content": f"pesan {i}"})
+    assert not (tmp_path / "lokal").exists()
+
+    # Replika lain: koneksi baru ke backend yang sama, hanya membawa pesan di memori
+    lanjutan = PenyimpananPesan.dari_dict("sesi", pesan.ke_dict(), penyimpanan=buat_penyimpanan_sesi(url))
+    assert len(lanjutan) == 5
+    assert [p["content"] for p in lanjutan.muat_sebelumnya(2)] == ["pesan 1", "pesan 2"]
+    lanjutan.bersihkan()
+    assert buat_penyimpanan_sesi(url).jumlah_arsip("sesi") == 0
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from penasihat.router_intent import PencatatRute, cari_bidang, jawab_lokal, klasifikasikan
+
+
+@pytest.mark.parametrize("pertanyaan", [
+    "top 5 jurusan untuk saya yang tidak butuh matematika",
+    "rekomendasi jurusan lain selain teknik?",
+    "jurusan terbaik kecuali kedokteran",
+    "5 besar jurusan tanpa kimia",
+    "jurusan teratas yang bukan teknik",
+    "skor teknik sipil saya kalau matematika tidak dihitung",
+])
+def test_pertanyaan_bersyarat_ke_llm(pertanyaan):
+    assert klasifikasikan(pertanyaan)["intent"] == "llm"
+
+
+@pytest.mark.parametrize("pertanyaan, intent", [
+    ("apa 5 jurusan teratas saya?", "teratas"),
+    ("berapa skor Teknik Sipil saya?", "skor"),
+    ("apa beda Farmasi dan Kedokteran?", "beda"),
+])
+def test_pertanyaan_sederhana_dijawab_lokal(pertanyaan, intent):
+    assert klasifikasikan(pertanyaan)["intent"] == intent
+
+
+def test_alias_pendek():
+    assert cari_bidang("skor saya di HI berapa") == ["HI (Hubungan Internasional)"]
+    assert cari_bidang("skor AI saya") == ["Data Science / AI"]
+    assert cari_bidang("peringkat K3 saya") == ["Teknik Lingkungan / HSE"]
+    assert klasifikasikan("skor saya di HI berapa")["intent"] == "skor"
+
+
+def test_log_tanpa_teks_dan_berputar(tmp_path):
+    jalur = tmp_path / "rute.jsonl"
+    pencatat = PencatatRute(str(jalur), teks=False, maks_byte=300)
+    rute = klasifikasikan("apa 5 jurusan teratas saya?")
+    for _ in range(10):
+        pencatat.catat("sesi", "apa 5 jurusan teratas saya?", rute, True)
+    entri = [json.loads(b) for b in jalur.read_text(encoding="utf-8").splitlines()]
+    assert entri and all("pertanyaan" not in e and e["hash"] for e in entri)
+    assert (tmp_path / "rute.jsonl.1").exists()
+    assert jalur.stat().st_size < 600
+
+
+@pytest.mark.parametrize("pertanyaan", [
+    "berapa skor data science kalau matematika saya naik?",
+    "jika nilai fisika saya 9, apa 5 jurusan teratas saya?",
+    "seandainya saya suka biologi, berapa skor farmasi?",
+    "misal kimia saya 10, skor kedokteran berapa?",
+])
+def test_pertanyaan_pengandaian_ke_llm(pertanyaan):
+    assert klasifikasikan(pertanyaan)["intent"] == "llm"
+
+
+def test_desain_umum_bukan_dkv():
+    assert cari_bidang("desain interior dan arsitektur") == ["Arsitektur"]
+    assert cari_bidang("skor DKV saya") == ["DKV/Desain"]
+
+
+def test_skor_dan_beda_memakai_sumber_skor_yang_sama():
+    profil = {"nilai": {"Matematika": 8, "Biologi": 9, "Kimia": 9}, "minat": [], "toleransi": None}
+    skor = {"Farmasi": 42.0, "Kedokteran": 40.0, "Program X": 50.0}
+    jawaban = jawab_lokal(klasifikasikan("berapa skor Farmasi saya?"), profil, skor)
+    assert "skor **42.0** (peringkat 2 dari 3)" in jawaban
+    assert "| Skor pemetaanmu | 42.0 | 40.0 |" in jawab_lokal(klasifikasikan("apa beda Farmasi dan Kedokteran?"), profil, skor)
+    # Bidang yang tidak ada di sumber skor (mis. katalog) → diteruskan ke Gemini
+    assert jawab_lokal(klasifikasikan("berapa skor Teknik Sipil saya?"), profil, skor) is None
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from penasihat import tenggat
+from penasihat.penyimpanan_sesi import PenyimpananSesiSQLite
+from penasihat.tenggat import Dibatalkan, PengelolaTenggat
+
+
+@pytest.fixture
+def dua_worker(tmp_path, monkeypatch):
+    """Dua pengelola (= dua worker API) dengan penyimpanan sesi bersama."""
+    monkeypatch.setattr(tenggat, "INTERVAL_BERSAMA", 0)
+    jalur = str(tmp_path / "sesi.sqlite3")
+    return PengelolaTenggat(PenyimpananSesiSQLite(jalur)), PengelolaTenggat(PenyimpananSesiSQLite(jalur))
+
+
+def test_permintaan_pengganti_di_worker_lain_membatalkan(dua_worker):
+    a, b = dua_worker
+    lama = a.mulai("sesi", "chat", 60)
+    lama.periksa("retrieval")
+    baru = b.mulai("sesi", "chat", 60)
+    with pytest.raises(Dibatalkan):
+        lama.periksa("generasi")
+    baru.periksa("generasi")
+
+
+def test_hapus_sesi_di_worker_lain_membatalkan(dua_worker):
+    a, b = dua_worker
+    chat = a.mulai("sesi", "chat", 60)
+    lampiran = a.mulai("sesi", "lampiran", 60)
+    lain = a.mulai("sesi-lain", "chat", 60)
+    b.batalkan_sesi("sesi")
+    for t in (chat, lampiran):
+        with pytest.raises(Dibatalkan):
+            t.periksa("generasi")
+    lain.periksa("generasi")
+    # Permintaan baru setelah sesi diakhiri tidak ikut dibatalkan
+    a.mulai("sesi", "chat", 60).periksa("generasi")
+
+
+def test_iterasi_berhenti_saat_dibatalkan_worker_lain(dua_worker):
+    a, b = dua_worker
+    aktif = a.mulai("sesi", "chat", 60)
+    diterima = []
+    with pytest.raises(Dibatalkan):
+        for bagian in tenggat.iterasi(aktif, iter(range(10)), "generasi"):
+            diterima.append(bagian)
+            if bagian == 2:
+                b.batalkan_sesi("sesi")
+    assert diterima == [0, 1, 2]
+
+
+def test_tanpa_penyimpanan_hanya_lokal():
+    a, b = PengelolaTenggat(), PengelolaTenggat()
+    lama = a.mulai("sesi", "chat", 60)
+    b.batalkan_sesi("sesi")
+    lama.periksa("generasi")
+    a.batalkan_sesi("sesi")
+    with pytest.raises(Dibatalkan):
+        lama.periksa("generasi")